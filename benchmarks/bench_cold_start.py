@@ -0,0 +1,64 @@
+"""Cold start, from a fresh interpreter to a Voro ready to poll, by phase.
+
+Each run is a new process on a new database, so every import and the
+schema creation are paid again. Pass --budget-ms to fail when the median
+total goes over it, for use as a regression check.
+
+Run from the repository root: python -m benchmarks.bench_cold_start [--runs 10] [--budget-ms 1000]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Builds the bot and prints its timings, with a throwaway token so nothing connects
+STARTUP = """
+import json, main
+from database.writer import close_writers
+bot = main.Voro("123:bench")
+close_writers()
+print(json.dumps(bot.startup_timings))
+"""
+
+PHASES = ("import_ms", "db_init_ms", "application_ms", "handlers_ms", "total_ms")
+
+
+def cold_start(directory: str) -> dict:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", STARTUP], cwd=directory, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings["process_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, help="fail if the median total_ms is over this")
+    args = parser.parse_args()
+
+    runs = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as directory:
+            runs.append(cold_start(directory))
+
+    for phase in PHASES + ("process_ms",):
+        values = [run[phase] for run in runs]
+        print(f"{phase:>15}: median {statistics.median(values):7.1f}  min {min(values):7.1f}  max {max(values):7.1f}")
+
+    total = statistics.median(run["total_ms"] for run in runs)
+    if args.budget_ms is not None and total > args.budget_ms:
+        print(f"over budget: median total {total:.1f} ms > {args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
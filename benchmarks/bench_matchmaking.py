@@ -0,0 +1,46 @@
+"""Match alert lookups against a large subscriber index.
+
+Run from the repository root: python -m benchmarks.bench_matchmaking
+"""
+import random
+import time
+
+from models.match_subscription import ALL_DAYS, MatchSubscription
+from services.match_service import WEEKDAYS, WEEKENDS, SubscriberIndex
+
+SUBSCRIBERS = 100_000
+QUERIES = 10_000
+
+
+def make_subscription(i: int) -> MatchSubscription:
+    skill = round(random.uniform(1.0, 7.0) * 2) / 2
+    days = random.choice([ALL_DAYS, ALL_DAYS, WEEKDAYS, WEEKENDS, 1 << random.randrange(7)])
+    if random.random() < 0.5:
+        return MatchSubscription(str(i), skill, days)
+    start_hour = random.randrange(6, 21)
+    return MatchSubscription(str(i), skill, days, start_hour, min(24, start_hour + random.randint(2, 4)))
+
+
+def main():
+    random.seed(1)
+    index = SubscriberIndex()
+
+    started = time.perf_counter()
+    index.load(make_subscription(i) for i in range(SUBSCRIBERS))
+    print(f"load {SUBSCRIBERS} subscribers: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    queries = []
+    for _ in range(QUERIES):
+        min_skill = round(random.uniform(1.0, 6.5) * 2) / 2
+        queries.append((min_skill, min_skill + 0.5, random.randrange(7), random.randrange(6, 23)))
+
+    matched = 0
+    started = time.perf_counter()
+    for query in queries:
+        matched += len(index.match(*query))
+    elapsed = time.perf_counter() - started
+    print(f"match: {elapsed / QUERIES * 1e6:.1f} us/query, {matched / QUERIES:.0f} matches/query on average")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Game model construction, memory and listing cost, before and after slots and lazy players.
+
+Run from the repository root: python -m benchmarks.bench_models
+"""
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Optional
+
+from database.db_manager import GAME_SELECT, DatabaseManager
+from models.game import Game
+
+GAMES = 5_000
+ROWS = 100_000
+PLAYERS_PER_GAME = 3
+
+
+@dataclass
+class LegacyGame:
+    """The model as it was: no slots, player_ids always filled"""
+    game_id: str
+    game_name: str
+    creator_id: str
+    location: str
+    start_time: int
+    end_time: int
+    court_cost: float
+    min_skill: float
+    max_skill: float
+    max_players: int
+    current_players: int
+    status: str
+    telegram_group_id: str
+    created_at: int
+    game_description: str
+    auto_fill: bool = False
+    series_id: Optional[str] = None
+    player_ids: list = field(default_factory=list)
+
+
+def make_row(i: int, now: int) -> tuple:
+    start = now + 3600 + i * 60
+    return (f"{i:08x}", f"Game {i}", str(i % 500), "Kallang Tennis Centre", start, start + 7200,
+            12.5, 2.5, 4.0, 4, 1, "open", "", now, "Friendly doubles, bring balls", 0, None)
+
+
+def measure(label: str, build):
+    """Time one run, then trace the allocations of another, tracing slows the run down"""
+    started = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    objects = build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label}: {elapsed * 1000:.0f} ms, peak {peak / 2**20:.1f} MiB")
+    return objects
+
+
+def legacy_open_games(db: DatabaseManager, now: int) -> list:
+    """get_open_games before the change, one player query per game"""
+    with db._connect() as conn:
+        games = []
+        for row in conn.execute(f'''
+            SELECT {GAME_SELECT} FROM games WHERE status = 'open' AND start_time > ? ORDER BY start_time
+        ''', (now,)).fetchall():
+            game = LegacyGame(*row)
+            game.player_ids = [r[0] for r in conn.execute('''
+                SELECT user_id FROM game_players WHERE game_id = ?
+            ''', (game.game_id,))]
+            games.append(game)
+        return games
+
+
+def populate(db: DatabaseManager, now: int):
+    with db._connect() as conn:
+        conn.executemany('''
+            INSERT INTO users (telegram_id, username, display_name, created_at) VALUES (?, ?, ?, ?)
+        ''', [(str(i), f"user{i}", f"User {i}", now) for i in range(1000)])
+        conn.executemany(f'''
+            INSERT INTO games ({GAME_SELECT}) VALUES ({",".join("?" * 17)})
+        ''', [make_row(i, now) for i in range(GAMES)])
+        conn.executemany('''
+            INSERT OR IGNORE INTO game_players (game_id, user_id, joined_at) VALUES (?, ?, ?)
+        ''', [(f"{i:08x}", str(random.randrange(1000)), now) for i in range(GAMES) for _ in range(PLAYERS_PER_GAME)])
+
+
+def main():
+    random.seed(1)
+    now = int(time.time())
+
+    rows = [make_row(i, now) for i in range(ROWS)]
+    measure(f"construct {ROWS} LegacyGame", lambda: [LegacyGame(*row) for row in rows])
+    measure(f"construct {ROWS} Game", lambda: [Game.from_row(row) for row in rows])
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = DatabaseManager(os.path.join(directory, "bench.db"))
+        populate(db, now)
+
+        measure(f"list {GAMES} games, legacy N+1 players", lambda: legacy_open_games(db, now))
+        measure(f"list {GAMES} games, players not read", db.get_open_games)
+        games = measure(f"list {GAMES} games, all players read", lambda: [
+            game for game in db.get_open_games() if game.player_ids is not None
+        ])
+        measure(f"list {GAMES} summaries", db.get_open_game_summaries)
+        print(f"players loaded: {sum(len(game.player_ids) for game in games)}")
+
+
+if __name__ == "__main__":
+    main()
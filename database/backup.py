@@ -0,0 +1,172 @@
+"""Online hot backups of the bot database.
+
+Snapshots are copied with SQLite's online backup API a few pages at a time,
+sleeping between steps. The copy never holds a lock on the live database for
+long, and writers carry on while a backup runs. Each snapshot is integrity
+checked before it is kept. Only the newest snapshots are kept.
+
+    python -m database.backup --snapshot
+    python -m database.backup --verify backups/voro-20250701-100000.db
+    python -m database.backup --restore backups/voro-20250701-100000.db
+"""
+import argparse
+import asyncio
+import glob
+import logging
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from telegram.ext import ContextTypes
+
+logger = logging.getLogger(__name__)
+
+# Pages copied per step and seconds slept between steps
+PAGES_PER_STEP = 256
+STEP_SLEEP = 0.01
+
+REQUIRED_TABLES = ('users', 'games', 'game_players', 'waitlist')
+
+
+class BackupError(Exception):
+    pass
+
+
+def table_counts(db_path: str) -> Dict[str, int]:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        names = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )]
+        return {name: conn.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0] for name in names}
+    finally:
+        conn.close()
+
+
+def verify(db_path: str) -> Dict[str, int]:
+    """Integrity check a database file, returning its table row counts. Raises BackupError if it is damaged."""
+    if not os.path.exists(db_path):
+        raise BackupError(f"{db_path} does not exist")
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        result = [row[0] for row in conn.execute('PRAGMA integrity_check')]
+    except sqlite3.DatabaseError as e:
+        raise BackupError(f"{db_path} is not a valid database: {e}")
+    finally:
+        conn.close()
+    if result != ['ok']:
+        raise BackupError(f"{db_path} failed integrity check: {'; '.join(result[:5])}")
+
+    counts = table_counts(db_path)
+    missing = [table for table in REQUIRED_TABLES if table not in counts]
+    if missing:
+        raise BackupError(f"{db_path} is missing tables: {', '.join(missing)}")
+    return counts
+
+
+def copy_database(source_path: str, target_path: str, pages: int = PAGES_PER_STEP, sleep: float = STEP_SLEEP,
+                  journal_mode: Optional[str] = None):
+    """The copy inherits the source's journal mode unless journal_mode is given"""
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target, pages=pages, sleep=sleep)
+        if journal_mode:
+            target.execute(f'PRAGMA journal_mode={journal_mode}')
+    finally:
+        target.close()
+        source.close()
+
+
+class BackupManager:
+    def __init__(self, db_path: str, backup_dir: str = "backups", keep: int = 14):
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self.prefix = os.path.splitext(os.path.basename(db_path))[0]
+
+    def list_snapshots(self) -> List[str]:
+        """Snapshots oldest first, the timestamp in the name sorts chronologically"""
+        return sorted(glob.glob(os.path.join(self.backup_dir, f"{self.prefix}-*.db")))
+
+    def snapshot(self) -> str:
+        """Take a verified snapshot and prune old ones, returning its path"""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(self.backup_dir, f"{self.prefix}-{stamp}.db")
+        partial = path + ".partial"
+
+        try:
+            # A snapshot is a single self-contained file, not a WAL database with -wal and -shm files beside it
+            copy_database(self.db_path, partial, journal_mode='DELETE')
+            verify(partial)
+            # Only complete, checked snapshots ever carry the final name
+            os.replace(partial, path)
+        finally:
+            for leftover in (partial, partial + "-wal", partial + "-shm"):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+        self.prune()
+        return path
+
+    def prune(self):
+        for path in self.list_snapshots()[:-self.keep]:
+            os.remove(path)
+
+    def restore(self, snapshot_path: str) -> Dict[str, int]:
+        """Verify a snapshot, copy it over the database and verify the result matches.
+
+        Stop the bot first, a restore replaces everything written since the snapshot.
+        """
+        expected = verify(snapshot_path)
+        # Snapshots are kept out of WAL mode, the live database runs in it
+        copy_database(snapshot_path, self.db_path, journal_mode='WAL')
+        restored = verify(self.db_path)
+        if restored != expected:
+            raise BackupError(f"Restored database does not match snapshot: {restored} != {expected}")
+        return restored
+
+    async def run_backup(self, context: ContextTypes.DEFAULT_TYPE):
+        """Scheduled job, the copy runs in a thread so the bot keeps answering"""
+        try:
+            path = await asyncio.to_thread(self.snapshot)
+            logger.info("Backup written to %s", path)
+        except Exception as e:
+            logger.exception("Error backing up database")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up, verify and restore the Voro database")
+    parser.add_argument('--db', default='voro.db', help="database file (default: voro.db)")
+    parser.add_argument('--dir', default=os.getenv("BACKUP_DIR", "backups"), help="snapshot directory")
+    parser.add_argument('--keep', type=int, default=int(os.getenv("BACKUP_KEEP", "14")), help="snapshots to keep")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument('--snapshot', action='store_true', help="take a snapshot now")
+    action.add_argument('--list', action='store_true', help="list snapshots")
+    action.add_argument('--verify', metavar='SNAPSHOT', help="integrity check a snapshot")
+    action.add_argument('--restore', metavar='SNAPSHOT', help="restore a snapshot over --db and verify it")
+    args = parser.parse_args()
+
+    manager = BackupManager(args.db, args.dir, args.keep)
+    try:
+        if args.snapshot:
+            print(manager.snapshot())
+        elif args.list:
+            for path in manager.list_snapshots():
+                print(path)
+        elif args.verify:
+            for table, rows in verify(args.verify).items():
+                print(f"{table}: {rows} rows")
+            print(f"{args.verify}: ok")
+        elif args.restore:
+            for table, rows in manager.restore(args.restore).items():
+                print(f"{table}: {rows} rows")
+            print(f"Restored {args.restore} to {args.db}: ok")
+    except BackupError as e:
+        raise SystemExit(f"error: {e}")
+
+
+if __name__ == '__main__':
+    main()
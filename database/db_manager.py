@@ -1,18 +1,118 @@
+import asyncio
+import logging
 import sqlite3
-from typing import List, Optional
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
-from models.game import Game
+from models.game import GAME_COLUMNS, SUMMARY_COLUMNS, Game, GameSummary, select_columns
 from models.user import User
-from models.waitlist import WaitlistEntry
+from models.waitlist import JoinResult, WaitlistEntry
+from models.match_subscription import MatchSubscription
+from models.saved_search import SavedSearch
+from models.stats import StatsSummary, fill_time_bucket
+from models.game_series import GameSeries
+from database.writer import get_writer
 from datetime import datetime as dt
 
+logger = logging.getLogger(__name__)
+
+GAME_SELECT = select_columns(GAME_COLUMNS)
+
+# Used when a single bot runs, each bot gets its own file when several share the process
+DEFAULT_DB_PATH = "voro.db"
+
+# Bound parameters per IN (...) query, well under SQLite's limit
+MAX_IN_PARAMS = 500
+
+
+def overlapping_games(user_id: str, start_time: str, end_time: str, game_id: str) -> str:
+    """FROM and WHERE clauses for the user's open or full games overlapping [start_time, end_time),
+    other than game_id. Arguments are SQL expressions, parameters or outer query columns."""
+    return f'''
+        FROM game_players gp
+        JOIN games o ON o.game_id = gp.game_id
+        WHERE gp.user_id = {user_id} AND o.game_id != {game_id}
+            AND o.start_time < {end_time} AND o.end_time > {start_time}
+            AND o.status IN ('open', 'full')
+    '''
+
+# Bumped whenever init_database has to rebuild existing tables, stored in PRAGMA user_version
+SCHEMA_VERSION = 2
+
+# Template fields a host can change on a series, the same column names exist on games
+SERIES_EDITABLE_COLUMNS = ('game_name', 'game_description', 'location', 'court_cost',
+                           'min_skill', 'max_skill', 'max_players')
+
+# Tables rebuilt to fix their foreign keys, parents first. Version 1 added the foreign keys,
+# version 2 stopped deleting a user from deleting the games they host and backfilled joined_at.
+FK_REBUILT_TABLES = ('games', 'waitlist', 'game_players', 'saved_search_matches')
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def _log_failed_write(future):
+    if future.exception():
+        logger.error("Queued write failed", exc_info=future.exception())
+
+
+# Database files whose schema this process has already checked
+_schema_checked = set()
+_schema_lock = threading.Lock()
+
+
 class DatabaseManager:
-    def __init__(self, db_path: str = "voro.db"):
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
         self.db_path = db_path
-        self.init_database()
+        # modified: the schema is checked once per file, not once per service
+        with _schema_lock:
+            if db_path not in _schema_checked:
+                self.init_database()
+                _schema_checked.add(db_path)
     
+    def _connect(self) -> sqlite3.Connection:
+        """SQLite leaves foreign keys off unless every connection turns them on"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA foreign_keys = ON')
+        return conn
+
+    # added: every write goes through the database's serialized writer, see database/writer.py
+    def _write(self, work: Callable[[sqlite3.Connection], object], wait: bool = True):
+        """Run work(conn) in the writer's next group commit and return its result.
+        With wait=False the write is only queued, and a failure is logged instead of raised.
+        Waiting is for threads and scripts, the event loop awaits _write_async instead."""
+        if wait:
+            if _on_event_loop():
+                raise RuntimeError("A blocking write on the event loop stalls every update, await _write_async")
+            return get_writer(self.db_path).submit(work)
+        get_writer(self.db_path).submit(work, wait=False).add_done_callback(_log_failed_write)
+
+    async def _write_async(self, work: Callable[[sqlite3.Connection], object]):
+        """Every write made from the event loop. Awaits the commit instead of blocking on it,
+        so the writer retrying a busy lock stalls only this update, and writes from
+        concurrent updates are queued together and share one commit"""
+        return await asyncio.wrap_future(get_writer(self.db_path).submit(work, wait=False))
+
+    def get_write_stats(self) -> dict:
+        """Writer counters since startup: writes, commits, failed, lock_waits, retries, ..."""
+        return get_writer(self.db_path).stats()
+
     def init_database(self):
+        # Foreign keys stay off on this connection so a schema upgrade can rebuild referenced tables
         with sqlite3.connect(self.db_path) as conn:
+            # added: WAL lets readers such as exports and backups run without blocking the writer
+            conn.execute('PRAGMA journal_mode=WAL')
+
+            # Schema changes happen in one transaction, a failed upgrade leaves the old schema untouched
+            conn.execute('BEGIN IMMEDIATE')
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            legacy_tables = self._rename_legacy_tables(conn) if version < SCHEMA_VERSION else []
 
             # modified: created_at is now a timestamp with no default value
             # modified: skill_level is now a float
@@ -36,6 +136,7 @@ class DatabaseManager:
             # modified: skill_range is now min_skill and max_skill
             # modified: telegram_group_id is now TEXT
             # modified: added game description and game name
+            # modified: creator_id no longer cascades, delete_user cancels hosted games itself so their players hear about it
 
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS games (
@@ -65,8 +166,8 @@ class DatabaseManager:
                     user_id TEXT NOT NULL,
                     status TEXT DEFAULT 'pending' NOT NULL,
                     created_at INTEGER NOT NULL,
-                    FOREIGN KEY (game_id) REFERENCES games (id),
-                    FOREIGN KEY (user_id) REFERENCES users (telegram_id),
+                    FOREIGN KEY (game_id) REFERENCES games (game_id) ON DELETE CASCADE,
+                    FOREIGN KEY (user_id) REFERENCES users (telegram_id) ON DELETE CASCADE,
                     UNIQUE(game_id, user_id)
                 )
             ''')
@@ -78,187 +179,880 @@ class DatabaseManager:
                     user_id TEXT,
                     joined_at INTEGER,
                     PRIMARY KEY (game_id, user_id),
-                    FOREIGN KEY (game_id) REFERENCES games (id),
-                    FOREIGN KEY (user_id) REFERENCES users (telegram_id)
+                    FOREIGN KEY (game_id) REFERENCES games (game_id) ON DELETE CASCADE,
+                    FOREIGN KEY (user_id) REFERENCES users (telegram_id) ON DELETE CASCADE
+                )
+            ''')
+
+            # added: a player leaving, however they leave, frees their seat and reopens a full game
+            # Joins still bump current_players in _approve, the creator's seat is counted by create_game
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS game_players_after_delete
+                AFTER DELETE ON game_players
+                BEGIN
+                    UPDATE games SET current_players = current_players - 1,
+                        status = CASE WHEN status = 'full' THEN 'open' ELSE status END
+                    WHERE game_id = OLD.game_id;
+                END
+            ''')
+
+            # added: opt-in alerts for new games matching a user's skill and schedule
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS match_subscriptions (
+                    user_id TEXT PRIMARY KEY,
+                    skill_level REAL NOT NULL,
+                    days INTEGER NOT NULL DEFAULT 127,
+                    start_hour INTEGER NOT NULL DEFAULT 0,
+                    end_hour INTEGER NOT NULL DEFAULT 24,
+                    created_at INTEGER NOT NULL,
+                    FOREIGN KEY (user_id) REFERENCES users (telegram_id) ON DELETE CASCADE
+                )
+            ''')
+
+            # added: persistent /watch filters and the matches waiting for the next digest
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS saved_searches (
+                    search_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    days INTEGER NOT NULL DEFAULT 127,
+                    start_hour INTEGER NOT NULL DEFAULT 0,
+                    end_hour INTEGER NOT NULL DEFAULT 24,
+                    location TEXT NOT NULL DEFAULT '',
+                    max_cost REAL,
+                    created_at INTEGER NOT NULL,
+                    FOREIGN KEY (user_id) REFERENCES users (telegram_id) ON DELETE CASCADE
+                )
+            ''')
+
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS saved_search_matches (
+                    search_id INTEGER NOT NULL,
+                    user_id TEXT NOT NULL,
+                    game_id TEXT NOT NULL,
+                    created_at INTEGER NOT NULL,
+                    PRIMARY KEY (search_id, game_id),
+                    FOREIGN KEY (search_id) REFERENCES saved_searches (search_id) ON DELETE CASCADE,
+                    FOREIGN KEY (game_id) REFERENCES games (game_id) ON DELETE CASCADE
+                )
+            ''')
+
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_saved_search_matches_user
+                ON saved_search_matches (user_id)
+            ''')
+
+            # added: child-side indexes, so each cascading delete is an index lookup instead of a scan
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_games_creator ON games (creator_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_waitlist_user ON waitlist (user_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_game_players_user ON game_players (user_id)')
+            # added: schedule overlap checks and listings range over start and end times
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_games_start_end ON games (start_time, end_time)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_saved_searches_user ON saved_searches (user_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_saved_search_matches_game ON saved_search_matches (game_id)')
+
+            # added: auto_fill promotes the oldest eligible waitlist entry when a seat opens
+            self._ensure_column(conn, 'games', 'auto_fill', 'INTEGER NOT NULL DEFAULT 0')
+
+            # added: analytics rollups, bumped by the writes that change them so /stats never scans games
+            # day is the local date of the event as YYYY-MM-DD
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS daily_stats (
+                    day TEXT PRIMARY KEY,
+                    games_created INTEGER NOT NULL DEFAULT 0,
+                    games_filled INTEGER NOT NULL DEFAULT 0,
+                    games_cancelled INTEGER NOT NULL DEFAULT 0,
+                    players_joined INTEGER NOT NULL DEFAULT 0,
+                    players_left INTEGER NOT NULL DEFAULT 0,
+                    active_players INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS fill_time_histogram (
+                    day TEXT NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    games INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (day, bucket)
+                )
+            ''')
+
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS daily_active_players (
+                    day TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    PRIMARY KEY (day, user_id)
+                )
+            ''')
+
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS daily_venue_stats (
+                    day TEXT NOT NULL,
+                    venue TEXT NOT NULL,
+                    games INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (day, venue)
+                )
+            ''')
+
+            # added: first time a game filled up, so refills are not counted twice
+            self._ensure_column(conn, 'games', 'filled_at', 'INTEGER')
+
+            # added: recurring games, a template and rule from which games are created a few weeks ahead
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS game_series (
+                    series_id TEXT PRIMARY KEY,
+                    creator_id TEXT NOT NULL,
+                    game_name TEXT NOT NULL,
+                    game_description TEXT,
+                    location TEXT NOT NULL,
+                    first_start INTEGER NOT NULL,
+                    duration INTEGER NOT NULL,
+                    interval_weeks INTEGER NOT NULL DEFAULT 1,
+                    court_cost REAL DEFAULT 0.0,
+                    min_skill REAL DEFAULT 0.0,
+                    max_skill REAL DEFAULT 7.0,
+                    max_players INTEGER NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'active',
+                    materialized_until INTEGER NOT NULL DEFAULT 0,
+                    created_at INTEGER NOT NULL,
+                    FOREIGN KEY (creator_id) REFERENCES users (telegram_id) ON DELETE CASCADE
+                )
+            ''')
+
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_game_series_creator ON game_series (creator_id)')
+
+            # added: set once a game's reminder has gone out
+            self._ensure_column(conn, 'games', 'reminded_at', 'INTEGER')
+
+            self._ensure_column(conn, 'games', 'series_id',
+                                'TEXT REFERENCES game_series (series_id) ON DELETE SET NULL')
+
+            # One game per series and start time, materializing twice cannot duplicate a game
+            conn.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_games_series_start
+                ON games (series_id, start_time) WHERE series_id IS NOT NULL
+            ''')
+
+            # added: recently handled Telegram update IDs, so redelivered updates are dropped after a restart
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS processed_updates (
+                    update_id INTEGER PRIMARY KEY,
+                    processed_at INTEGER NOT NULL
+                )
+            ''')
+
+            # added: keys of writes that already ran, mapped to what they produced
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS idempotency_keys (
+                    idempotency_key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    created_at INTEGER NOT NULL
+                )
+            ''')
+
+            # added: join requests waiting to go out in the host's next digest
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS pending_host_notifications (
+                    game_id TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    host_id TEXT NOT NULL,
+                    created_at INTEGER NOT NULL,
+                    PRIMARY KEY (game_id, user_id),
+                    FOREIGN KEY (game_id) REFERENCES games (game_id) ON DELETE CASCADE,
+                    FOREIGN KEY (user_id) REFERENCES users (telegram_id) ON DELETE CASCADE
+                )
+            ''')
+
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_pending_host_notifications_host
+                ON pending_host_notifications (host_id, created_at)
+            ''')
+
+            # added: PTB user, chat, bot and callback data, pickled, written by database/persistence.py
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS persistence_data (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    updated_at INTEGER NOT NULL,
+                    PRIMARY KEY (kind, key)
                 )
             ''')
 
+            # added: ConversationHandler states, key is the conversation key as a JSON array
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS persistence_conversations (
+                    name TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    state BLOB NOT NULL,
+                    updated_at INTEGER NOT NULL,
+                    PRIMARY KEY (name, key)
+                )
+            ''')
+
+            if legacy_tables:
+                self._copy_legacy_tables(conn, legacy_tables)
+            if version < SCHEMA_VERSION:
+                # Hosts' seats were written without joined_at, which export --since filters on
+                conn.execute('''
+                    UPDATE game_players SET joined_at = (
+                        SELECT created_at FROM games WHERE games.game_id = game_players.game_id
+                    ) WHERE joined_at IS NULL
+                ''')
+            conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def _rename_legacy_tables(self, conn) -> List[str]:
+        """Move tables with outdated foreign keys aside so the CREATE statements build them afresh"""
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        tables = [table for table in FK_REBUILT_TABLES if table in existing]
+        # Keep references in other tables pointing at the new tables, not the renamed ones
+        conn.execute('PRAGMA legacy_alter_table = ON')
+        for table in tables:
+            # Index and trigger names must be free for the new tables. A trigger would otherwise
+            # move with the renamed table, skip its CREATE ... IF NOT EXISTS and go with the DROP.
+            for kind, name in conn.execute('''
+                SELECT type, name FROM sqlite_master
+                WHERE type IN ('index', 'trigger') AND tbl_name = ? AND sql IS NOT NULL
+            ''', (table,)).fetchall():
+                conn.execute(f'DROP {kind.upper()} {name}')
+            conn.execute(f'ALTER TABLE {table} RENAME TO legacy_{table}')
+        conn.execute('PRAGMA legacy_alter_table = OFF')
+        return tables
+
+    def _copy_legacy_tables(self, conn, tables: List[str]):
+        for table in tables:
+            old_columns = {row[1] for row in conn.execute(f'PRAGMA table_info(legacy_{table})')}
+            columns = ', '.join(row[1] for row in conn.execute(f'PRAGMA table_info({table})') if row[1] in old_columns)
+            conn.execute(f'INSERT INTO {table} ({columns}) SELECT {columns} FROM legacy_{table}')
+            conn.execute(f'DROP TABLE legacy_{table}')
+
+        # Rows orphaned while foreign keys were never enforced are kept, SQLite only checks a
+        # foreign key when it is written, so they still update and delete normally. Report them.
+        orphans = {}
+        for table, _, parent, _ in conn.execute('PRAGMA foreign_key_check'):
+            orphans[(table, parent)] = orphans.get((table, parent), 0) + 1
+        for (table, parent), count in orphans.items():
+            logger.warning("Rows kept with a missing parent row", extra={"table": table, "parent": parent, "rows": count})
+
+    def _ensure_column(self, conn, table: str, column: str, definition: str):
+        """Add a column to databases created before it existed"""
+        columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+        if column not in columns:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+    # IDEMPOTENCY
+
+    def record_update(self, update_id: int, processed_at: int):
+        """Queued, the update is handled without waiting for the record to commit"""
+        def write(conn):
+            conn.execute('''
+                INSERT OR IGNORE INTO processed_updates (update_id, processed_at) VALUES (?, ?)
+            ''', (update_id, processed_at))
+        self._write(write, wait=False)
+
+    def get_processed_updates(self, since: int, limit: int) -> List[Tuple[int, int]]:
+        """Most recent (update_id, processed_at) pairs, oldest first"""
+        with self._connect() as conn:
+            rows = conn.execute('''
+                SELECT update_id, processed_at FROM processed_updates
+                WHERE processed_at >= ? ORDER BY processed_at DESC, update_id DESC LIMIT ?
+            ''', (since, limit)).fetchall()
+            return rows[::-1]
+
+    def prune_idempotency_records(self, before: int):
+        def write(conn):
+            conn.execute('DELETE FROM processed_updates WHERE processed_at < ?', (before,))
+            conn.execute('DELETE FROM idempotency_keys WHERE created_at < ?', (before,))
+        self._write(write, wait=False)
+
+    # PERSISTENCE
+
+    def get_persistence_data(self, kind: str) -> List[Tuple[str, bytes]]:
+        with self._connect() as conn:
+            return conn.execute('''
+                SELECT key, data FROM persistence_data WHERE kind = ?
+            ''', (kind,)).fetchall()
+
+    def get_persistence_conversations(self, name: str) -> List[Tuple[str, bytes]]:
+        with self._connect() as conn:
+            return conn.execute('''
+                SELECT key, state FROM persistence_conversations WHERE name = ?
+            ''', (name,)).fetchall()
+
+    def save_persistence(self, data: Dict[Tuple[str, str], Optional[bytes]],
+                         conversations: Dict[Tuple[str, str], Optional[bytes]]) -> Future:
+        """Upsert {(kind, key): blob} and {(name, key): state} rows in one queued write,
+        deleting those whose value is None. Returns the write's Future, so async callers need not block."""
+        updated_at = int(dt.now().timestamp())
+
+        def write(conn):
+            for table, group, column, rows in (('persistence_data', 'kind', 'data', data),
+                                               ('persistence_conversations', 'name', 'state', conversations)):
+                conn.executemany(f'''
+                    INSERT INTO {table} ({group}, key, {column}, updated_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT ({group}, key) DO UPDATE SET
+                        {column} = excluded.{column}, updated_at = excluded.updated_at
+                ''', [(*ident, blob, updated_at) for ident, blob in rows.items() if blob is not None])
+                conn.executemany(f'''
+                    DELETE FROM {table} WHERE {group} = ? AND key = ?
+                ''', [ident for ident, blob in rows.items() if blob is None])
+        return get_writer(self.db_path).submit(write, wait=False)
+
+    # STATS
+
+    def _stats_day(self, timestamp: Optional[int] = None) -> str:
+        return dt.fromtimestamp(timestamp or dt.now().timestamp()).strftime('%Y-%m-%d')
+
+    def _bump_stats(self, conn, day: str, **counters: int):
+        columns = list(counters)
+        conn.execute(f'''
+            INSERT INTO daily_stats (day, {', '.join(columns)}) VALUES (?{', ?' * len(columns)})
+            ON CONFLICT (day) DO UPDATE SET {', '.join(f'{c} = {c} + excluded.{c}' for c in columns)}
+        ''', (day, *counters.values()))
+
+    def _mark_active(self, conn, day: str, user_id: str):
+        cursor = conn.execute('''
+            INSERT OR IGNORE INTO daily_active_players (day, user_id) VALUES (?, ?)
+        ''', (day, user_id))
+        if cursor.rowcount:
+            self._bump_stats(conn, day, active_players=1)
+
+    def get_stats(self, days: int) -> StatsSummary:
+        """Totals over the last `days` days, including today, read from the rollups only"""
+        since = self._stats_day(int(dt.now().timestamp()) - (days - 1) * 86400)
+        summary = StatsSummary(days=days)
+        with self._connect() as conn:
+            row = conn.execute('''
+                SELECT COALESCE(SUM(games_created), 0), COALESCE(SUM(games_filled), 0),
+                    COALESCE(SUM(games_cancelled), 0), COALESCE(SUM(players_joined), 0),
+                    COALESCE(SUM(players_left), 0)
+                FROM daily_stats WHERE day >= ?
+            ''', (since,)).fetchone()
+            (summary.games_created, summary.games_filled, summary.games_cancelled,
+             summary.players_joined, summary.players_left) = row
+
+            summary.active_players = conn.execute('''
+                SELECT COUNT(DISTINCT user_id) FROM daily_active_players WHERE day >= ?
+            ''', (since,)).fetchone()[0]
+
+            summary.fill_time_histogram = dict(conn.execute('''
+                SELECT bucket, SUM(games) FROM fill_time_histogram WHERE day >= ? GROUP BY bucket
+            ''', (since,)).fetchall())
+
+            summary.top_venues = conn.execute('''
+                SELECT venue, SUM(games) AS total FROM daily_venue_stats WHERE day >= ?
+                GROUP BY venue ORDER BY total DESC, venue LIMIT 5
+            ''', (since,)).fetchall()
+        return summary
+
     # USER 
     
     # modified: create_user method - changed first_name to display_name
-    def create_user(self, telegram_id: str, username: str, first_name: str, created_at: int) -> bool:
+    async def create_user(self, telegram_id: str, username: str, first_name: str, created_at: int) -> bool:
+        def write(conn):
+            # An upsert, REPLACE would delete the row first and cascade to everything the user owns
+            conn.execute('''
+                INSERT INTO users (telegram_id, username, display_name, created_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (telegram_id) DO UPDATE SET
+                    username = excluded.username, display_name = excluded.display_name
+            ''', (telegram_id, username, first_name, created_at))
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute('''
-                    INSERT OR REPLACE INTO users (telegram_id, username, display_name, created_at)
-                    VALUES (?, ?, ?, ?)
-                ''', (telegram_id, username, first_name, created_at))
-                return True
-        except:
+            await self._write_async(write)
+            return True
+        except sqlite3.Error:
+            logger.exception("Error creating user", extra={"telegram_id": telegram_id})
             return False
     
     # modified: get_user method - changed first_name to display_name
     def get_user(self, telegram_id: str) -> Optional[User]:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute('''
                 SELECT telegram_id, username, display_name, created_at, skill_level, bio, games_completed
                 FROM users WHERE telegram_id = ?
             ''', (telegram_id,))
             row = cursor.fetchone()
-            return User(*row) if row else None
-    
-    def update_user_skill(self, telegram_id: str, skill_level: float):
-        with sqlite3.connect(self.db_path) as conn:
+            return User.from_row(row) if row else None
+
+    def get_display_names(self, telegram_ids: List[str]) -> dict:
+        """Display names for many users in one query"""
+        if not telegram_ids:
+            return {}
+        with self._connect() as conn:
+            placeholders = ",".join("?" * len(telegram_ids))
+            cursor = conn.execute(f'''
+                SELECT telegram_id, display_name FROM users WHERE telegram_id IN ({placeholders})
+            ''', [str(telegram_id) for telegram_id in telegram_ids])
+            return dict(cursor.fetchall())
+
+    async def update_user_skill(self, telegram_id: str, skill_level: float):
+        def write(conn):
             conn.execute('''
                 UPDATE users SET skill_level = ? WHERE telegram_id = ?
             ''', (skill_level, telegram_id))
+        await self._write_async(write)
 
-    def update_user_display_name(self, telegram_id: str, display_name: str):
-        with sqlite3.connect(self.db_path) as conn:
+    async def update_user_display_name(self, telegram_id: str, display_name: str):
+        def write(conn):
             conn.execute('''
                 UPDATE users SET display_name = ? WHERE telegram_id = ?
             ''', (display_name, telegram_id))
+        await self._write_async(write)
 
-    def update_user_bio(self, telegram_id: str, bio: str):
-        with sqlite3.connect(self.db_path) as conn:
+    async def update_user_bio(self, telegram_id: str, bio: str):
+        def write(conn):
             conn.execute('''
                 UPDATE users SET bio = ? WHERE telegram_id = ?
             ''', (bio, telegram_id))
+        await self._write_async(write)
+
+    async def delete_user(self, telegram_id: str) -> List[Game]:
+        """Deletes the user with their seats, waitlist entries, alerts and saved searches through
+        ON DELETE CASCADE. Their hosted games are cancelled first and returned with their players."""
+        def write(conn):
+            games = [Game.from_row(row) for row in conn.execute(f'''
+                SELECT {GAME_SELECT} FROM games WHERE creator_id = ?
+            ''', (telegram_id,)).fetchall()]
+            # Players are needed after their rows are deleted, so they can't load lazily
+            players = self._player_ids(conn, [game.game_id for game in games])
+            for game in games:
+                game.player_ids = players[game.game_id]
 
-    def delete_user(self, telegram_id: str):
-        with sqlite3.connect(self.db_path) as conn:
-            # Delete from game_players first to avoid foreign key constraint error
-            conn.execute('''
-                DELETE FROM game_players WHERE user_id = ?
-            ''', (telegram_id,))
-            
-            # Delete from waitlist
             conn.execute('''
-                DELETE FROM waitlist WHERE user_id = ?
+                DELETE FROM games WHERE creator_id = ?
             ''', (telegram_id,))
-            
-            # Finally delete from users
+            if games:
+                self._bump_stats(conn, self._stats_day(), games_cancelled=len(games))
             conn.execute('''
                 DELETE FROM users WHERE telegram_id = ?
             ''', (telegram_id,))
+            return games
+        return await self._write_async(write)
+
+    # MATCH ALERTS
+
+    async def upsert_match_subscription(self, subscription: MatchSubscription):
+        def write(conn):
+            conn.execute('''
+                INSERT INTO match_subscriptions (user_id, skill_level, days, start_hour, end_hour, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    skill_level = excluded.skill_level,
+                    days = excluded.days,
+                    start_hour = excluded.start_hour,
+                    end_hour = excluded.end_hour
+            ''', (subscription.user_id, subscription.skill_level, subscription.days,
+                  subscription.start_hour, subscription.end_hour, subscription.created_at))
+        await self._write_async(write)
+
+    async def update_match_subscription_skill(self, user_id: str, skill_level: float):
+        def write(conn):
+            conn.execute('''
+                UPDATE match_subscriptions SET skill_level = ? WHERE user_id = ?
+            ''', (skill_level, user_id))
+        await self._write_async(write)
+
+    async def delete_match_subscription(self, user_id: str) -> bool:
+        def write(conn):
+            cursor = conn.execute('''
+                DELETE FROM match_subscriptions WHERE user_id = ?
+            ''', (user_id,))
+            return cursor.rowcount > 0
+        return await self._write_async(write)
+
+    def get_match_subscription(self, user_id: str) -> Optional[MatchSubscription]:
+        with self._connect() as conn:
+            cursor = conn.execute('''
+                SELECT user_id, skill_level, days, start_hour, end_hour, created_at
+                FROM match_subscriptions WHERE user_id = ?
+            ''', (user_id,))
+            row = cursor.fetchone()
+            return MatchSubscription(*row) if row else None
+
+    def get_match_subscriptions(self) -> List[MatchSubscription]:
+        with self._connect() as conn:
+            cursor = conn.execute('''
+                SELECT user_id, skill_level, days, start_hour, end_hour, created_at
+                FROM match_subscriptions
+            ''')
+            return [MatchSubscription(*row) for row in cursor]
+
+    # SAVED SEARCHES
+
+    async def create_saved_search(self, search: SavedSearch) -> int:
+        def write(conn):
+            cursor = conn.execute('''
+                INSERT INTO saved_searches (user_id, query, days, start_hour, end_hour, location, max_cost, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (search.user_id, search.query, search.days, search.start_hour, search.end_hour,
+                  search.location, search.max_cost, search.created_at))
+            return cursor.lastrowid
+        return await self._write_async(write)
+
+    def get_saved_searches(self, user_id: Optional[str] = None) -> List[SavedSearch]:
+        with self._connect() as conn:
+            query = '''
+                SELECT search_id, user_id, query, days, start_hour, end_hour, location, max_cost, created_at
+                FROM saved_searches
+            '''
+            if user_id is None:
+                cursor = conn.execute(query)
+            else:
+                cursor = conn.execute(query + ' WHERE user_id = ? ORDER BY search_id', (user_id,))
+            return [SavedSearch(*row) for row in cursor]
+
+    async def delete_saved_searches(self, user_id: str, search_id: Optional[int] = None) -> List[int]:
+        """Delete one of the user's searches, or all of them, returning the deleted IDs"""
+        def write(conn):
+            if search_id is None:
+                cursor = conn.execute('''
+                    SELECT search_id FROM saved_searches WHERE user_id = ?
+                ''', (user_id,))
+            else:
+                cursor = conn.execute('''
+                    SELECT search_id FROM saved_searches WHERE user_id = ? AND search_id = ?
+                ''', (user_id, search_id))
+            search_ids = [row[0] for row in cursor]
+            conn.executemany('''
+                DELETE FROM saved_search_matches WHERE search_id = ?
+            ''', [(i,) for i in search_ids])
+            conn.executemany('''
+                DELETE FROM saved_searches WHERE search_id = ?
+            ''', [(i,) for i in search_ids])
+            return search_ids
+        return await self._write_async(write)
+
+    def add_saved_search_matches(self, matches: List[tuple]):
+        """Queue (search_id, user_id, game_id) matches for the next digest.
+        Matches are recorded after the game is published, so skip games and searches deleted since."""
+        created_at = int(dt.now().timestamp())
+        def write(conn):
+            conn.executemany('''
+                INSERT OR IGNORE INTO saved_search_matches (search_id, user_id, game_id, created_at)
+                SELECT ?1, ?2, ?3, ?4
+                WHERE EXISTS (SELECT 1 FROM games WHERE game_id = ?3)
+                    AND EXISTS (SELECT 1 FROM saved_searches WHERE search_id = ?1)
+            ''', [(search_id, user_id, game_id, created_at) for search_id, user_id, game_id in matches])
+        self._write(write, wait=False)
+
+    async def pop_saved_search_matches(self) -> dict:
+        """Take every queued match, grouped by user, skipping games no longer open"""
+        def write(conn):
+            # Hold the write lock so nothing queued between the read and the delete is lost
+            cursor = conn.execute('''
+                SELECT DISTINCT m.user_id, g.game_id, g.game_name, g.location, g.start_time, g.end_time, g.court_cost
+                FROM saved_search_matches m
+                JOIN games g ON g.game_id = m.game_id
+                WHERE g.status = 'open' AND g.start_time > ?
+                ORDER BY m.user_id, g.start_time
+            ''', (int(dt.now().timestamp()),))
+            digests = {}
+            for user_id, *game in cursor:
+                digests.setdefault(user_id, []).append(tuple(game))
+            conn.execute('DELETE FROM saved_search_matches')
+            return digests
+        return await self._write_async(write)
 
     # GAME
 
     # modified: create_game method - added new fields to insert
-    def create_game(self, game: Game) -> str:
-        with sqlite3.connect(self.db_path) as conn:
+    async def create_game(self, game: Game, idempotency_key: Optional[str] = None) -> str:
+        """Returns the new game's ID, or the ID of the game an earlier call with the same key created"""
+        def write(conn):
+            if idempotency_key:
+                existing = self._claim_idempotency_key(conn, idempotency_key, game.game_id, game.created_at)
+                if existing:
+                    return existing
+
+            self._insert_game(conn, game)
+            return game.game_id
+        return await self._write_async(write)
+
+    def _claim_idempotency_key(self, conn, idempotency_key: str, result: str, created_at: int) -> Optional[str]:
+        """Returns the earlier result if the key was used before, otherwise records this one"""
+        row = conn.execute('''
+            SELECT result FROM idempotency_keys WHERE idempotency_key = ?
+        ''', (idempotency_key,)).fetchone()
+        if row:
+            return row[0]
+        conn.execute('''
+            INSERT INTO idempotency_keys (idempotency_key, result, created_at) VALUES (?, ?, ?)
+        ''', (idempotency_key, result, created_at))
+        return None
+
+    def _insert_game(self, conn, game: Game):
+        conn.execute('''
+            INSERT INTO games (game_id, game_name, game_description, creator_id, location, start_time, end_time, court_cost, min_skill, max_skill, max_players, current_players, status, created_at, telegram_group_id, auto_fill, series_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (game.game_id, game.game_name, game.game_description,
+              game.creator_id, game.location, game.start_time, game.end_time,
+              game.court_cost, game.min_skill, game.max_skill,
+              game.max_players, game.current_players, game.status,
+              game.created_at,
+              game.telegram_group_id, int(game.auto_fill), game.series_id))
+        
+        # Add creator as first player, joined when the game was created
+        conn.execute('''
+            INSERT INTO game_players (game_id, user_id, joined_at) VALUES (?, ?, ?)
+        ''', (game.game_id, game.creator_id, game.created_at))
+
+        day = self._stats_day(game.created_at)
+        self._bump_stats(conn, day, games_created=1)
+        self._mark_active(conn, day, str(game.creator_id))
+        conn.execute('''
+            INSERT INTO daily_venue_stats (day, venue, games) VALUES (?, ?, 1)
+            ON CONFLICT (day, venue) DO UPDATE SET games = games + 1
+        ''', (day, ' '.join(game.location.lower().split())))
+
+    # SERIES
+
+    async def create_series(self, series: GameSeries, idempotency_key: Optional[str] = None) -> str:
+        """Returns the new series' ID, or the ID of the series an earlier call with the same key created"""
+        def write(conn):
+            if idempotency_key:
+                existing = self._claim_idempotency_key(conn, idempotency_key, series.series_id, series.created_at)
+                if existing:
+                    return existing
             conn.execute('''
-                INSERT INTO games (game_id, game_name, game_description, creator_id, location, start_time, end_time, court_cost, min_skill, max_skill, max_players, current_players, status, created_at, telegram_group_id)
+                INSERT INTO game_series (series_id, creator_id, game_name, game_description, location,
+                    first_start, duration, interval_weeks, court_cost, min_skill, max_skill, max_players,
+                    status, materialized_until, created_at)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (game.game_id, game.game_name, game.game_description,
-                  game.creator_id, game.location, game.start_time, game.end_time,
-                  game.court_cost, game.min_skill, game.max_skill,
-                  game.max_players, game.current_players, game.status,
-                  game.created_at,
-                  game.telegram_group_id))
-            
-            # Add creator as first player
+            ''', (series.series_id, series.creator_id, series.game_name, series.game_description,
+                  series.location, series.first_start, series.duration, series.interval_weeks,
+                  series.court_cost, series.min_skill, series.max_skill, series.max_players,
+                  series.status, series.materialized_until, series.created_at))
+            return series.series_id
+        return await self._write_async(write)
+
+    def _series_query(self, where: str, params: tuple) -> List[GameSeries]:
+        with self._connect() as conn:
+            cursor = conn.execute(f'''
+                SELECT series_id, creator_id, game_name, game_description, location, first_start, duration,
+                    interval_weeks, court_cost, min_skill, max_skill, max_players, status,
+                    materialized_until, created_at
+                FROM game_series WHERE {where}
+                ORDER BY created_at
+            ''', params)
+            return [GameSeries(*row) for row in cursor.fetchall()]
+
+    def get_series(self, series_id: str) -> Optional[GameSeries]:
+        series = self._series_query('series_id = ?', (series_id,))
+        return series[0] if series else None
+
+    def get_user_series(self, creator_id: str) -> List[GameSeries]:
+        return self._series_query("creator_id = ? AND status = 'active'", (creator_id,))
+
+    def get_active_series(self) -> List[GameSeries]:
+        return self._series_query("status = 'active'", ())
+
+    async def materialize_series(self, series_id: str, games: List[Game], until: int) -> List[Game]:
+        """Create the series' games that do not exist yet and move its horizon to `until`.
+        Returns the games that were created."""
+        def write(conn):
+            cursor = conn.execute('''
+                UPDATE game_series SET materialized_until = MAX(materialized_until, ?)
+                WHERE series_id = ? AND status = 'active'
+            ''', (until, series_id))
+            if cursor.rowcount == 0:
+                return []
+
+            created = []
+            for game in games:
+                exists = conn.execute('''
+                    SELECT 1 FROM games WHERE series_id = ? AND start_time = ?
+                ''', (series_id, game.start_time)).fetchone()
+                if not exists:
+                    self._insert_game(conn, game)
+                    created.append(game)
+            return created
+        return await self._write_async(write)
+
+    async def cancel_series(self, series_id: str, after: int) -> List[Game]:
+        """Stop a series and delete its games starting after `after`, returning the deleted games with their players"""
+        def write(conn):
             conn.execute('''
-                INSERT INTO game_players (game_id, user_id) VALUES (?, ?)
-            ''', (game.game_id, game.creator_id))
-            
-            return game.game_id
+                UPDATE game_series SET status = 'cancelled' WHERE series_id = ?
+            ''', (series_id,))
+
+            games = [Game.from_row(row) for row in conn.execute(f'''
+                SELECT {GAME_SELECT}
+                FROM games WHERE series_id = ? AND start_time > ?
+            ''', (series_id, after)).fetchall()]
+            # Players are needed after their rows are deleted, so they can't load lazily
+            players = self._player_ids(conn, [game.game_id for game in games])
+            for game in games:
+                game.player_ids = players[game.game_id]
+
+            # Players, waitlists and pending notifications go with each game
+            conn.execute('''
+                DELETE FROM games WHERE series_id = ? AND start_time > ?
+            ''', (series_id, after))
+            if games:
+                self._bump_stats(conn, self._stats_day(), games_cancelled=len(games))
+            return games
+        return await self._write_async(write)
+
+    async def update_series(self, series_id: str, changes: dict, after: int) -> Dict[str, List[str]]:
+        """Apply template changes to a series and its games starting after `after`.
+        Returns each game that changed with the players auto-filled into it."""
+        columns = [c for c in changes if c in SERIES_EDITABLE_COLUMNS]
+        assignments = ', '.join(f'{c} = ?' for c in columns)
+        values = [changes[c] for c in columns]
+        def write(conn):
+            conn.execute(f'''
+                UPDATE game_series SET {assignments} WHERE series_id = ?
+            ''', (*values, series_id))
+
+            game_ids = [row[0] for row in conn.execute('''
+                SELECT game_id FROM games
+                WHERE series_id = ? AND start_time > ? AND status IN ('open', 'full')
+            ''', (series_id, after))]
+            promoted = {game_id: [] for game_id in game_ids}
+
+            details = [c for c in columns if c != 'max_players']
+            if details:
+                conn.execute(f'''
+                    UPDATE games SET {', '.join(f'{c} = ?' for c in details)}
+                    WHERE series_id = ? AND start_time > ? AND status IN ('open', 'full')
+                ''', (*(changes[c] for c in details), series_id, after))
+            # Capacity goes through the same path as a single game, so new seats fill from the waitlist
+            if 'max_players' in changes:
+                now = int(dt.now().timestamp())
+                for game_id in game_ids:
+                    promoted[game_id] = self._set_max_players(conn, game_id, changes['max_players'], now)
+            return promoted
+        return await self._write_async(write)
     
     # modified: get_open_games method - changed to return Game objects
+    # modified: players load in one batch, the first time any game's player_ids is read
     def get_open_games(self) -> List[Game]:
-        with sqlite3.connect(self.db_path) as conn:
+        return Game.from_rows(self._open_game_rows(GAME_COLUMNS), self.get_player_ids)
+
+    def get_open_game_summaries(self) -> List[GameSummary]:
+        """Open games without descriptions or players, for listings and indexes"""
+        return [GameSummary.from_row(row) for row in self._open_game_rows(SUMMARY_COLUMNS)]
+
+    def _open_game_rows(self, columns) -> List[tuple]:
+        with self._connect() as conn:
             # get current timestamp
             current_time = int(datetime.now().timestamp())
 
-            cursor = conn.execute('''
-                SELECT game_id, game_name, creator_id, location, start_time, end_time,
-                    court_cost, min_skill, max_skill, max_players, current_players,
-                    status, telegram_group_id, created_at, game_description
+            cursor = conn.execute(f'''
+                SELECT {select_columns(columns)}
                 FROM games 
                 WHERE status = 'open' AND start_time > ?
                 ORDER BY start_time
             ''', (current_time,))
-
-            games = []
-            for row in cursor.fetchall():
-                game = Game(*row)
-                player_cursor = conn.execute('''
-                    SELECT user_id FROM game_players WHERE game_id = ?
-                ''', (game.game_id,))
-                player_rows = player_cursor.fetchall()
-                print(player_rows)
-                game.player_ids = [r[0] for r in player_rows]
-                games.append(game)
-            return games
+            return cursor.fetchall()
     
     def get_game(self, game_id: str) -> Optional[Game]:
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute('''
-                SELECT game_id, game_name, creator_id, location, start_time, end_time,
-                    court_cost, min_skill, max_skill, max_players, current_players,
-                    status, telegram_group_id, created_at, game_description
+        with self._connect() as conn:
+            cursor = conn.execute(f'''
+                SELECT {GAME_SELECT}
                 FROM games WHERE game_id = ?
             ''', (game_id,))
             row = cursor.fetchone()
-            # Fetch players IDs
-            if row:
-                game = Game(*row)
-                player_cursor = conn.execute('''
-                    SELECT user_id FROM game_players WHERE game_id = ?
-                ''', (game_id,))
-                player_rows = player_cursor.fetchall()
-                game.player_ids = [r[0] for r in player_rows]
-                return game
-            return None
+            return Game.from_rows([row], self.get_player_ids)[0] if row else None
+
+    def get_player_ids(self, game_ids: List[str]) -> dict:
+        """{game_id: [user_id, ...]} for many games in one query per MAX_IN_PARAMS games"""
+        with self._connect() as conn:
+            return self._player_ids(conn, game_ids)
+
+    def _player_ids(self, conn, game_ids: List[str]) -> dict:
+        players = {game_id: [] for game_id in game_ids}
+        for i in range(0, len(game_ids), MAX_IN_PARAMS):
+            chunk = game_ids[i:i + MAX_IN_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            for game_id, user_id in conn.execute(f'''
+                SELECT game_id, user_id FROM game_players WHERE game_id IN ({placeholders})
+            ''', chunk):
+                players[game_id].append(user_id)
+        return players
         
     def check_user_in_game(self, game_id: str, user_id: str) -> bool:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute('''
                 SELECT 1 FROM game_players WHERE game_id = ? AND user_id = ?
             ''', (game_id, user_id))
             return cursor.fetchone() is not None
         
-    def check_user_on_waitlist(self, game_id: str, user_id: str) -> bool:
-        """Fixed parameter types to match database schema"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute('''
-                SELECT 1 FROM waitlist WHERE game_id = ? AND user_id = ? AND status = 'pending'
-            ''', (game_id, user_id))
-            return cursor.fetchone() is not None
-    
-    def add_to_waitlist(self, game_id: str, user_id: str) -> bool:
-        """Fixed parameter types and added timestamp"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                current_timestamp = int(dt.now().timestamp())
-                conn.execute('''
-                    INSERT INTO waitlist (game_id, user_id, created_at) VALUES (?, ?, ?)
-                ''', (game_id, user_id, current_timestamp))
-                return True
-        except sqlite3.IntegrityError:
-            return False  # Already in waitlist
-        
-    def cancel_game(self, game_id: str) -> bool:
+    async def try_join_waitlist(self, game_id: str, user_id: str) -> JoinResult:
+        """Validate and record a join request in one transaction.
+        The request is queued for the host's digest in the same transaction."""
+        def write(conn):
+            # One row with everything the checks need, the game and user may each be missing
+            row = conn.execute(f'''
+                SELECT u.telegram_id, u.skill_level, g.game_id, g.creator_id,
+                    g.current_players, g.max_players,
+                    EXISTS (SELECT 1 FROM game_players WHERE game_id = ?1 AND user_id = ?2),
+                    EXISTS (SELECT 1 FROM waitlist WHERE game_id = ?1 AND user_id = ?2),
+                    EXISTS (SELECT 1 {overlapping_games('?2', 'g.start_time', 'g.end_time', '?1')})
+                FROM (SELECT 1)
+                LEFT JOIN users u ON u.telegram_id = ?2
+                LEFT JOIN games g ON g.game_id = ?1
+            ''', (game_id, user_id)).fetchone()
+            known_user, skill_level, found_game, host_id, current, max_players, in_game, requested, clash = row
+
+            if known_user is None:
+                return JoinResult.NO_ACCOUNT
+            if not skill_level:
+                return JoinResult.NO_SKILL
+            if found_game is None:
+                return JoinResult.GAME_NOT_FOUND
+            if in_game:
+                return JoinResult.ALREADY_IN_GAME
+            # Any earlier request counts, a rejected player can't ask again
+            if requested:
+                return JoinResult.ALREADY_REQUESTED
+            if current >= max_players:
+                return JoinResult.GAME_FULL
+            if clash:
+                return JoinResult.SCHEDULE_CONFLICT
+
+            created_at = int(dt.now().timestamp())
+            conn.execute('''
+                INSERT INTO waitlist (game_id, user_id, created_at) VALUES (?, ?, ?)
+            ''', (game_id, user_id, created_at))
+            self._queue_host_notification(conn, game_id, user_id, str(host_id), created_at)
+            return JoinResult.JOINED
+        return await self._write_async(write)
+
+    def get_schedule_conflicts(self, user_id: str, start_time: int, end_time: int,
+                               game_id: str = '') -> List[Tuple[str, str, int, int]]:
+        """(game_id, game_name, start_time, end_time) of the user's games overlapping
+        [start_time, end_time), other than game_id, soonest first"""
+        with self._connect() as conn:
+            return conn.execute(f'''
+                SELECT o.game_id, o.game_name, o.start_time, o.end_time
+                {overlapping_games('?1', '?2', '?3', '?4')}
+                ORDER BY o.start_time
+            ''', (user_id, start_time, end_time, game_id)).fetchall()
+
+    async def cancel_game(self, game_id: str) -> Optional[Game]:
+        """Delete a game, returning it with its players as they were, or None if it was already gone"""
+        def write(conn):
+            row = conn.execute(f'''
+                SELECT {GAME_SELECT} FROM games WHERE game_id = ?
+            ''', (game_id,)).fetchone()
+            if not row:
+                return None
+            game = Game.from_row(row)
+            # Players are needed after their rows are deleted, so they can't load lazily
+            game.player_ids = self._player_ids(conn, [game_id])[game_id]
+
+            # Players, waitlist entries and pending search matches go with the game
+            conn.execute('''
+                DELETE FROM games WHERE game_id = ?
+            ''', (game_id,))
+            self._bump_stats(conn, self._stats_day(), games_cancelled=1)
+            return game
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                # Delete from game_players
-                conn.execute('''
-                    DELETE FROM game_players WHERE game_id = ?
-                ''', (game_id,))
-                
-                # Delete from waitlist
-                conn.execute('''
-                    DELETE FROM waitlist WHERE game_id = ?
-                ''', (game_id,))
-                
-                # Delete from games
-                conn.execute('''
-                    DELETE FROM games WHERE game_id = ?
-                ''', (game_id,))
-                
-                return True
-        except:
-            return False
+            return await self._write_async(write)
+        except sqlite3.Error:
+            logger.exception("Error cancelling game", extra={"game_id": game_id})
+            return None
         
     
         
@@ -266,7 +1060,7 @@ class DatabaseManager:
     
     def get_waitlist_for_game(self, game_id: str) -> List[WaitlistEntry]:
         """Fixed parameter type and query to match database schema"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute('''
                 SELECT w.waitlist_id, w.game_id, w.user_id, w.status, w.created_at,
                     u.username, u.display_name, u.skill_level
@@ -276,164 +1070,261 @@ class DatabaseManager:
                 ORDER BY w.created_at
             ''', (game_id,))
             
-            entries = []
-            for row in cursor.fetchall():
-                entry = WaitlistEntry(
-                    waitlist_id=row[0],
-                    game_id=row[1], 
-                    user_id=row[2],
-                    status=row[3],
-                    created_at=row[4],
-                    username=row[5],
-                    display_name=row[6],
-                    skill_level=row[7]
-                )
-                entries.append(entry)
-            return entries
+            return [WaitlistEntry.from_row(row) for row in cursor.fetchall()]
     
-    def approve_waitlist_entry(self, game_id: str, user_id: str) -> bool:
+    async def approve_waitlist_entry(self, game_id: str, user_id: str) -> bool:
         """Fixed parameter types and table references"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                # Update waitlist status
-                conn.execute('''
-                    UPDATE waitlist SET status = 'approved' 
-                    WHERE game_id = ? AND user_id = ?
-                ''', (game_id, user_id))
-                
-                # Add to game players with timestamp
-                current_timestamp = int(dt.now().timestamp())
-                conn.execute('''
-                    INSERT INTO game_players (game_id, user_id, joined_at) VALUES (?, ?, ?)
-                ''', (game_id, user_id, current_timestamp))
-                
-                # Update current players count - Fixed table reference
-                conn.execute('''
-                    UPDATE games SET current_players = current_players + 1
-                    WHERE game_id = ?
-                ''', (game_id,))
-                
-                # Check if game is now full - Fixed table reference
-                cursor = conn.execute('''
-                    SELECT current_players, max_players FROM games WHERE game_id = ?
-                ''', (game_id,))
-                row = cursor.fetchone()
-                if row:
-                    current, max_players = row
-                    if current >= max_players:
-                        conn.execute('''
-                            UPDATE games SET status = 'full' WHERE game_id = ?
-                        ''', (game_id,))
-                
-                return True
-        except Exception as e:
-            print(f"Error approving waitlist entry: {e}")
+            return await self._write_async(lambda conn: self._approve(conn, game_id, user_id))
+        except sqlite3.Error as e:
+            logger.exception("Error approving waitlist entry", extra={"game_id": game_id, "waitlist_user_id": user_id})
             return False
+
+    def _approve(self, conn, game_id: str, user_id: str) -> bool:
+        """Returns False if the entry is no longer pending or the game has no seat left,
+        so a repeated approval changes nothing and concurrent approvals never overfill a game"""
+        conn.execute('SAVEPOINT approve')
+        # Update waitlist status
+        cursor = conn.execute('''
+            UPDATE waitlist SET status = 'approved' 
+            WHERE game_id = ? AND user_id = ? AND status = 'pending'
+        ''', (game_id, user_id))
+        if cursor.rowcount == 0:
+            conn.execute('RELEASE approve')
+            return False
+
+        # Claim the seat in this transaction, the handler's capacity check may be out of date by now
+        cursor = conn.execute('''
+            UPDATE games SET current_players = current_players + 1,
+                status = CASE WHEN current_players + 1 >= max_players THEN 'full' ELSE status END
+            WHERE game_id = ? AND current_players < max_players AND status IN ('open', 'full')
+            RETURNING status
+        ''', (game_id,))
+        row = cursor.fetchone()
+        if row is None:
+            # Full, the entry stays pending
+            conn.execute('ROLLBACK TO approve')
+            conn.execute('RELEASE approve')
+            return False
+        conn.execute('RELEASE approve')
+
+        # Add to game players with timestamp
+        current_timestamp = int(dt.now().timestamp())
+        conn.execute('''
+            INSERT INTO game_players (game_id, user_id, joined_at) VALUES (?, ?, ?)
+        ''', (game_id, user_id, current_timestamp))
+
+        day = self._stats_day(current_timestamp)
+        self._bump_stats(conn, day, players_joined=1)
+        self._mark_active(conn, day, user_id)
+
+        if row[0] == 'full':
+            self._record_fill(conn, game_id, current_timestamp)
+        return True
+
+    def _record_fill(self, conn, game_id: str, filled_at: int):
+        """Count the first time a game fills up in the rollups"""
+        cursor = conn.execute('''
+            UPDATE games SET filled_at = ? WHERE game_id = ? AND filled_at IS NULL
+            RETURNING created_at
+        ''', (filled_at, game_id))
+        row = cursor.fetchone()
+        if not row:
+            return
+        day = self._stats_day(filled_at)
+        self._bump_stats(conn, day, games_filled=1)
+        conn.execute('''
+            INSERT INTO fill_time_histogram (day, bucket, games) VALUES (?, ?, 1)
+            ON CONFLICT (day, bucket) DO UPDATE SET games = games + 1
+        ''', (day, fill_time_bucket(filled_at - row[0])))
+
+    def _fill_open_seats(self, conn, game_id: str) -> List[str]:
+        """Promote the oldest pending, skill-eligible waitlist entries into open seats
+        of an auto-fill game, returning the promoted user IDs"""
+        promoted = []
+        while True:
+            row = conn.execute('''
+                SELECT current_players, max_players, min_skill, max_skill, auto_fill, start_time, end_time
+                FROM games WHERE game_id = ? AND status IN ('open', 'full')
+            ''', (game_id,)).fetchone()
+            if not row:
+                return promoted
+            current, max_players, min_skill, max_skill, auto_fill, start_time, end_time = row
+            if not auto_fill or current >= max_players:
+                return promoted
+
+            # Players already booked at that time stay on the waitlist
+            entry = conn.execute(f'''
+                SELECT w.user_id
+                FROM waitlist w
+                JOIN users u ON u.telegram_id = w.user_id
+                WHERE w.game_id = ?1 AND w.status = 'pending'
+                    AND u.skill_level BETWEEN ?2 AND ?3
+                    AND NOT EXISTS (
+                        SELECT 1 FROM game_players gp WHERE gp.game_id = w.game_id AND gp.user_id = w.user_id
+                    )
+                    AND NOT EXISTS (SELECT 1 {overlapping_games('w.user_id', '?4', '?5', '?1')})
+                ORDER BY w.created_at, w.waitlist_id
+                LIMIT 1
+            ''', (game_id, min_skill, max_skill, start_time, end_time)).fetchone()
+            if not entry:
+                return promoted
+
+            if not self._approve(conn, game_id, entry[0]):
+                return promoted
+            promoted.append(entry[0])
+
+    async def set_auto_fill(self, game_id: str, enabled: bool) -> List[str]:
+        """Turn auto-fill on or off. Turning it on fills any open seats straight away."""
+        def write(conn):
+            conn.execute('''
+                UPDATE games SET auto_fill = ? WHERE game_id = ?
+            ''', (int(enabled), game_id))
+            return self._fill_open_seats(conn, game_id)
+        return await self._write_async(write)
+
+    async def update_max_players(self, game_id: str, max_players: int) -> List[str]:
+        """Change a game's capacity, promoting from the waitlist if auto-fill is on"""
+        def write(conn):
+            return self._set_max_players(conn, game_id, max_players, int(dt.now().timestamp()))
+        return await self._write_async(write)
+
+    def _set_max_players(self, conn, game_id: str, max_players: int, now: int) -> List[str]:
+        """Never below the players already in. Records a fill and auto-fills new seats,
+        returning the promoted user IDs."""
+        conn.execute('''
+            UPDATE games SET max_players = MAX(?, current_players),
+                status = CASE WHEN current_players >= MAX(?, current_players) THEN 'full' ELSE 'open' END
+            WHERE game_id = ? AND status IN ('open', 'full')
+        ''', (max_players, max_players, game_id))
+        if conn.execute("SELECT 1 FROM games WHERE game_id = ? AND status = 'full'", (game_id,)).fetchone():
+            self._record_fill(conn, game_id, now)
+        return self._fill_open_seats(conn, game_id)
     
-    def reject_waitlist_entry(self, game_id: str, user_id: str):
+    async def reject_waitlist_entry(self, game_id: str, user_id: str) -> bool:
         """Fixed parameter types"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''
+        def write(conn):
+            cursor = conn.execute('''
                 UPDATE waitlist SET status = 'rejected' 
-                WHERE game_id = ? AND user_id = ?
+                WHERE game_id = ? AND user_id = ? AND status = 'pending'
             ''', (game_id, user_id))
+            return cursor.rowcount == 1
+        return await self._write_async(write)
+
+    async def add_pending_host_notification(self, game_id: str, user_id: str, host_id: str):
+        def write(conn):
+            self._queue_host_notification(conn, game_id, user_id, host_id, int(dt.now().timestamp()))
+        await self._write_async(write)
+
+    def _queue_host_notification(self, conn, game_id: str, user_id: str, host_id: str, created_at: int):
+        conn.execute('''
+            INSERT OR IGNORE INTO pending_host_notifications (game_id, user_id, host_id, created_at)
+            VALUES (?, ?, ?, ?)
+        ''', (game_id, user_id, host_id, created_at))
+
+    async def pop_pending_host_notifications(self, ready_before: int) -> dict:
+        """Take every buffered request of each host whose oldest request is older than ready_before.
+        Returns {host_id: [(game_id, game_name, user_id, display_name, skill_level), ...]},
+        skipping requests that were approved, rejected or withdrawn in the meantime."""
+        def write(conn):
+            hosts = [row[0] for row in conn.execute('''
+                SELECT host_id FROM pending_host_notifications
+                GROUP BY host_id HAVING MIN(created_at) <= ?
+            ''', (ready_before,))]
+            if not hosts:
+                return {}
+
+            placeholders = ",".join("?" * len(hosts))
+            rows = conn.execute(f'''
+                SELECT p.host_id, p.game_id, g.game_name, p.user_id, u.display_name, u.skill_level
+                FROM pending_host_notifications p
+                JOIN games g ON g.game_id = p.game_id
+                JOIN users u ON u.telegram_id = p.user_id
+                JOIN waitlist w ON w.game_id = p.game_id AND w.user_id = p.user_id AND w.status = 'pending'
+                WHERE p.host_id IN ({placeholders})
+                ORDER BY p.created_at
+            ''', hosts).fetchall()
+            conn.execute(f'''
+                DELETE FROM pending_host_notifications WHERE host_id IN ({placeholders})
+            ''', hosts)
+
+            digests = {}
+            for host_id, *request in rows:
+                digests.setdefault(host_id, []).append(tuple(request))
+            return digests
+        return await self._write_async(write)
 
     # Add a method to remove from the waitlist -> leave the waitlist
     
     # modified: get_user_games method - changed user_id to str, return type is List[Game]
     # modified: changed query to return Game objects
     def get_user_games(self, user_id: str) -> List[Game]:
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute('''
-                SELECT g.game_id, g.game_name, g.creator_id, g.location, g.start_time, g.end_time,
-                    g.court_cost, g.min_skill, g.max_skill, g.max_players, g.current_players,
-                    g.status, g.telegram_group_id, g.created_at, g.game_description
+        with self._connect() as conn:
+            cursor = conn.execute(f'''
+                SELECT {select_columns(GAME_COLUMNS, 'g')}
                 FROM games g
                 JOIN game_players gp ON g.game_id = gp.game_id
                 WHERE gp.user_id = ? AND g.status IN ('open', 'full')
                 ORDER BY g.start_time
             ''', (user_id,))
-            games = []
-            for row in cursor.fetchall():
-                game = Game(*row)
-                # Fetch players IDs
-
-                player_cursor = conn.execute('''
-                    SELECT user_id FROM game_players WHERE game_id = ?
-                ''', (game.game_id,))
-                player_rows = player_cursor.fetchall()
-                game.player_ids = [r[0] for r in player_rows]
-
-                games.append(game)
-            return games
+            return Game.from_rows(cursor.fetchall(), self.get_player_ids)
         
     # modified: remove_player_from_game method - changed game_id to str, user_id to str
-    def remove_player_from_game(self, game_id: str, user_id: str) -> bool:
-        """Fixed table reference in UPDATE statement"""
+    async def remove_player_from_game(self, game_id: str, user_id: str) -> Tuple[bool, Optional[str]]:
+        """Remove a player and, for auto-fill games, promote the next waitlist entry
+        in the same transaction. Returns (removed, promoted user ID or None)."""
+        def write(conn):
+            # Remove from game players
+            cursor = conn.execute('''
+                DELETE FROM game_players WHERE game_id = ? AND user_id = ?
+            ''', (game_id, user_id))
+            if cursor.rowcount == 0:
+                return False, None
+
+            # The game_players_after_delete trigger frees the seat and reopens a full game
+
+            day = self._stats_day()
+            self._bump_stats(conn, day, players_left=1)
+            self._mark_active(conn, day, user_id)
+
+            promoted = self._fill_open_seats(conn, game_id)
+            return True, promoted[0] if promoted else None
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                # Remove from game players
-                conn.execute('''
-                    DELETE FROM game_players WHERE game_id = ? AND user_id = ?
-                ''', (game_id, user_id))
-                
-                # Update current players count - Fixed table reference
-                conn.execute('''
-                    UPDATE games SET current_players = current_players - 1
-                    WHERE game_id = ?
-                ''', (game_id,))
-                
-                # If game was full, make it open again - Fixed table reference
-                conn.execute('''
-                    UPDATE games SET status = 'open' 
-                    WHERE game_id = ? AND status = 'full'
-                ''', (game_id,))
-                
-                return True
-        except Exception as e:
-            print(f"Error removing player from game: {e}")
-            return False
+            return await self._write_async(write)
+        except sqlite3.Error as e:
+            logger.exception("Error removing player from game", extra={"game_id": game_id, "player_id": user_id})
+            return False, None
         
-    def remove_from_waitlist(self, game_id: str, user_id: str) -> bool:
+    async def remove_from_waitlist(self, game_id: str, user_id: str) -> bool:
         """New method to remove user from waitlist entirely"""
+        def write(conn):
+            conn.execute('''
+                DELETE FROM waitlist WHERE game_id = ? AND user_id = ?
+            ''', (game_id, user_id))
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute('''
-                    DELETE FROM waitlist WHERE game_id = ? AND user_id = ?
-                ''', (game_id, user_id))
-                return True
-        except:
+            await self._write_async(write)
+            return True
+        except sqlite3.Error:
+            logger.exception("Error leaving waitlist", extra={"game_id": game_id, "waitlist_user_id": user_id})
             return False
     
     # modified: update_game_group method - changed to accept game_id as str, telegram_group_id as str
-    def update_game_group(self, game_id: str, telegram_group_id: str):
-        with sqlite3.connect(self.db_path) as conn:
+    async def update_game_group(self, game_id: str, telegram_group_id: str):
+        def write(conn):
             conn.execute('''
                 UPDATE games SET telegram_group_id = ? WHERE game_id = ?
             ''', (telegram_group_id, game_id))
+        await self._write_async(write)
 
-    def get_upcoming_games_with_players(self, hours_start=23, hours_end=25) -> List[dict]:
-        with sqlite3.connect(self.db_path) as conn:
+    async def claim_upcoming_games(self, hours_start: int = 23, hours_end: int = 24) -> List[Game]:
+        """Games starting between hours_start and hours_end from now that have not been reminded yet,
+        with their players. Claimed games are marked so each game is only reminded once."""
+        now = int(dt.now().timestamp())
+        def write(conn):
             cursor = conn.execute(f'''
-                SELECT g.id, g.location, g.datetime, g.creator_id, gp.user_id, u.first_name
-                FROM games g
-                JOIN game_players gp ON g.id = gp.game_id
-                JOIN users u ON gp.user_id = u.telegram_id
-                WHERE g.datetime BETWEEN datetime('now', '+{hours_start} hours') AND datetime('now', '+{hours_end} hours')
-                AND g.status IN ('open', 'full')
-            ''')
-            
-            games_players = cursor.fetchall()
-
-            # Group into structured dict
-            games_dict = {}
-            for game_id, location, datetime_str, creator_id, user_id, first_name in games_players:
-                if game_id not in games_dict:
-                    games_dict[game_id] = {
-                        'location': location,
-                        'datetime': datetime_str,
-                        'creator_id': creator_id,
-                        'players': []
-                    }
-                games_dict[game_id]['players'].append((user_id, first_name))
-            return games_dict
\ No newline at end of file
+                UPDATE games SET reminded_at = ?
+                WHERE start_time BETWEEN ? AND ? AND status IN ('open', 'full') AND reminded_at IS NULL
+                RETURNING {GAME_SELECT}
+            ''', (now, now + hours_start * 3600, now + hours_end * 3600))
+            return Game.from_rows(cursor.fetchall(), self.get_player_ids)
+        return await self._write_async(write)
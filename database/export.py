@@ -0,0 +1,132 @@
+"""Stream bot tables to CSV or JSONL without holding up the live bot.
+
+Reads go through a read-only connection inside one read transaction, so every
+table comes from the same snapshot. The database runs in WAL mode, so the
+bot's writer carries on while an export is running. Rows are streamed with
+fetchmany, so memory stays flat however big the tables get.
+
+    python -m database.export --format jsonl --since 2025-07-01 --out exports
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# Table -> column used for incremental exports
+TABLES = {
+    'users': 'created_at',
+    'games': 'created_at',
+    'game_players': 'joined_at',
+    'waitlist': 'created_at',
+}
+
+FORMATS = ('csv', 'jsonl')
+BATCH_SIZE = 1000
+
+
+def open_snapshot(db_path: str) -> sqlite3.Connection:
+    """Read-only connection pinned to one consistent snapshot until closed"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, isolation_level=None)
+    conn.execute('BEGIN')
+    # The read transaction, and with it the snapshot, starts at the first read
+    conn.execute('SELECT 1 FROM sqlite_master LIMIT 1').fetchall()
+    return conn
+
+
+def exportable_tables(conn: sqlite3.Connection) -> Dict[str, Optional[str]]:
+    """Core tables plus any *_archive tables, with their incremental column if they have one"""
+    tables: Dict[str, Optional[str]] = {}
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for name in TABLES:
+        if name in names:
+            tables[name] = TABLES[name]
+    for name in sorted(names):
+        if name.endswith('_archive'):
+            columns = [row[1] for row in conn.execute(f'PRAGMA table_info({name})')]
+            tables[name] = next((c for c in ('created_at', 'archived_at', 'joined_at') if c in columns), None)
+    return tables
+
+
+def export_table(conn: sqlite3.Connection, table: str, path: str, fmt: str = 'csv',
+                 since: Optional[int] = None, since_column: Optional[str] = None) -> int:
+    """Write one table to path, gzipped when path ends in .gz. Returns the row count."""
+    query = f'SELECT * FROM {table}'
+    params: Tuple = ()
+    if since is not None and since_column:
+        query += f' WHERE {since_column} >= ?'
+        params = (since,)
+
+    cursor = conn.execute(query, params)
+    columns = [column[0] for column in cursor.description]
+    opener = gzip.open if path.endswith('.gz') else open
+
+    count = 0
+    with opener(path, 'wt', newline='', encoding='utf-8') as out:
+        if fmt == 'csv':
+            writer = csv.writer(out)
+            writer.writerow(columns)
+        while True:
+            rows = cursor.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            if fmt == 'csv':
+                writer.writerows(rows)
+            else:
+                out.writelines(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n' for row in rows)
+            count += len(rows)
+    return count
+
+
+def export_database(db_path: str, out_dir: str, fmt: str = 'csv', since: Optional[int] = None,
+                    tables: Optional[List[str]] = None, compress: bool = False) -> List[Tuple[str, int]]:
+    """Export tables from one snapshot into out_dir, returning (path, rows) for each file"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', use one of {', '.join(FORMATS)}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    conn = open_snapshot(db_path)
+    try:
+        available = exportable_tables(conn)
+        results = []
+        for table in tables or list(available):
+            if table not in available:
+                raise ValueError(f"Unknown table '{table}'")
+            path = os.path.join(out_dir, f"{table}-{stamp}.{fmt}" + ('.gz' if compress else ''))
+            rows = export_table(conn, table, path, fmt, since, available[table])
+            results.append((path, rows))
+        return results
+    finally:
+        conn.close()
+
+
+def parse_since(value: str) -> int:
+    """Accept a unix timestamp or a YYYY-MM-DD date"""
+    if value.isdigit():
+        return int(value)
+    try:
+        return int(datetime.strptime(value, '%Y-%m-%d').timestamp())
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}', use YYYY-MM-DD or a unix timestamp")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Voro tables to CSV or JSONL")
+    parser.add_argument('--db', default='voro.db', help="database file (default: voro.db)")
+    parser.add_argument('--out', default='exports', help="output directory (default: exports)")
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--since', type=parse_since, help="only rows created on or after this date or timestamp")
+    parser.add_argument('--tables', nargs='+', help="tables to export (default: all)")
+    parser.add_argument('--gzip', action='store_true', help="gzip the output files")
+    args = parser.parse_args()
+
+    for path, rows in export_database(args.db, args.out, args.format, args.since, args.tables, args.gzip):
+        print(f"{path}: {rows} rows")
+
+
+if __name__ == '__main__':
+    main()
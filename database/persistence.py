@@ -0,0 +1,172 @@
+"""PTB persistence in the bot's own SQLite database.
+
+user_data, chat_data, bot_data, callback data and ConversationHandler
+states are pickled into the persistence_data and persistence_conversations
+tables, so they survive restarts and deploys.
+
+PTB hands over everything a handler touched once per update_interval. Data
+that pickles to what the database already holds is skipped, and the rest
+of the run is written as one queued write, one transaction, instead of a
+write, or a whole file as with PicklePersistence, per update.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import pickle
+from typing import Dict, Optional, Tuple
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from database.db_manager import DEFAULT_DB_PATH, DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# Seconds between PTB's runs of update_persistence, each run is at most one transaction
+PERSISTENCE_INTERVAL = 30
+
+Ident = Tuple[str, str]
+
+
+def _digest(blob: bytes) -> bytes:
+    return hashlib.blake2b(blob, digest_size=16).digest()
+
+
+class SQLitePersistence(BasePersistence):
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, store_data: Optional[PersistenceInput] = None,
+                 update_interval: float = PERSISTENCE_INTERVAL):
+        super().__init__(store_data=store_data, update_interval=update_interval)
+        self.db = DatabaseManager(db_path)
+        # Digests of what the database holds, so unchanged data is not written again
+        self._stored: Dict[Ident, bytes] = {}
+        # Changes waiting for the next flush, None deletes the row
+        self._pending: Dict[Ident, Optional[bytes]] = {}
+        self._pending_conversations: Dict[Ident, Optional[bytes]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.rows_written = 0
+        self.unchanged = 0
+
+    # LOADING, once at startup
+
+    def _load(self, kind: str) -> dict:
+        loaded = {}
+        for key, blob in self.db.get_persistence_data(kind):
+            self._stored[(kind, key)] = _digest(blob)
+            loaded[key] = pickle.loads(blob)
+        return loaded
+
+    async def get_user_data(self) -> dict:
+        return {int(key): data for key, data in self._load('user').items()}
+
+    async def get_chat_data(self) -> dict:
+        return {int(key): data for key, data in self._load('chat').items()}
+
+    async def get_bot_data(self) -> dict:
+        return self._load('bot').get('', {})
+
+    async def get_callback_data(self):
+        return self._load('callback').get('')
+
+    async def get_conversations(self, name: str) -> dict:
+        return {
+            tuple(json.loads(key)): pickle.loads(state)
+            for key, state in self.db.get_persistence_conversations(name)
+        }
+
+    # CHANGES, staged and written by the next flush
+
+    def _stage(self, ident: Ident, data):
+        blob = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        if ident not in self._pending and self._stored.get(ident) == _digest(blob):
+            self.unchanged += 1
+            return
+        self._pending[ident] = blob
+        self._schedule_flush()
+
+    def _drop(self, ident: Ident):
+        self._pending[ident] = None
+        self._schedule_flush()
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        self._stage(('user', str(user_id)), data)
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        self._stage(('chat', str(chat_id)), data)
+
+    async def update_bot_data(self, data: dict) -> None:
+        self._stage(('bot', ''), data)
+
+    async def update_callback_data(self, data) -> None:
+        self._stage(('callback', ''), data)
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._drop(('user', str(user_id)))
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        self._drop(('chat', str(chat_id)))
+
+    async def update_conversation(self, name: str, key: tuple, new_state) -> None:
+        # PTB only reports states that changed, a None state means the conversation ended
+        blob = None if new_state is None else pickle.dumps(new_state, protocol=pickle.HIGHEST_PROTOCOL)
+        self._pending_conversations[(name, json.dumps(list(key)))] = blob
+        self._schedule_flush()
+
+    # Only this process writes the tables, so what PTB holds in memory is already current
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
+
+    # FLUSHING
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_soon())
+
+    async def _flush_soon(self):
+        # PTB stages a whole run concurrently, yield once so the run lands in a single write.
+        # Rows staged while a write is in flight find this task running and create none,
+        # so keep writing until nothing is left.
+        while self._pending or self._pending_conversations:
+            await asyncio.sleep(0)
+            if not await self._write_pending():
+                # The write failed, its rows wait for the next change or PTB's next run
+                return
+
+    async def _write_pending(self) -> bool:
+        """Returns False if the write failed and its rows were put back"""
+        data, self._pending = self._pending, {}
+        conversations, self._pending_conversations = self._pending_conversations, {}
+        if not data and not conversations:
+            return True
+        try:
+            await asyncio.wrap_future(self.db.save_persistence(data, conversations))
+        except Exception as e:
+            # Keep the rows for the next flush, unless something newer was staged meanwhile
+            for ident, blob in data.items():
+                self._pending.setdefault(ident, blob)
+            for ident, blob in conversations.items():
+                self._pending_conversations.setdefault(ident, blob)
+            logger.exception("Error writing persistence", extra={"rows": len(data) + len(conversations)})
+            return False
+
+        for ident, blob in data.items():
+            if blob is None:
+                self._stored.pop(ident, None)
+            else:
+                self._stored[ident] = _digest(blob)
+        self.flushes += 1
+        self.rows_written += len(data) + len(conversations)
+        logger.debug("Flushed persistence", extra={"rows": len(data) + len(conversations)})
+        return True
+
+    async def flush(self) -> None:
+        """Called by PTB on shutdown, writes whatever is still staged"""
+        if self._flush_task and not self._flush_task.done():
+            await self._flush_task
+        await self._write_pending()
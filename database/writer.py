@@ -0,0 +1,210 @@
+"""Serialized writes with group commit.
+
+Every write to a database goes through one writer thread and one
+connection. The thread takes whatever writes are queued, up to MAX_BATCH,
+and runs them in a single BEGIN IMMEDIATE transaction, each inside its own
+savepoint so a failing write only rolls back itself. Callers get their
+result once the batch has committed.
+
+Within the process nothing can contend for the write lock any more. Other
+processes still can, such as a backup, an export or a second bot on the
+same file, so a busy lock is retried with jittered exponential backoff
+instead of surfacing as "database is locked".
+"""
+import logging
+import queue
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Writes committed together at most, small enough that one batch never holds the lock for long
+MAX_BATCH = 64
+
+# Seconds SQLite itself waits for a lock before reporting it busy
+BUSY_TIMEOUT = 0.25
+
+# Attempts after the first for a batch that found the database busy, and the backoff bounds in seconds
+MAX_RETRIES = 8
+BACKOFF_BASE = 0.01
+BACKOFF_CAP = 1.0
+
+
+def is_busy(error: Exception) -> bool:
+    """True for SQLITE_BUSY and SQLITE_LOCKED, including their extended codes"""
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xff in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in str(error) or 'busy' in str(error))
+
+
+def backoff(attempt: int) -> float:
+    """Full jitter, anywhere between zero and the capped exponential delay"""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+class SerializedWriter:
+    """The single writer of one database file"""
+
+    def __init__(self, db_path: str, max_batch: int = MAX_BATCH):
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # Counters since startup, read by /dbwrites
+        self.writes = 0
+        self.commits = 0
+        self.failed = 0
+        self.lock_waits = 0
+        self.retries = 0
+        self.lock_wait_seconds = 0.0
+        self.largest_batch = 0
+
+    def submit(self, work: Callable[[sqlite3.Connection], object], wait: bool = True):
+        """Run work(conn) in the next group commit.
+        Returns its result, or raises its exception, once committed. With wait=False returns a Future."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("A write can't wait for the writer it is running on")
+        future = Future()
+        self._queue.put((work, future))
+        self._start()
+        return future.result() if wait else future
+
+    def close(self, timeout: float = 10):
+        """Commit what is queued and stop the thread, a later submit starts a new one"""
+        thread = self._thread
+        if thread and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'writes': self.writes,
+            'commits': self.commits,
+            'failed': self.failed,
+            'lock_waits': self.lock_waits,
+            'retries': self.retries,
+            'lock_wait_seconds': round(self.lock_wait_seconds, 3),
+            'largest_batch': self.largest_batch,
+            'queued': self._queue.qsize(),
+        }
+
+    def _start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=f"db-writer-{self.db_path}", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        # Transactions are explicit, so the connection stays in autocommit mode
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        conn.execute('PRAGMA foreign_keys = ON')
+        try:
+            while True:
+                batch, stop = self._next_batch()
+                if batch:
+                    self._commit(conn, batch)
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _next_batch(self) -> Tuple[List[tuple], bool]:
+        """Block for one write, then take whatever else is already queued"""
+        batch = []
+        item = self._queue.get()
+        while item is not None:
+            batch.append(item)
+            if len(batch) >= self.max_batch:
+                return batch, False
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return batch, False
+        return batch, True
+
+    def _commit(self, conn: sqlite3.Connection, batch: List[tuple]):
+        attempt = 0
+        while True:
+            try:
+                outcomes = self._run_batch(conn, batch)
+                break
+            except sqlite3.Error as e:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                if not is_busy(e) or attempt >= MAX_RETRIES:
+                    self.failed += len(batch)
+                    logger.error("Write batch failed", extra={"writes": len(batch), "attempts": attempt + 1, "error": str(e)})
+                    for _, future in batch:
+                        future.set_exception(e)
+                    return
+                self.retries += 1
+                delay = backoff(attempt)
+                attempt += 1
+                logger.warning("Database busy, retrying write batch", extra={"writes": len(batch), "attempt": attempt, "delay_ms": round(delay * 1000, 1)})
+                time.sleep(delay)
+
+        self.commits += 1
+        self.writes += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for (_, future), (result, error) in zip(batch, outcomes):
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def _run_batch(self, conn: sqlite3.Connection, batch: List[tuple]) -> List[tuple]:
+        """(result, exception) per write, raises only for errors that end the whole batch"""
+        started = time.perf_counter()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+        except sqlite3.Error as e:
+            if is_busy(e):
+                self.lock_waits += 1
+            raise
+        finally:
+            self.lock_wait_seconds += time.perf_counter() - started
+
+        outcomes = []
+        for work, _ in batch:
+            conn.execute('SAVEPOINT write')
+            try:
+                outcomes.append((work(conn), None))
+            except Exception as e:
+                # A busy error mid-batch retries the batch, anything else fails this write only
+                if isinstance(e, sqlite3.Error) and is_busy(e):
+                    raise
+                conn.execute('ROLLBACK TO write')
+                outcomes.append((None, e))
+            conn.execute('RELEASE write')
+        conn.execute('COMMIT')
+        return outcomes
+
+
+# One writer per database file
+_writers: Dict[str, SerializedWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(db_path: str) -> SerializedWriter:
+    with _writers_lock:
+        writer = _writers.get(db_path)
+        if writer is None:
+            writer = _writers[db_path] = SerializedWriter(db_path)
+        return writer
+
+
+def close_writers():
+    """Commit every queued write, on shutdown"""
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.close()
@@ -0,0 +1,137 @@
+import asyncio
+import html
+import os
+import shutil
+import tempfile
+from telegram import Update
+from telegram.ext import ContextTypes
+from services.container import ServiceContainer
+from database.export import FORMATS, export_database, parse_since
+from services.throttle_service import THROTTLE_WINDOW
+
+class AdminHandler:
+    def __init__(self, services: ServiceContainer):
+        self.services = services
+        # Comma separated Telegram IDs allowed to run admin commands
+        self.admin_ids = {i.strip() for i in os.getenv("ADMIN_IDS", "").split(",") if i.strip()}
+
+    def is_admin(self, update: Update) -> bool:
+        return str(update.effective_user.id) in self.admin_ids
+
+    # added: export method to send table dumps to admins
+    async def export(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if not self.is_admin(update):
+            return
+
+        # /export [csv|jsonl] [since YYYY-MM-DD]
+        args = list(context.args)
+        fmt = args.pop(0) if args and args[0] in FORMATS else 'csv'
+        since = None
+        try:
+            if len(args) == 2 and args[0] == 'since':
+                since = parse_since(args[1])
+            elif args:
+                raise ValueError("Usage: /export [csv|jsonl] [since YYYY-MM-DD]")
+        except ValueError as e:
+            await update.message.reply_text(f"⚠️ {e}")
+            return
+
+        await update.message.reply_text("⏳ Exporting...")
+
+        out_dir = tempfile.mkdtemp(prefix="voro-export-")
+        try:
+            # Runs off the event loop, the bot keeps answering while the snapshot streams to disk
+            results = await asyncio.to_thread(
+                export_database, self.services.db.db_path, out_dir, fmt, since, None, True
+            )
+            for path, rows in results:
+                with open(path, 'rb') as f:
+                    await update.message.reply_document(
+                        document=f,
+                        filename=os.path.basename(path),
+                        caption=f"{rows} rows"
+                    )
+        except Exception as e:
+            await update.message.reply_text(f"❌ Export failed: {e}")
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+    # added: stats method, reads the rollup tables only
+    async def stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if not self.is_admin(update):
+            return
+
+        # /stats [days]
+        try:
+            days = int(context.args[0]) if context.args else 7
+            if not 1 <= days <= 365:
+                raise ValueError
+        except ValueError:
+            await update.message.reply_text("⚠️ Usage: /stats [days], between 1 and 365")
+            return
+
+        summary = self.services.db.get_stats(days)
+
+        def percent(rate):
+            return f"{rate:.0%}" if rate is not None else "-"
+
+        median = summary.median_fill_minutes
+        if summary.fill_time_histogram and median is None:
+            median_text = "over a week"
+        elif median is None:
+            median_text = "-"
+        elif median < 60:
+            median_text = f"≤ {median} min"
+        else:
+            median_text = f"≤ {median // 60} h"
+
+        venues = "\n".join(f"  {i}. {html.escape(venue)} ({games})" for i, (venue, games) in enumerate(summary.top_venues, 1))
+
+        await update.message.reply_text(
+            f"📊 <b>Last {days} day{'s' if days != 1 else ''}</b>\n\n"
+            f"🎾 Games created: {summary.games_created}\n"
+            f"✅ Filled: {summary.games_filled} ({percent(summary.fill_rate)})\n"
+            f"⏱ Median time to full: {median_text}\n"
+            f"❌ Cancelled: {summary.games_cancelled} ({percent(summary.cancellation_rate)})\n"
+            f"👥 Active players: {summary.active_players}\n"
+            f"➕ Joins: {summary.players_joined} | ➖ Leaves: {summary.players_left}\n\n"
+            f"📍 <b>Busiest venues</b>\n{venues or '  -'}",
+            parse_mode='HTML'
+        )
+
+    # added: throttles method, users dropped by flood control in the last THROTTLE_WINDOW seconds
+    async def throttles(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if not self.is_admin(update):
+            return
+
+        top = self.services.flood_control.top_throttled()
+        window = f"{THROTTLE_WINDOW // 60} minutes"
+        if not top:
+            await update.message.reply_text(f"🐢 Nobody has been throttled in the last {window}.")
+            return
+
+        lines = [
+            f"<a href='tg://user?id={user_id}'>{user_id}</a>: "
+            f"{counts['expensive']} expensive, {counts['cheap']} cheap"
+            for user_id, counts in top
+        ]
+        await update.message.reply_text(
+            f"🐢 <b>Most throttled users in the last {window}</b>\n\n" + "\n".join(lines),
+            parse_mode='HTML'
+        )
+
+    # added: dbwrites method, the serialized writer's counters since startup
+    async def dbwrites(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if not self.is_admin(update):
+            return
+
+        stats = self.services.db.get_write_stats()
+        per_commit = stats['writes'] / stats['commits'] if stats['commits'] else 0
+        await update.message.reply_text(
+            "🗄 <b>Database writes since startup</b>\n\n"
+            f"✍️ Writes: {stats['writes']} in {stats['commits']} commits ({per_commit:.1f} per commit, largest {stats['largest_batch']})\n"
+            f"⏳ Lock waits: {stats['lock_waits']} | 🔁 Retries: {stats['retries']}\n"
+            f"⌛ Time acquiring the lock: {stats['lock_wait_seconds']:.2f}s\n"
+            f"❌ Failed: {stats['failed']} | 📥 Queued: {stats['queued']}",
+            parse_mode='HTML'
+        )
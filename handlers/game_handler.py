@@ -1,20 +1,24 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from services.game_service import GameService
-from services.user_service import UserService
+from services.container import ServiceContainer
+from services.render_service import format_start_end_time, join_link, user_link
+from services.message_builder import send_chunked
+from services.series_service import SERIES_HORIZON_DAYS
+from services.game_service import FREE_SLOT_DAYS
+from services.broadcast_service import broadcaster
+from services.group_broadcast_service import group_broadcaster
 from datetime import datetime, timedelta
 import re
 import html
 
 class GameHandler:
-    def __init__(self):
-        self.game_service = GameService()
-        self.user_service = UserService()
+    def __init__(self, services: ServiceContainer):
+        self.services = services
     
     async def find_games(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         user_id = update.effective_user.id
-        user = self.user_service.get_user(user_id)
+        user = self.services.user_service.get_user(user_id)
 
         if not user:
             await update.message.reply_text(
@@ -22,7 +26,7 @@ class GameHandler:
             )
             return
 
-        games = self.game_service.get_available_games()
+        games = self.services.game_service.get_available_games()
         
         if not games:
             await update.message.reply_text(
@@ -31,46 +35,29 @@ class GameHandler:
             )
             return
         
-        text = "🎾 <b>Available Tennis Games:</b>\n\n"
-        
-        for game in games:
-            game_time = self.format_start_end_time(game.start_time, game.end_time)
-
-            # Get creator's display name
-            creator = self.user_service.get_user(game.creator_id)
-            creator_name = html.escape(creator.display_name if creator else "Unknown Creator")
-            join_link = f'https://t.me/voro_tennis_bot?start=joinwaitlist_{game.game_id}'
-
-            game_name = html.escape(game.game_name)
-            location = html.escape(game.location)
-            game_description = html.escape(game.game_description)
-
-            text += f"{game_name}\n"
-            # link to the creator's profile
-            text += f"👤 Hosted by: <a href='tg://user?id={game.creator_id}'>{creator_name}</a>\n"
-            text += f"📅 {game_time}\n" 
-            text += f"📍 {location}\n"
-            text += f"💰 Court Cost: ${game.court_cost}\n"
-            text += f"⭐ Skill: {game.min_skill} to {game.max_skill}\n"
-            text += f"👥 {game.current_players}/{game.max_players} players\n"
-            text += f"📋 Description: {game_description}\n"
-            # List all players and link to their profiles
-            if game.player_ids:
-                players = []
-                for player_id in game.player_ids:
-                    player = self.user_service.get_user(player_id)
-                    if player:
-                        players.append(f"<a href='tg://user?id={player_id}'>{html.escape(player.display_name)}</a>")
-                text += "👥 Players: " + ", ".join(players) + "\n"
-            text += f"<a href=\"{join_link}\">[Join Game 🔗]</a>\n\n"
-            
-        await update.message.reply_text(text, parse_mode='HTML', disable_web_page_preview=True)
+        cards = self.services.render_service.get_cards(games)
+        fragments = (self.listing_fragment(card, context.bot.username) for card in cards)
+
+        await send_chunked(
+            update.message.reply_text, fragments,
+            header="🎾 <b>Available Tennis Games:</b>\n\n",
+            parse_mode='HTML', disable_web_page_preview=True
+        )
     
+    def listing_fragment(self, card, bot_username: str) -> str:
+        return (
+            f"{card.title}\n"
+            # link to the creator's profile
+            f"👤 Hosted by: {card.host}\n"
+            f"{card.details}"
+            f"<a href=\"{join_link(bot_username, card.game_id)}\">[Join Game 🔗]</a>\n\n"
+        )
+
     # modified: create_game method to handle new game creation
     async def create_game(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Check if user is registered
         user_id = update.effective_user.id
-        user = self.user_service.get_user(user_id)
+        user = self.services.user_service.get_user(user_id)
 
         if not user:
             await update.message.reply_text(
@@ -97,12 +84,19 @@ class GameHandler:
                 "Court Cost: 10\n"
                 "Description: rally, then match. will provide balls but please bring balls too.\n\n",
             )
+            await update.message.reply_text(
+                "🔁 Same game every week? Add <code>Repeat: weekly</code> "
+                "(or <code>Repeat: every 2 weeks</code>) as the last line.",
+                parse_mode='HTML'
+            )
             return
         
         try:
             data = self.parse_structured_input(update.message.text.replace("/create", "").strip())
+            repeat_weeks = data.pop("repeat_weeks")
+            series_note = ""
 
-            self.game_service.create_game(
+            fields = dict(
                 game_name=data["name"],
                 creator_id=user_id,
                 location=data["location"],
@@ -112,11 +106,28 @@ class GameHandler:
                 min_skill=data["min_skill"],
                 max_skill=data["max_skill"],
                 max_players=data["max_players"],
-                game_description=data["description"]        
+                game_description=data["description"],
+                # A redelivered /create message carries the same chat and message ID
+                idempotency_key=f"create:{update.effective_chat.id}:{update.message.message_id}"
             )
+
+            if repeat_weeks:
+                series, games = await self.services.series_service.create_series(interval_weeks=repeat_weeks, **fields)
+                if series is None:
+                    return
+                game_id = games[0].game_id
+                every = "week" if repeat_weeks == 1 else f"{repeat_weeks} weeks"
+                series_note = (
+                    f"🔁 Repeats every {every}. Games are listed {SERIES_HORIZON_DAYS} days ahead "
+                    f"({len(games)} so far). Manage the series with /series\n\n"
+                )
+            else:
+                game_id = await self.services.game_service.create_game(**fields)
+                if game_id is None:
+                    return
             
             # Calculate duration
-            formatted_time = self.format_start_end_time(data["start_time"], data["end_time"])
+            formatted_time = format_start_end_time(data["start_time"], data["end_time"])
             
             await update.message.reply_text(
                 f"✅ <b>Game Created Successfully!</b>\n\n"
@@ -127,10 +138,17 @@ class GameHandler:
                 f"💰 Court Cost: ${data['court_cost']}\n"
                 f"👥 Players: 1/{data['max_players']} (You're in!)\n"
                 f"📋 Description: {html.escape(data['description'])}\n\n"
+                f"{series_note}"
                 f"Your game is now visible to other players.\n\n"
                 f"I'll notify you when someone joins the waitlist!",
                 parse_mode='HTML'
             )
+
+            # Push the new game to subscribers it fits, without holding up the reply
+            game = self.services.game_service.get_game(game_id)
+            matches = self.services.match_service.find_matches(game)
+            if matches:
+                context.application.create_task(self.send_match_alerts(context, game, matches))
             
         except Exception as e:
             await update.message.reply_text(
@@ -138,23 +156,15 @@ class GameHandler:
                 f"Error: {str(e)}"
             )
     
-    def format_start_end_time(self, start_time: int, end_time: int) -> str:
-        # Calculate the duration, if less 1 hour, show minutes, else show hours
-        duration = end_time - start_time
-        if duration < 3600:  # Less than 1 hour
-            duration_str = f"{duration // 60} min"
-        # if duration is exactly hours whole number, show as hours, else show as hours and minutes
-        elif duration % 3600 == 0:
-            duration_str = f"{duration // 3600} hr"
-        else:
-            hours = duration // 3600
-            minutes = (duration % 3600) // 60
-            duration_str = f"{hours} hr {minutes} min"
-
-        """Format start and end time for display"""
-        start_dt = datetime.fromtimestamp(start_time)
-        end_dt = datetime.fromtimestamp(end_time)
-        return f"{start_dt.strftime('%a, %d %b %Y, %I:%M %p')} - {end_dt.strftime('%I:%M %p')} | Duration: {duration_str}"
+    async def send_match_alerts(self, context: ContextTypes.DEFAULT_TYPE, game, user_ids: list):
+        card = self.services.render_service.get_card(game)
+        await broadcaster.send_many(
+            context.bot, user_ids,
+            f"🔔 <b>New game for you!</b>\n\n"
+            f"{self.listing_fragment(card, context.bot.username)}"
+            f"<i>Turn these off with /alerts off</i>",
+            parse_mode='HTML', disable_web_page_preview=True
+        )
 
     def parse_structured_input(self, text: str) -> dict:
         # Split and clean
@@ -165,6 +175,11 @@ class GameHandler:
             "Name", "Location", "Start Time", "End Time", "Min Skill",
             "Max Skill", "Max Players", "Court Cost", "Description"
         ]
+        # An optional last line makes the game a recurring series
+        repeat_weeks = None
+        if len(lines) == len(expected_keys) + 1 and lines[-1].lower().startswith("repeat:"):
+            repeat_weeks = self.parse_repeat(lines.pop().split(":", 1)[1])
+
         if len(lines) != len(expected_keys):
             raise ValueError("Please fill in all fields using the template. One or more fields are missing.")
 
@@ -241,12 +256,25 @@ class GameHandler:
             "max_skill": max_skill,
             "max_players": max_players,
             "court_cost": court_cost,
-            "description": fields["Description"]
+            "description": fields["Description"],
+            "repeat_weeks": repeat_weeks
         }
 
+    def parse_repeat(self, value: str) -> int:
+        """'weekly' -> 1, 'fortnightly' or 'every 2 weeks' -> 2"""
+        value = value.strip().lower()
+        if value == "weekly":
+            return 1
+        if value in ("fortnightly", "biweekly"):
+            return 2
+        match = re.fullmatch(r"every (\d) weeks?", value)
+        if match and 1 <= int(match.group(1)) <= 4:
+            return int(match.group(1))
+        raise ValueError("Repeat must be 'weekly' or 'every N weeks', with N from 1 to 4.")
+
     async def my_games(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_id = str(update.effective_user.id)
-        games = self.game_service.get_user_games(user_id)
+        games = self.services.game_service.get_user_games(user_id)
         
         if not games:
             await update.message.reply_text(
@@ -255,50 +283,50 @@ class GameHandler:
             )
             return
         
-        text = "🎾 <b>Your Upcoming Games:</b>\n\n"
-        
-        for game in games:
-            game_time = self.format_start_end_time(game.start_time, game.end_time)
-            # Get creator's display name
-            creator = self.user_service.get_user(game.creator_id)
-            creator_name = creator.display_name if creator else "Unknown Creator"
-            
-            creator_text = "👑 Your game" if game.creator_id == user_id else f"🎾 Joined <a href='tg://user?id={game.creator_id}'>{creator_name}</a>'s game"
-            
-            text += f"{creator_text}\n"
-            text += f"{html.escape(game.game_name)}\n"
-            # link to the creator's profile
-            text += f"📅 {game_time}\n" 
-            text += f"📍 {html.escape(game.location)}\n"
-            text += f"💰 Court Cost: ${game.court_cost}\n"
-            text += f"⭐ Skill: {game.min_skill} to {game.max_skill}\n"
-            text += f"👥 {game.current_players}/{game.max_players} players\n"
-            text += f"📋 Description: {html.escape(game.game_description)}\n"
-            # List all players and link to their profiles
-            if game.player_ids:
-                players = []
-                for player_id in game.player_ids:
-                    player = self.user_service.get_user(player_id)
-                    if player:
-                        players.append(f"<a href='tg://user?id={player_id}'>{html.escape(player.display_name)}</a>")
-                text += "👥 Players: " + ", ".join(players) + "\n"
-            text += f"📊 Status: {game.status.title()}\n"
-
-            # If the user is the creator, provide a delete option
-            if game.creator_id == user_id:
-                text += f"⏳ <b>View Waitlist</b> [/waitlist_{game.game_id}]\n"
-                text += f"❌ <b>Cancel</b> [/cancel_{game.game_id}]\n\n"
-                
-            else:
-                text += f"[🚪 <b>Leave</b> /leave_{game.game_id}]\n\n"
+        cards = self.services.render_service.get_cards(games)
+        fragments = (self.my_game_fragment(game, card, user_id) for game, card in zip(games, cards))
+
+        await send_chunked(
+            update.message.reply_text, fragments,
+            header="🎾 <b>Your Upcoming Games:</b>\n\n",
+            footer=self.free_slots_fragment(user_id),
+            parse_mode='HTML'
+        )
+
+    def free_slots_fragment(self, user_id: str) -> str:
+        lines = [f"🕒 <b>Your free slots, next {FREE_SLOT_DAYS} days:</b>"]
+        for day, free in self.services.game_service.free_slots(user_id):
+            windows = ", ".join(f"{start:%H:%M}-{end:%H:%M}" for start, end in free) or "fully booked"
+            lines.append(f"{day:%a %d %b}: {windows}")
+        return "\n".join(lines)
+
+    def my_game_fragment(self, game, card, user_id: str) -> str:
+        creator_text = "👑 Your game" if game.creator_id == user_id else f"🎾 Joined {card.host}'s game"
+
+        # If the user is the creator, provide a delete option
+        if game.creator_id == user_id:
+            actions = (
+                f"🤖 Auto-fill: {'On' if game.auto_fill else 'Off'} [/autofill_{game.game_id}]\n"
+                f"💬 Group chat: {'Linked' if game.telegram_group_id else f'send /linkgroup_{game.game_id} in your group'}\n"
+                f"⏳ <b>View Waitlist</b> [/waitlist_{game.game_id}]\n"
+                f"❌ <b>Cancel</b> [/cancel_{game.game_id}]\n\n"
+            )
+        else:
+            actions = f"[🚪 <b>Leave</b> /leave_{game.game_id}]\n\n"
 
-        await update.message.reply_text(text, parse_mode='HTML')
+        return (
+            f"{creator_text}\n"
+            f"{card.title}\n"
+            f"{card.details}"
+            f"📊 Status: {game.status.title()}\n"
+            f"{actions}"
+        )
 
     async def cancel_game(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_id = str(update.effective_user.id)
         game_id = re.search(r'cancel_(\w+)', update.message.text).group(1)
 
-        game = self.game_service.get_game(game_id)
+        game = self.services.game_service.get_game(game_id)
 
         if not game:
             await update.message.reply_text("❌ Game not found or has already been cancelled.")
@@ -308,40 +336,65 @@ class GameHandler:
             await update.message.reply_text("❌ You can only cancel games you created.")
             return
 
-        success = self.game_service.cancel_game(game_id)
-        
-        if success:
+        # The game as the delete found it, its players can no longer be loaded afterwards
+        game = await self.services.game_service.cancel_game(game_id)
+
+        if game:
             await update.message.reply_text(
                 f"✅ <b>Game Cancelled Successfully!</b>\n\n"
                 f"{html.escape(game.game_name)} has been cancelled. All players have been notified.",
                 parse_mode='HTML'
             )
             
-            # Notify all players in the game
-            for player_id in game.player_ids:
-                
-                # skip the creator since they are already notified
-                if player_id == user_id:
-                    continue
-
-                player = self.user_service.get_user(player_id)
-                if player:
-                    await context.bot.send_message(
-                        chat_id=player.telegram_id,
-                        text=f"📢 <b>Game Cancelled</b>\n\n"
-                             f"The game <b>{html.escape(game.game_name)}</b> you joined has been cancelled by the host.\n"
-                             f"Please check /find for other available games.",
-                        parse_mode='HTML'
-                    )
+            # Notify all players in the game, once in the game's group if it has one
+            # skip the creator since they are already notified
+            await group_broadcaster.announce(
+                context.bot, game,
+                f"📢 <b>Game Cancelled</b>\n\n"
+                f"The game <b>{html.escape(game.game_name)}</b> has been cancelled by the host.\n"
+                f"Please check /find for other available games.",
+                exclude=[user_id],
+                parse_mode='HTML'
+            )
         else:
             await update.message.reply_text("❌ Could not cancel the game. Please try again.")
 
 
+    # added: link_group method, /linkgroup_<id> sent by the host inside the group chat
+    async def link_group(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        user_id = str(update.effective_user.id)
+        chat = update.effective_chat
+        game_id = re.search(r'linkgroup_([a-zA-Z0-9]+)', update.message.text).group(1)
+
+        if chat.type not in (chat.GROUP, chat.SUPERGROUP):
+            await update.message.reply_text(
+                "💬 Add me to your game's group chat and send this command there to link it."
+            )
+            return
+
+        game = self.services.game_service.get_game(game_id)
+        if not game:
+            await update.message.reply_text("❌ Game not found.")
+            return
+
+        if game.creator_id != user_id:
+            await update.message.reply_text("❌ Only the host can link a group to this game.")
+            return
+
+        await self.services.game_service.update_game_group(game_id, str(chat.id))
+        group_broadcaster.forget_group(str(chat.id))
+
+        await update.message.reply_text(
+            f"✅ <b>{html.escape(game.game_name)}</b> is linked to this group.\n\n"
+            f"Announcements for the game will be posted here. Players who aren't in the group still get them privately.",
+            parse_mode='HTML'
+        )
+
     async def leave_game(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_id = str(update.effective_user.id)
         game_id = re.search(r'leave_(\w+)', update.message.text).group(1)
 
-        success = self.game_service.leave_game(game_id, user_id)
+        success, promoted_id = await self.services.game_service.leave_game(game_id, user_id)
         
         if success:
             await update.message.reply_text(
@@ -349,26 +402,127 @@ class GameHandler:
                 f"Only join games you can attend! 🎾",
                 parse_mode='HTML'
             )
-            game = self.game_service.get_game(game_id)
-            user = self.user_service.get_user(user_id)
+            game = self.services.game_service.get_game(game_id)
+            user = self.services.user_service.get_user(user_id)
+            card = self.services.render_service.get_card(game)
 
-            # formatted start and end time
-            game_time = self.format_start_end_time(game.start_time, game.end_time)
+            if promoted_id:
+                status_text = "A player from your waitlist has been moved in automatically."
+            else:
+                status_text = "Your game is now open for new players!"
             
             # Notify game creator
             await context.bot.send_message(
-                # get the game object
-                
                 chat_id=game.creator_id,
                 text=f"📢 <b>Player Left Your Game</b>\n\n"
-                     f"👤 <a href='tg://user?id={user.telegram_id}'>{html.escape(user.display_name)}</a> has left the game:\n"
-                     f"🎾 {html.escape(game.game_name)}\n"
-                     f"📍 {html.escape(game.location)}\n"
-                     f"📅 {game_time}\n\n"
+                     f"👤 {user_link(user.telegram_id, user.display_name)} has left the game:\n"
+                     f"🎾 {card.title}\n"
+                     f"📍 {card.location}\n"
+                     f"📅 {card.time}\n\n"
                      f"Current players: {game.current_players}/{game.max_players}\n"
-                     f"Your game is now open for new players!"
+                     f"{status_text}",
+                parse_mode='HTML'
             )
+
+            if promoted_id:
+                await self.notify_auto_promoted(context, game, [promoted_id])
         else:
             await update.message.reply_text("❌ Could not leave the game. Please try again.")
 
-    
\ No newline at end of file
+    # added: autofill method to toggle automatic waitlist promotion for a game
+    async def toggle_auto_fill(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        user_id = str(update.effective_user.id)
+        game_id = re.search(r'autofill_(\w+)', update.message.text).group(1)
+
+        game = self.services.game_service.get_game(game_id)
+
+        if not game:
+            await update.message.reply_text("❌ Game not found.")
+            return
+
+        if game.creator_id != user_id:
+            await update.message.reply_text("❌ You can only change auto-fill for games you created.")
+            return
+
+        enabled = not game.auto_fill
+        promoted = await self.services.game_service.set_auto_fill(game_id, enabled)
+
+        if enabled:
+            await update.message.reply_text(
+                f"🤖 <b>Auto-fill is on</b> for {html.escape(game.game_name)}\n\n"
+                f"When a seat opens, I'll move in the longest-waiting player whose skill fits.\n"
+                f"Turn it off with /autofill_{game_id}",
+                parse_mode='HTML'
+            )
+        else:
+            await update.message.reply_text(
+                f"🤖 <b>Auto-fill is off</b> for {html.escape(game.game_name)}\n\n"
+                f"Approve players yourself from /waitlist_{game_id}",
+                parse_mode='HTML'
+            )
+
+        if promoted:
+            await self.notify_auto_promoted(context, self.services.game_service.get_game(game_id), promoted)
+
+    # added: capacity method to change the number of players in a game
+    async def change_capacity(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        user_id = str(update.effective_user.id)
+        game_id, max_players = re.search(r'capacity_(\w+)_(\d+)', update.message.text).groups()
+        max_players = int(max_players)
+
+        game = self.services.game_service.get_game(game_id)
+
+        if not game:
+            await update.message.reply_text("❌ Game not found.")
+            return
+
+        if game.creator_id != user_id:
+            await update.message.reply_text("❌ You can only change capacity for games you created.")
+            return
+
+        if not (2 <= max_players <= 4):
+            await update.message.reply_text("❌ Max Players must be between 2 and 4.")
+            return
+
+        if max_players < game.current_players:
+            await update.message.reply_text(
+                f"❌ {game.current_players} players have already joined, capacity can't go below that."
+            )
+            return
+
+        promoted = await self.services.game_service.update_max_players(game_id, max_players)
+        await update.message.reply_text(
+            f"✅ {html.escape(game.game_name)} now takes {max_players} players.",
+            parse_mode='HTML'
+        )
+
+        if promoted:
+            await self.notify_auto_promoted(context, self.services.game_service.get_game(game_id), promoted)
+
+    async def notify_auto_promoted(self, context: ContextTypes.DEFAULT_TYPE, game, user_ids: list):
+        """Tell auto-promoted players they are in, and the host who was moved in"""
+        card = self.services.render_service.get_card(game)
+        names = self.services.user_service.db.get_display_names(user_ids)
+
+        for user_id in user_ids:
+            await context.bot.send_message(
+                chat_id=user_id,
+                text=f"🎉 <b>You're in!</b>\n\n"
+                     f"A seat opened up and you were next on the waitlist for:\n"
+                     f"🎾 <b>{card.title}</b>\n"
+                     f"📅 {card.time}\n"
+                     f"📍 {card.location}\n"
+                     f"💰 Court Cost: ${game.court_cost}\n\n"
+                     f"Host: {card.host}\n\n"
+                     f"Can't make it? Use /leave_{game.game_id}",
+                parse_mode='HTML'
+            )
+
+        players = ", ".join(user_link(user_id, names.get(user_id, "Player")) for user_id in user_ids)
+        await context.bot.send_message(
+            chat_id=game.creator_id,
+            text=f"🤖 <b>Auto-filled from your waitlist</b>\n\n"
+                 f"{players} joined {card.title}.\n"
+                 f"👥 Players: {game.current_players}/{game.max_players}",
+            parse_mode='HTML'
+        )
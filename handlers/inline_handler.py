@@ -0,0 +1,33 @@
+from datetime import datetime
+from telegram import InlineQueryResultArticle, InputTextMessageContent, Update
+from telegram.ext import ContextTypes
+from services.container import ServiceContainer
+from services.render_service import join_link
+
+# Seconds Telegram may reuse an answer. Short, because seats fill up.
+INLINE_CACHE_TIME = 30
+
+class InlineHandler:
+    def __init__(self, services: ServiceContainer):
+        self.services = services
+
+    # added: inline_query method, "@voro_tennis_bot sat pasir" from any chat
+    async def inline_query(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.inline_query
+        games = self.services.game_search_index.search(query.query, int(datetime.now().timestamp()))
+
+        results = [
+            InlineQueryResultArticle(
+                id=game.game_id,
+                title=game.title,
+                description=game.description,
+                input_message_content=InputTextMessageContent(
+                    f"{game.message}<a href=\"{join_link(context.bot.username, game.game_id)}\">[Join Game 🔗]</a>",
+                    parse_mode='HTML', disable_web_page_preview=True
+                ),
+            )
+            for game in games
+        ]
+
+        # Every user gets the same results for the same text, so Telegram can share the cached answer
+        await query.answer(results, cache_time=INLINE_CACHE_TIME, is_personal=False)
@@ -0,0 +1,75 @@
+import html
+from telegram import Update
+from telegram.ext import ContextTypes
+from services.container import ServiceContainer
+
+class SearchHandler:
+    def __init__(self, services: ServiceContainer):
+        self.services = services
+
+    async def watch(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        user_id = str(update.effective_user.id)
+
+        if not self.services.user_service.get_user(user_id):
+            await update.message.reply_text(
+                "⚠️ You need to create an account first! Use /start to get started."
+            )
+            return
+
+        if not context.args:
+            searches = self.services.saved_search_service.get_user_searches(user_id)
+            text = "🔎 <b>Your Saved Searches</b>\n\n"
+            if searches:
+                for search in searches:
+                    text += f"{search.search_id}. {html.escape(search.query)} [/unwatch {search.search_id}]\n"
+                text += "\n"
+            else:
+                text += "You have no saved searches.\n\n"
+            text += (
+                "Save a search and I'll send you a digest of new games that match:\n"
+                "/watch weekday evenings pasir ris under $10\n\n"
+                "<i>Filters: days (mon, weekdays, weekends), times (mornings, evenings, 18-22), "
+                "cost (under $10, free), and any words from the location.</i>"
+            )
+            await update.message.reply_text(text, parse_mode='HTML')
+            return
+
+        try:
+            search = await self.services.saved_search_service.watch(user_id, ' '.join(context.args))
+        except ValueError as e:
+            await update.message.reply_text(
+                f"⚠️ {e}\n\n"
+                f"Example: /watch weekday evenings pasir ris under $10"
+            )
+            return
+
+        await update.message.reply_text(
+            f"✅ Saved search <b>{html.escape(search.query)}</b>!\n\n"
+            f"I'll send you a digest when new games match. Stop with /unwatch {search.search_id}",
+            parse_mode='HTML'
+        )
+
+    async def unwatch(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        user_id = str(update.effective_user.id)
+
+        if not context.args:
+            await update.message.reply_text(
+                "Please tell me which search to remove.\n\n"
+                "Example: /unwatch 3 or /unwatch all\n"
+                "See your searches with /watch"
+            )
+            return
+
+        if context.args[0] == 'all':
+            removed = await self.services.saved_search_service.unwatch(user_id)
+        else:
+            try:
+                removed = await self.services.saved_search_service.unwatch(user_id, int(context.args[0]))
+            except ValueError:
+                await update.message.reply_text("⚠️ Please give the search number from /watch.")
+                return
+
+        if removed:
+            await update.message.reply_text(f"🗑 Removed {removed} saved search{'es' if removed != 1 else ''}.")
+        else:
+            await update.message.reply_text("⚠️ No matching saved search found. See your searches with /watch")
@@ -0,0 +1,158 @@
+import html
+import re
+from datetime import datetime
+from telegram import Update
+from telegram.ext import ContextTypes
+from handlers.game_handler import GameHandler
+from services.container import ServiceContainer
+from services.group_broadcast_service import group_broadcaster
+from services.message_builder import send_chunked
+
+# Template fields a host can edit -> (series column, parser)
+EDITABLE_FIELDS = {
+    "Name": ("game_name", str),
+    "Location": ("location", str),
+    "Description": ("game_description", str),
+    "Court Cost": ("court_cost", float),
+    "Min Skill": ("min_skill", float),
+    "Max Skill": ("max_skill", float),
+    "Max Players": ("max_players", int),
+}
+
+class SeriesHandler:
+    def __init__(self, services: ServiceContainer):
+        self.services = services
+        self.game_handler = GameHandler(services)
+
+    # added: list_series method, /series
+    async def list_series(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        user_id = str(update.effective_user.id)
+        series_list = self.services.series_service.get_user_series(user_id)
+
+        if not series_list:
+            await update.message.reply_text(
+                "You don't host any recurring games. 🔁\n\n"
+                "Add 'Repeat: weekly' as the last line of /create to start one."
+            )
+            return
+
+        fragments = (self.series_fragment(series) for series in series_list)
+        await send_chunked(
+            update.message.reply_text, fragments,
+            header="🔁 <b>Your Recurring Games:</b>\n\n",
+            footer="✏️ <i>To edit, send /editseries_ID followed by lines like</i> <code>Court Cost: 12</code>",
+            parse_mode='HTML'
+        )
+
+    def series_fragment(self, series) -> str:
+        start = datetime.fromtimestamp(series.first_start)
+        end = datetime.fromtimestamp(series.first_start + series.duration)
+        every = "week" if series.interval_weeks == 1 else f"{series.interval_weeks} weeks"
+        return (
+            f"🎾 <b>{html.escape(series.game_name)}</b>\n"
+            f"📅 Every {every} on {start:%A}, {start:%H:%M}-{end:%H:%M}\n"
+            f"📍 {html.escape(series.location)} | 💰 ${series.court_cost}\n"
+            f"⭐ {series.min_skill} to {series.max_skill} | 👥 {series.max_players} players\n"
+            f"✏️ /editseries_{series.series_id}\n"
+            f"❌ /cancelseries_{series.series_id}\n\n"
+        )
+
+    def get_own_series(self, user_id: str, series_id: str):
+        series = self.services.series_service.get_series(series_id)
+        if not series or series.status != 'active':
+            return None, "❌ Series not found or already cancelled."
+        if series.creator_id != user_id:
+            return None, "❌ You can only manage series you created."
+        return series, None
+
+    # added: cancel_series method, /cancelseries_<id>
+    async def cancel_series(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        user_id = str(update.effective_user.id)
+        series_id = re.search(r'cancelseries_(\w+)', update.message.text).group(1)
+
+        series, error = self.get_own_series(user_id, series_id)
+        if error:
+            await update.message.reply_text(error)
+            return
+
+        games = await self.services.series_service.cancel_series(series_id)
+
+        await update.message.reply_text(
+            f"✅ <b>Series Cancelled</b>\n\n"
+            f"{html.escape(series.game_name)} won't repeat any more. "
+            f"{len(games)} upcoming game{'s' if len(games) != 1 else ''} cancelled and their players notified.",
+            parse_mode='HTML'
+        )
+
+        for game in games:
+            await group_broadcaster.announce(
+                context.bot, game,
+                f"📢 <b>Game Cancelled</b>\n\n"
+                f"The game <b>{html.escape(game.game_name)}</b> on "
+                f"{datetime.fromtimestamp(game.start_time):%d %b, %H:%M} has been cancelled by the host.\n"
+                f"Please check /find for other available games.",
+                exclude=[user_id],
+                parse_mode='HTML'
+            )
+
+    # added: edit_series method, /editseries_<id> followed by "Field: value" lines
+    async def edit_series(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        user_id = str(update.effective_user.id)
+        lines = update.message.text.strip().splitlines()
+        series_id = re.search(r'editseries_(\w+)', lines[0]).group(1)
+
+        series, error = self.get_own_series(user_id, series_id)
+        if error:
+            await update.message.reply_text(error)
+            return
+
+        try:
+            changes = self.parse_changes(lines[1:], series)
+        except ValueError as e:
+            await update.message.reply_text(f"❌ {e}")
+            return
+
+        promoted = await self.services.series_service.edit_series(series_id, changes)
+        updated = len(promoted)
+        await update.message.reply_text(
+            f"✅ <b>Series Updated</b>\n\n"
+            f"{html.escape(changes.get('game_name', series.game_name))} and "
+            f"{updated} upcoming game{'s' if updated != 1 else ''} now use the new details.",
+            parse_mode='HTML'
+        )
+
+        # A higher Max Players fills the new seats of auto-fill games from their waitlists
+        for game_id, user_ids in promoted.items():
+            if user_ids:
+                await self.game_handler.notify_auto_promoted(context, self.services.game_service.get_game(game_id), user_ids)
+
+    def parse_changes(self, lines: list, series) -> dict:
+        changes = {}
+        for line in filter(None, (line.strip() for line in lines)):
+            key, _, value = line.partition(":")
+            key, value = key.strip(), value.strip()
+            if key not in EDITABLE_FIELDS:
+                raise ValueError(
+                    f"'{key}' can't be edited. Editable fields: {', '.join(EDITABLE_FIELDS)}. "
+                    f"To change the day or time, cancel the series and create a new one."
+                )
+            if not value:
+                raise ValueError(f"{key} cannot be empty.")
+            column, parse = EDITABLE_FIELDS[key]
+            try:
+                changes[column] = parse(value)
+            except ValueError:
+                raise ValueError(f"{key} must be a number.")
+
+        if not changes:
+            raise ValueError("Add the fields to change on new lines, e.g.\n/editseries_ID\nCourt Cost: 12")
+
+        min_skill = changes.get("min_skill", series.min_skill)
+        max_skill = changes.get("max_skill", series.max_skill)
+        if not (0.0 <= min_skill <= max_skill <= 7.0):
+            raise ValueError("Skill levels must be between 0.0 and 7.0, with Min Skill not above Max Skill.")
+        if not 2 <= changes.get("max_players", series.max_players) <= 4:
+            raise ValueError("Max Players must be between 2 and 4.")
+        if changes.get("court_cost", 0) < 0:
+            raise ValueError("Court Cost must be 0 or more.")
+        return changes
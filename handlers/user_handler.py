@@ -1,14 +1,17 @@
 import re
+import html
 from telegram import Update
 from telegram.ext import ContextTypes
-from services.user_service import UserService
+from services.container import ServiceContainer
+from services.match_service import parse_preferences, describe_preferences
 from datetime import datetime as dt
 from handlers.waitlist_handler import WaitlistHandler
+from services.group_broadcast_service import group_broadcaster
 
 class UserHandler:
-    def __init__(self):
-        self.user_service = UserService()
-        self.waitlist_handler = WaitlistHandler()
+    def __init__(self, services: ServiceContainer):
+        self.services = services
+        self.waitlist_handler = WaitlistHandler(services)
     
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
 
@@ -22,7 +25,7 @@ class UserHandler:
         user = update.effective_user
 
         # Check if user already exists in database
-        existing_user = self.user_service.get_user(user.id)
+        existing_user = self.services.user_service.get_user(user.id)
 
         if existing_user:
             # User already exists, no need to create again
@@ -37,7 +40,7 @@ class UserHandler:
             return
         
         # Create/update user in database
-        self.user_service.create_or_update_user(
+        await self.services.user_service.create_or_update_user(
             str(user.id), user.username, user.first_name
         )
         
@@ -54,7 +57,7 @@ class UserHandler:
     # added: profile method to view user profile
     async def profile(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         telegram_id = str(update.effective_user.id)
-        user_data = self.user_service.get_user(telegram_id)
+        user_data = self.services.user_service.get_user(telegram_id)
 
         if not user_data:
             await update.message.reply_text("⚠️ No account found. /start to create account.")
@@ -89,7 +92,7 @@ class UserHandler:
             skill_level = float(context.args[0])
             if 1.0 <= skill_level <= 7.0:
                 telegram_id = str(update.effective_user.id)
-                self.user_service.update_skill_level(telegram_id, skill_level)
+                await self.services.user_service.update_skill_level(telegram_id, skill_level)
                 await update.message.reply_text(
                     f"✅ Skill level has been set to: <b>{skill_level}</b>!\n\n"
                     f"Return to your /profile\n",
@@ -119,7 +122,7 @@ class UserHandler:
 
         telegram_id = str(update.effective_user.id)
 
-        self.user_service.update_display_name(telegram_id, display_name)
+        await self.services.user_service.update_display_name(telegram_id, display_name)
         
         await update.message.reply_text(
             f"✅ Display name has been set to: <b>{display_name}</b>!\n\n"
@@ -141,7 +144,7 @@ class UserHandler:
 
         telegram_id = str(update.effective_user.id)
 
-        self.user_service.update_bio(telegram_id, bio)
+        await self.services.user_service.update_bio(telegram_id, bio)
         
         await update.message.reply_text(
             f"✅ Bio has been set to: <b>{bio}</b>\n\n"
@@ -163,10 +166,21 @@ class UserHandler:
             confirmation = context.args[0]
             if confirmation == 'yes':
                 telegram_id = str(update.effective_user.id)
-                self.user_service.delete_profile(telegram_id)
+                cancelled = await self.services.user_service.delete_profile(telegram_id)
                 await update.message.reply_text(
                     f"Your profile has been deleted successfully. Goodbye! 👋"
                 )
+
+                # The games they hosted are cancelled with their profile
+                for game in cancelled:
+                    await group_broadcaster.announce(
+                        context.bot, game,
+                        f"📢 <b>Game Cancelled</b>\n\n"
+                        f"The game <b>{html.escape(game.game_name)}</b> has been cancelled, the host has left Voro.\n"
+                        f"Please check /find for other available games.",
+                        exclude=[telegram_id],
+                        parse_mode='HTML'
+                    )
             else:
                 raise ValueError()
             
@@ -186,7 +200,7 @@ class UserHandler:
             await update.message.reply_text("❌ Invalid command format.")
             return
         user_id = match.group(1)
-        user_data = self.user_service.get_user(user_id)
+        user_data = self.services.user_service.get_user(user_id)
         if not user_data:
             await update.message.reply_text("⚠️ User not found.")
             return
@@ -199,5 +213,60 @@ class UserHandler:
             f"📅 Joined Since: {dt.fromtimestamp(user_data.created_at).strftime('%d %b %Y')}\n",
             parse_mode='HTML'
         )
-        
 
+    # added: alerts method to opt in to "new game for you" notifications
+    async def alerts(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        telegram_id = str(update.effective_user.id)
+
+        if not context.args:
+            subscription = self.services.match_service.get_subscription(telegram_id)
+            status = (
+                f"🔔 Alerts are <b>on</b> for {describe_preferences(subscription)}.\n\n"
+                if subscription else "🔕 Alerts are <b>off</b>.\n\n"
+            )
+            await update.message.reply_text(
+                f"{status}"
+                f"Get a message when a new game fits your skill level.\n\n"
+                f"/alerts on - <i>Any day, any time</i>\n"
+                f"/alerts on weekends 18-22 - <i>Only some days and hours</i>\n"
+                f"/alerts off - <i>Stop alerts</i>\n",
+                parse_mode='HTML'
+            )
+            return
+
+        if context.args[0] == 'off':
+            await self.services.match_service.unsubscribe(telegram_id)
+            await update.message.reply_text("🔕 Alerts turned off.")
+            return
+
+        if context.args[0] != 'on':
+            await update.message.reply_text("⚠️ Use /alerts on or /alerts off.")
+            return
+
+        user_data = self.services.user_service.get_user(telegram_id)
+        if not user_data:
+            await update.message.reply_text("⚠️ No account found. /start to create account.")
+            return
+
+        if not user_data.skill_level:
+            await update.message.reply_text(
+                "❌ Please set your skill level first!\n\n"
+                "Use /setskill command so I know which games fit you."
+            )
+            return
+
+        try:
+            days, start_hour, end_hour = parse_preferences(context.args[1:])
+        except ValueError as e:
+            await update.message.reply_text(
+                f"⚠️ {e}\n\n"
+                f"Example: /alerts on weekends 18-22"
+            )
+            return
+
+        subscription = await self.services.match_service.subscribe(telegram_id, user_data.skill_level, days, start_hour, end_hour)
+        await update.message.reply_text(
+            f"🔔 Alerts turned on for {describe_preferences(subscription)}.\n\n"
+            f"I'll message you when a game for skill {subscription.skill_level} is created.",
+            parse_mode='HTML'
+        )
@@ -1,76 +1,58 @@
 import html
 import re
+from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from services.game_service import GameService
-from services.user_service import UserService
+from services.container import ServiceContainer
+from services.render_service import user_link
+from services.message_builder import send_chunked
 from models.user import User
 from models.game import Game
+from models.waitlist import JoinResult
+
+# Reply for each waitlist join outcome
+JOIN_REPLIES = {
+    JoinResult.JOINED: "✅ <b>Added to waitlist!</b>\n\nI'll notify you once the game host make a decision! 🎾",
+    JoinResult.NO_ACCOUNT: "⚠️ You need to create an account first! Use /start to get started.",
+    JoinResult.NO_SKILL: (
+        "❌ Please set your skill level first!\n\n"
+        "Use /setskill command to set your tennis level before joining games."
+    ),
+    JoinResult.GAME_NOT_FOUND: "❌ Game not found or has expired.",
+    JoinResult.ALREADY_IN_GAME: "👀 You're already in the game.",
+    JoinResult.ALREADY_REQUESTED: "🙂 You're already on the waitlist for this game.",
+    JoinResult.GAME_FULL: "😢 Sorry, the game is full.",
+    JoinResult.SCHEDULE_CONFLICT: "⏰ This game overlaps one you're already playing:",
+}
 
 class WaitlistHandler:
-    def __init__(self):
-        self.game_service = GameService()
-        self.user_service = UserService()
+    def __init__(self, services: ServiceContainer):
+        self.services = services
     
     async def handle_join_waitlist(self, update: Update, context: ContextTypes.DEFAULT_TYPE, game_id: str):
-        
         user_id = str(update.effective_user.id)
-        user = self.user_service.get_user(user_id)
-
-        if not user:
-            await update.message.reply_text(
-                "⚠️ You need to create an account first! Use /start to get started."
-            )
-            return
-        
-        if not user.skill_level:
-            await update.message.reply_text(
-                "❌ Please set your skill level first!\n\n"
-                "Use /setskill command to set your tennis level before joining games."
-            )
-            return
-        
-        game = self.game_service.get_game(game_id)
 
-        if not game:
-            await update.message.reply_text("❌ Game not found or has expired.")
-            return
-
-        if self.game_service.check_user_on_waitlist(game_id, user_id):
-            await update.message.reply_text("🙂 You're already on the waitlist for this game.")
-            return
-        
-        if user_id in game.player_ids:
-            await update.message.reply_text("👀 You're already in the game.")
-            return
-        
-        if len(game.player_ids) >= game.max_players:
-            await update.message.reply_text("😢 Sorry, the game is full.")
-            return
-        
-        success = self.game_service.join_waitlist(game_id, user_id)
-        
-        if success:
-            await update.message.reply_text(
-                "✅ <b>Added to waitlist!</b>\n\n"
-                "I'll notify you once the game host make a decision! 🎾",
-                parse_mode='HTML'
-            )
-
-            # Notify game host of new waitlist request
-            await self.notify_creator_of_waitlist_request(context, game, user)
-
-        else:
-            await update.message.reply_text(
-                "❌ Error occured: Could not join waitlist\n"
-            )
+        # modified: one transaction checks the user and game, joins and queues the host's digest entry
+        result = await self.services.game_service.try_join_waitlist(game_id, user_id)
+        reply = JOIN_REPLIES[result]
+        if result is JoinResult.SCHEDULE_CONFLICT:
+            game = self.services.game_service.get_game(game_id)
+            conflicts = self.services.game_service.get_schedule_conflicts(user_id, game) if game else []
+            reply += "\n" + self.conflict_lines(conflicts) + "\n\nLeave it from /mygames first if you'd rather play this one."
+        await update.message.reply_text(reply, parse_mode='HTML')
+
+    def conflict_lines(self, conflicts: list) -> str:
+        return "\n".join(
+            f"• {html.escape(game_name)}, {datetime.fromtimestamp(start_time):%a %d %b %H:%M}-{datetime.fromtimestamp(end_time):%H:%M}"
+            for _, game_name, start_time, end_time in conflicts
+        )
 
     async def get_waitlist_for_game(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_id = str(update.effective_user.id)
         game_id = re.search(r'waitlist_(\w+)', update.message.text).group(1)
 
         # Get the game to verify ownership
-        game = self.game_service.get_game(game_id)
+        game = self.services.game_service.get_game(game_id)
         
         if not game:
             await update.message.reply_text("❌ Game not found.")
@@ -81,7 +63,7 @@ class WaitlistHandler:
             return
 
         # Get waitlist entries
-        waitlist_entries = self.game_service.get_game_waitlist(game_id)
+        waitlist_entries = self.services.game_service.get_game_waitlist(game_id)
         
         if not waitlist_entries:
             await update.message.reply_text(
@@ -92,30 +74,38 @@ class WaitlistHandler:
             )
             return
 
-        # Format game time
-        game_time = self.format_start_end_time(game.start_time, game.end_time)
-        
-        text = f"📋 <b>Waitlist for {html.escape(game.game_name)}</b>\n\n"
-        text += f"📅 {game_time}\n"
-        text += f"📍 {html.escape(game.location)}\n"
-        text += f"👥 Current players: {game.current_players}/{game.max_players}\n\n"
-        text += f"<b>Players waiting to join ({len(waitlist_entries)}):</b>\n\n"
-
-        for i, entry in enumerate(waitlist_entries, 1):
-            # Format skill level display
-            skill_display = f"{entry.skill_level}" if entry.skill_level is not None else "Not set"
-            
-            # Create player info with profile link
-            text += f"{i}. <a href='tg://user?id={entry.user_id}'>{html.escape(entry.display_name)}</a>\n"
-            text += f"   👤 @{entry.username}\n" if entry.username else f"   👤 User ID: {entry.user_id}\n"
-            text += f"   ⭐ Skill Level: {skill_display}\n"
-            text += f"   📋 <b>View Profile:</b> /profile_{entry.user_id}\n"
-            text += f"   ✅ <b>Approve:</b> /approve_{entry.user_id}_{game_id}\n"
-            text += f"   ❌ <b>Reject:</b> /reject_{entry.user_id}_{game_id}\n\n"
-
-        text += f"💡 <i>Tip: Check players' profiles before approving to ensure they're a good fit for your game!</i>"
-
-        await update.message.reply_text(text, parse_mode='HTML')
+        card = self.services.render_service.get_card(game)
+        
+        header = (
+            f"📋 <b>Waitlist for {card.title}</b>\n\n"
+            f"📅 {card.time}\n"
+            f"📍 {card.location}\n"
+            f"👥 Current players: {game.current_players}/{game.max_players}\n\n"
+            f"<b>Players waiting to join ({len(waitlist_entries)}):</b>\n\n"
+        )
+        fragments = (self.waitlist_entry_fragment(i, entry, game_id) for i, entry in enumerate(waitlist_entries, 1))
+
+        await send_chunked(
+            update.message.reply_text, fragments,
+            header=header,
+            footer="💡 <i>Tip: Check players' profiles before approving to ensure they're a good fit for your game!</i>",
+            parse_mode='HTML'
+        )
+
+    def waitlist_entry_fragment(self, i: int, entry, game_id: str) -> str:
+        # Format skill level display
+        skill_display = f"{entry.skill_level}" if entry.skill_level is not None else "Not set"
+        username_line = f"   👤 @{entry.username}\n" if entry.username else f"   👤 User ID: {entry.user_id}\n"
+
+        # Create player info with profile link
+        return (
+            f"{i}. {user_link(entry.user_id, entry.display_name)}\n"
+            f"{username_line}"
+            f"   ⭐ Skill Level: {skill_display}\n"
+            f"   📋 <b>View Profile:</b> /profile_{entry.user_id}\n"
+            f"   ✅ <b>Approve:</b> /approve_{entry.user_id}_{game_id}\n"
+            f"   ❌ <b>Reject:</b> /reject_{entry.user_id}_{game_id}\n\n"
+        )
 
     async def approve_waitlist_player(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         creator_id = str(update.effective_user.id)
@@ -127,54 +117,73 @@ class WaitlistHandler:
             return
         
         user_id, game_id = match.groups()
+        reply = await self.approve(context, creator_id, game_id, user_id)
+        await update.message.reply_text(reply, parse_mode='HTML')
+
+    # added: approve_button method for the approve buttons in host digests
+    async def approve_button(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        _, game_id, user_id = query.data.split(":", 2)
 
+        reply = await self.approve(context, str(update.effective_user.id), game_id, user_id)
+        await query.answer()
+        await query.message.reply_text(reply, parse_mode='HTML')
+
+    async def approve(self, context: ContextTypes.DEFAULT_TYPE, creator_id: str, game_id: str, user_id: str) -> str:
+        """Approve a waitlisted player, notify them and return the reply for the host"""
         # Verify game exists and user is the creator
-        game = self.game_service.get_game(game_id)
+        game = self.services.game_service.get_game(game_id)
         if not game:
-            await update.message.reply_text("❌ Game not found.")
-            return
+            return "❌ Game not found."
 
         if game.creator_id != creator_id:
-            await update.message.reply_text("❌ You can only approve players for games you created.")
-            return
+            return "❌ You can only approve players for games you created."
 
         # Check if game is already full
         if game.current_players >= game.max_players:
-            await update.message.reply_text("❌ This game is already full!")
-            return
+            return "❌ This game is already full!"
+
+        # A player can't be in two games at once, they may have joined another since asking
+        conflicts = self.services.game_service.get_schedule_conflicts(user_id, game)
+        if conflicts:
+            return (
+                f"⚠️ <b>Not approved</b>\n\n"
+                f"This player is already playing at that time:\n{self.conflict_lines(conflicts)}\n\n"
+                f"They stay on the waitlist in case their plans change."
+            )
+
+        # Render before approving, the approval invalidates this game's card
+        card = self.services.render_service.get_card(game)
 
         # Approve the player
-        success = self.game_service.approve_waitlist_entry(game_id, user_id)
-        
-        if success:
-            # Get user info for notification
-            user = self.user_service.get_user(user_id)
-            game_time = self.format_start_end_time(game.start_time, game.end_time)
-            
-            await update.message.reply_text(
-                f"✅ <b>Player Approved!</b>\n\n"
-                f"<a href='tg://user?id={user_id}'>{html.escape(user.display_name)}</a> has been added to your game.\n\n"
-                f"🎾 {html.escape(game.game_name)}\n"
-                f"👥 Players: {game.current_players + 1}/{game.max_players}",
+        success = await self.services.game_service.approve_player(game_id, user_id)
+        if not success:
+            return "❌ Could not approve player. They may have already been processed, or the game filled up."
+
+        # Get user info for notification
+        user = self.services.user_service.get_user(user_id)
+
+        # Notify the approved player
+        if user:
+            await context.bot.send_message(
+                chat_id=user_id,
+                text=f"🎉 <b>You've been approved!</b>\n\n"
+                    f"You've been added to the game:\n"
+                    f"🎾 <b>{card.title}</b>\n"
+                    f"📅 {card.time}\n"
+                    f"📍 {card.location}\n"
+                    f"💰 Court Cost: ${game.court_cost}\n\n"
+                    f"Host: {card.host}\n\n"
+                    f"See you on the court! 🎾",
                 parse_mode='HTML'
             )
-            
-            # Notify the approved player
-            if user:
-                await context.bot.send_message(
-                    chat_id=user_id,
-                    text=f"🎉 <b>You've been approved!</b>\n\n"
-                        f"You've been added to the game:\n"
-                        f"🎾 <b>{html.escape(game.game_name)}</b>\n"
-                        f"📅 {game_time}\n"
-                        f"📍 {html.escape(game.location)}\n"
-                        f"💰 Court Cost: ${game.court_cost}\n\n"
-                        f"Host: <a href='tg://user?id={game.creator_id}'>Game Creator</a>\n\n"
-                        f"See you on the court! 🎾",
-                    parse_mode='HTML'
-                )
-        else:
-            await update.message.reply_text("❌ Could not approve player. They may have already been processed or an error occurred.")
+
+        return (
+            f"✅ <b>Player Approved!</b>\n\n"
+            f"{user_link(user_id, user.display_name if user else 'Player')} has been added to your game.\n\n"
+            f"🎾 {card.title}\n"
+            f"👥 Players: {game.current_players + 1}/{game.max_players}"
+        )
 
     async def reject_waitlist_player(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         creator_id = str(update.effective_user.id)
@@ -188,7 +197,7 @@ class WaitlistHandler:
         user_id, game_id = match.groups()
 
         # Verify game exists and user is the creator
-        game = self.game_service.get_game(game_id)
+        game = self.services.game_service.get_game(game_id)
         if not game:
             await update.message.reply_text("❌ Game not found.")
             return
@@ -198,11 +207,11 @@ class WaitlistHandler:
             return
 
         # Reject the player
-        success = self.game_service.reject_waitlist_entry(game_id, user_id)
+        success = await self.services.game_service.reject_player(game_id, user_id)
         
         if success:
             # Get user info
-            user = self.user_service.get_user(user_id)
+            user = self.services.user_service.get_user(user_id)
             
             await update.message.reply_text(
                 f"❌ <b>Player Rejected</b>\n\n"
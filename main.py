@@ -1,40 +1,117 @@
+import time
+# Taken before anything else is imported, for the startup timing report
+STARTED = time.perf_counter()
+
+import asyncio
 import logging
-from telegram.ext import Application, CommandHandler, MessageHandler, filters
+import signal
+from typing import List, Optional, Tuple
+from telegram import Update
+from telegram.request import BaseRequest, HTTPXRequest
+from telegram.ext import Application, CallbackQueryHandler, CommandHandler, ContextTypes, InlineQueryHandler, MessageHandler, TypeHandler, filters
 from handlers.user_handler import UserHandler
 from handlers.game_handler import GameHandler
 from handlers.waitlist_handler import WaitlistHandler
-from services.notification_service import NotificationService
-from datetime import datetime as dt
-from dotenv import load_dotenv
+from handlers.search_handler import SearchHandler
+from handlers.admin_handler import AdminHandler
+from handlers.series_handler import SeriesHandler
+from handlers.inline_handler import InlineHandler
+from services.container import ServiceContainer
+from services.notification_service import REMINDER_INTERVAL
+from services.saved_search_service import DIGEST_INTERVAL
+from services.dedup_service import PRUNE_INTERVAL
+from services.series_service import MATERIALIZE_INTERVAL
+from services.open_games_service import CONSISTENCY_CHECK_INTERVAL
+from services.host_digest_service import HOST_DIGEST_CHECK_INTERVAL, APPROVE_CALLBACK
+from services.logging_service import bind_update, configure_logging, with_handler_name, DEBUG_SAMPLE_EVERY
+from database.backup import BackupManager
+from database.db_manager import DEFAULT_DB_PATH
+from database.persistence import SQLitePersistence
+from database.writer import close_writers
 import os
 
-# Load .env variables
-load_dotenv()
+# Load .env variables. python-dotenv takes tens of milliseconds to import, so only when there is a file to load.
+if os.path.exists(".env") or os.path.exists(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")):
+    from dotenv import load_dotenv
+    load_dotenv()
+
+IMPORTED = time.perf_counter()
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 
-# Enable logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+# Several bots in one process, "city=token,city=token", each with its own database in DATA_DIR
+BOT_TOKENS = os.getenv("BOT_TOKENS", "")
+DATA_DIR = os.getenv("DATA_DIR", ".")
+
+# Bot API connections shared by every bot, long polls get one connection per bot on top
+SHARED_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "64"))
+
+ALLOWED_UPDATES = ["message", "callback_query", "inline_query"]
+
+# Updates handled at once per bot. Handlers await their writes, so writes from updates
+# in flight together share a group commit instead of committing one by one.
+CONCURRENT_UPDATES = int(os.getenv("CONCURRENT_UPDATES", "32"))
+
 logger = logging.getLogger(__name__)
 
 class Voro:
-    def __init__(self, token: str):
+    def __init__(self, token: str, db_path: str = DEFAULT_DB_PATH,
+                 request: Optional[BaseRequest] = None, get_updates_request: Optional[BaseRequest] = None):
+        started = time.perf_counter()
         self.token = token
-        self.app = Application.builder().token(token).build()
-        
+        self.db_path = db_path
+
+        # modified: services are created on first use, only the schema check happens now
+        self.services = ServiceContainer(db_path)
+        self.services.open_database()
+        db_ready = time.perf_counter()
+
+        # user_data, chat_data and conversations are kept in the same database across restarts
+        builder = Application.builder().token(token).persistence(SQLitePersistence(db_path))
+        builder = builder.concurrent_updates(CONCURRENT_UPDATES)
+        # Bots hosted together pass the same request objects, so they share one HTTP connection pool
+        if request:
+            builder = builder.request(request)
+        if get_updates_request:
+            builder = builder.get_updates_request(get_updates_request)
+        self.app = builder.build()
+        built = time.perf_counter()
+
         # Initialize handlers
-        self.user_handler = UserHandler()
-        self.game_handler = GameHandler()
-        self.waitlist_handler = WaitlistHandler()
-        self.notification_service = NotificationService()
+        self.user_handler = UserHandler(self.services)
+        self.game_handler = GameHandler(self.services)
+        self.waitlist_handler = WaitlistHandler(self.services)
+        self.search_handler = SearchHandler(self.services)
+        self.admin_handler = AdminHandler(self.services)
+        self.series_handler = SeriesHandler(self.services)
+        self.inline_handler = InlineHandler(self.services)
+        self.backup_manager = BackupManager(
+            db_path,
+            backup_dir=os.getenv("BACKUP_DIR", "backups"),
+            keep=int(os.getenv("BACKUP_KEEP", "14"))
+        )
         
         self.setup_handlers()
+        finished = time.perf_counter()
+
+        self.startup_timings = {
+            "import_ms": round((IMPORTED - STARTED) * 1000, 1),
+            "db_init_ms": round((db_ready - started) * 1000, 1),
+            "application_ms": round((built - db_ready) * 1000, 1),
+            "handlers_ms": round((finished - built) * 1000, 1),
+            "total_ms": round((finished - STARTED) * 1000, 1),
+        }
+        logger.info("Startup timing", extra={"db_path": db_path, **self.startup_timings})
     
     def setup_handlers(self):
         """Setup command and callback handlers"""
+
+        # Tags log records with the update being handled
+        self.app.add_handler(TypeHandler(Update, bind_update), group=-3)
+        # Runs before every other group and stops redelivered updates there
+        self.app.add_handler(TypeHandler(Update, self.services.deferred("deduplicator", "check")), group=-2)
+        # Then per-user flood control, over-budget updates never reach the handlers below
+        self.app.add_handler(TypeHandler(Update, self.services.flood_control.check), group=-1)
         
         # Command handlers
         self.app.add_handler(CommandHandler("start", self.user_handler.start))
@@ -43,9 +120,19 @@ class Voro:
         self.app.add_handler(CommandHandler("setbio", self.user_handler.setbio))
         self.app.add_handler(CommandHandler("deleteprofile", self.user_handler.deleteprofile))
         self.app.add_handler(CommandHandler("profile", self.user_handler.profile))
+        self.app.add_handler(CommandHandler("alerts", self.user_handler.alerts))
         self.app.add_handler(CommandHandler("find", self.game_handler.find_games))
         self.app.add_handler(CommandHandler("create", self.game_handler.create_game))
         self.app.add_handler(CommandHandler("mygames", self.game_handler.my_games))
+        self.app.add_handler(CommandHandler("watch", self.search_handler.watch))
+        self.app.add_handler(CommandHandler("unwatch", self.search_handler.unwatch))
+        self.app.add_handler(CommandHandler("series", self.series_handler.list_series))
+
+        # Admin commands, restricted to ADMIN_IDS
+        self.app.add_handler(CommandHandler("export", self.admin_handler.export))
+        self.app.add_handler(CommandHandler("stats", self.admin_handler.stats))
+        self.app.add_handler(CommandHandler("throttles", self.admin_handler.throttles))
+        self.app.add_handler(CommandHandler("dbwrites", self.admin_handler.dbwrites))
 
          # Pattern-based handlers for dynamic commands (these need MessageHandler with regex)
         # Game-related pattern handlers
@@ -54,11 +141,37 @@ class Voro:
             self.game_handler.cancel_game
         ))
         
+        self.app.add_handler(MessageHandler(
+            filters.Regex(r'^/linkgroup_[a-zA-Z0-9]+(@\w+)?$'), 
+            self.game_handler.link_group
+        ))
+
         self.app.add_handler(MessageHandler(
             filters.Regex(r'^/leave_\w+$'), 
             self.game_handler.leave_game
         ))
         
+        self.app.add_handler(MessageHandler(
+            filters.Regex(r'^/autofill_\w+$'), 
+            self.game_handler.toggle_auto_fill
+        ))
+
+        self.app.add_handler(MessageHandler(
+            filters.Regex(r'^/capacity_[a-zA-Z0-9]+_\d+$'), 
+            self.game_handler.change_capacity
+        ))
+        
+        # Series pattern handlers, edits carry "Field: value" lines after the command
+        self.app.add_handler(MessageHandler(
+            filters.Regex(r'^/cancelseries_\w+$'), 
+            self.series_handler.cancel_series
+        ))
+
+        self.app.add_handler(MessageHandler(
+            filters.Regex(r'^/editseries_\w+(\n|$)'), 
+            self.series_handler.edit_series
+        ))
+        
         # Waitlist-related pattern handlers
         self.app.add_handler(MessageHandler(
             filters.Regex(r'^/waitlist_\w+$'), 
@@ -75,26 +188,152 @@ class Voro:
             self.waitlist_handler.reject_waitlist_player
         ))
 
+        # Inline mode, game search from any chat
+        self.app.add_handler(InlineQueryHandler(self.inline_handler.inline_query))
+
+        # Approve buttons in host digests
+        self.app.add_handler(CallbackQueryHandler(
+            self.waitlist_handler.approve_button,
+            pattern=rf'^{APPROVE_CALLBACK}:'
+        ))
+
         # Profile viewing pattern handler
         self.app.add_handler(MessageHandler(
             filters.Regex(r'^/profile_\w+$'), 
             self.user_handler.view_user_profile  # You'll need this method
         ))
         
-        # Job queue for reminders (runs daily at 10 AM)
+        # Job queue for reminders, hourly so every game is reminded about 24 hours ahead
         job_queue = self.app.job_queue
-        job_queue.run_daily(
-            self.notification_service.send_game_reminders,
-            time=dt.strptime("10:00", "%H:%M").time(),
-            name="daily_reminders"
+        job_queue.run_repeating(
+            self.services.deferred("notification_service", "send_game_reminders"),
+            interval=REMINDER_INTERVAL,
+            first=10,
+            name="game_reminders"
+        )
+
+        # Saved search matches are batched into one digest per user
+        job_queue.run_repeating(
+            self.services.deferred("saved_search_service", "send_digests"),
+            interval=DIGEST_INTERVAL,
+            name="saved_search_digests"
+        )
+
+        # Recurring series create their games a rolling horizon ahead
+        job_queue.run_repeating(
+            self.services.deferred("series_service", "run_materializer"),
+            interval=MATERIALIZE_INTERVAL,
+            first=30,
+            name="materialize_series"
+        )
+
+        # Waitlist requests are batched into one digest per host
+        job_queue.run_repeating(
+            self.services.deferred("host_digests", "flush"),
+            interval=HOST_DIGEST_CHECK_INTERVAL,
+            name="host_digests"
+        )
+
+        # The in-memory open game index is compared with the database now and then
+        job_queue.run_repeating(
+            self.check_open_games,
+            interval=CONSISTENCY_CHECK_INTERVAL,
+            first=CONSISTENCY_CHECK_INTERVAL,
+            name="open_games_consistency_check"
         )
+
+        job_queue.run_repeating(
+            self.services.deferred("deduplicator", "prune"),
+            interval=PRUNE_INTERVAL,
+            name="prune_idempotency_records"
+        )
+
+        # Rotating hot backups, every BACKUP_INTERVAL_HOURS
+        job_queue.run_repeating(
+            self.backup_manager.run_backup,
+            interval=float(os.getenv("BACKUP_INTERVAL_HOURS", "6")) * 3600,
+            first=60,
+            name="database_backup"
+        )
+
+        # Log records name the handler or job they came from
+        for group, handlers in self.app.handlers.items():
+            for handler in handlers:
+                if handler.callback is not bind_update:
+                    handler.callback = with_handler_name(handler.callback)
+        for job in job_queue.jobs():
+            job.callback = with_handler_name(job.callback, job.name)
     
+    async def check_open_games(self, context: ContextTypes.DEFAULT_TYPE):
+        """Job callback, the check itself needs nothing from the job context"""
+        await self.services.game_service.run_consistency_check()
+
     def run(self):
         """Start the bot"""
         logger.info("Starting Voro...")
-        self.app.run_polling(allowed_updates=["message", "callback_query"])
+        self.app.run_polling(allowed_updates=ALLOWED_UPDATES)
+
+
+def load_tenants() -> List[Tuple[str, str, str]]:
+    """(name, token, db_path) for each bot in BOT_TOKENS, or the single BOT_TOKEN bot on voro.db"""
+    if not BOT_TOKENS.strip():
+        return [("voro", BOT_TOKEN, DEFAULT_DB_PATH)]
+    tenants = []
+    for entry in BOT_TOKENS.split(","):
+        name, _, token = entry.strip().partition("=")
+        if not name or not token:
+            raise ValueError(f"BOT_TOKENS entries look like city=token, got {entry!r}")
+        tenants.append((name, token, os.path.join(DATA_DIR, f"voro-{name}.db")))
+    return tenants
+
+
+async def run_bots(bots: List[Voro]):
+    """Poll every bot on the one event loop until SIGINT or SIGTERM"""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    started = []
+    try:
+        for bot in bots:
+            await bot.app.initialize()
+            await bot.app.start()
+            await bot.app.updater.start_polling(allowed_updates=ALLOWED_UPDATES)
+            started.append(bot)
+            logger.info("Started bot", extra={"bot": bot.app.bot.username, "db_path": bot.db_path})
+        await stop.wait()
+    finally:
+        for bot in started:
+            await bot.app.updater.stop()
+            await bot.app.stop()
+        # Shutting a bot down closes the shared pools, so only once every bot has stopped
+        for bot in bots:
+            await bot.app.shutdown()
+
+
+def main():
+    # JSON logs, formatted and written on a background thread
+    log_listener = configure_logging(
+        level=getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper()),
+        sample_every=int(os.getenv("LOG_DEBUG_SAMPLE", str(DEBUG_SAMPLE_EVERY)))
+    )
+    try:
+        tenants = load_tenants()
+        if len(tenants) == 1:
+            _, token, db_path = tenants[0]
+            Voro(token, db_path).run()
+        else:
+            request = HTTPXRequest(connection_pool_size=SHARED_POOL_SIZE)
+            get_updates_request = HTTPXRequest(connection_pool_size=len(tenants))
+            bots = [Voro(token, db_path, request, get_updates_request) for _, token, db_path in tenants]
+            logger.info("Starting Voro...", extra={"bots": [name for name, _, _ in tenants]})
+            asyncio.run(run_bots(bots))
+    finally:
+        # Queued writes commit before the log listener goes, so their failures are still logged
+        close_writers()
+        log_listener.stop()
 
 
 if __name__ == "__main__":
-    bot = Voro(BOT_TOKEN)
-    bot.run()
\ No newline at end of file
+    main()
\ No newline at end of file
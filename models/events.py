@@ -0,0 +1,58 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from models.game import Game
+
+
+@dataclass(frozen=True, slots=True)
+class GameEvent:
+    game_id: str
+
+
+@dataclass(frozen=True, slots=True)
+class GameChanged(GameEvent):
+    """A game was written. game is its state after the commit, None if it no longer exists"""
+    game: Optional[Game]
+
+
+@dataclass(frozen=True, slots=True)
+class GameCreated(GameChanged):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class GameUpdated(GameChanged):
+    """Settings changed: auto-fill, capacity, linked group or series template"""
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class PlayerApproved(GameChanged):
+    user_id: str
+
+
+@dataclass(frozen=True, slots=True)
+class PlayerLeft(GameChanged):
+    user_id: str
+    promoted_id: Optional[str] = None  # waitlisted player auto-filled into the seat
+
+
+@dataclass(frozen=True, slots=True)
+class GameCancelled(GameEvent):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class UserEvent:
+    user_id: str
+
+
+@dataclass(frozen=True, slots=True)
+class UserUpdated(UserEvent):
+    """Profile fields changed: name, username, skill level or bio"""
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class UserDeleted(UserEvent):
+    pass
@@ -1,8 +1,60 @@
 from dataclasses import dataclass, field
 from datetime import datetime as dt
-from typing import Optional
+from typing import Callable, Dict, Iterable, List, Optional
 
-@dataclass
+# Column order of a game row, Game.from_row and GameSummary.from_row rely on it
+GAME_COLUMNS = (
+    "game_id", "game_name", "creator_id", "location", "start_time", "end_time",
+    "court_cost", "min_skill", "max_skill", "max_players", "current_players",
+    "status", "telegram_group_id", "created_at", "game_description", "auto_fill", "series_id",
+)
+
+# A summary is the leading columns of a game row, enough to list a game and show its capacity
+SUMMARY_COLUMNS = GAME_COLUMNS[:12]
+
+
+def select_columns(columns: Iterable[str], alias: str = "") -> str:
+    prefix = f"{alias}." if alias else ""
+    return ", ".join(prefix + column for column in columns)
+
+
+class PlayerBatch:
+    """Loads player IDs for every game of one query the first time any of them is asked for"""
+    __slots__ = ("load", "games")
+
+    def __init__(self, load: Callable[[List[str]], Dict[str, List[str]]]):
+        self.load = load
+        self.games: List["Game"] = []
+
+    def fill(self):
+        players = self.load([game.game_id for game in self.games])
+        games, self.games = self.games, []
+        for game in games:
+            game._player_ids = players.get(game.game_id, [])
+            game._batch = None
+
+
+@dataclass(slots=True)
+class GameSummary:
+    game_id: str
+    game_name: str
+    creator_id: str
+    location: str
+    start_time: int
+    end_time: int
+    court_cost: float
+    min_skill: float
+    max_skill: float
+    max_players: int
+    current_players: int
+    status: str
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "GameSummary":
+        return cls(*row)
+
+
+@dataclass(slots=True)
 class Game:
     game_id: str
     game_name: str
@@ -19,4 +71,39 @@ class Game:
     telegram_group_id: str
     created_at: int
     game_description: str
-    player_ids: list[str] = field(default_factory=list)
\ No newline at end of file
+    auto_fill: bool = False  # promote from the waitlist when a seat opens
+    series_id: Optional[str] = None  # the recurring series this game was created from
+    # modified: player_ids is a property, loaded through _batch on first access
+    _player_ids: Optional[List[str]] = field(default=None, init=False, repr=False, compare=False)
+    _batch: Optional[PlayerBatch] = field(default=None, init=False, repr=False, compare=False)
+
+    @classmethod
+    def from_row(cls, row: tuple, batch: Optional[PlayerBatch] = None) -> "Game":
+        game = cls(*row)
+        if batch is not None:
+            game._batch = batch
+            batch.games.append(game)
+        return game
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple], load_players: Callable[[List[str]], Dict[str, List[str]]]) -> List["Game"]:
+        """Games sharing one PlayerBatch, so listing N games costs at most one player query"""
+        batch = PlayerBatch(load_players)
+        return [cls.from_row(row, batch) for row in rows]
+
+    @property
+    def player_ids(self) -> List[str]:
+        # Loaded on first read, from the database as it is then. A Game kept across a write
+        # that removes its players (cancel, leave) must read them first, or come back from
+        # the write with them loaded, as cancel_game and cancel_series do.
+        if self._player_ids is None:
+            if self._batch is None:
+                self._player_ids = []
+            else:
+                self._batch.fill()
+        return self._player_ids
+
+    @player_ids.setter
+    def player_ids(self, player_ids: List[str]):
+        self._player_ids = list(player_ids)
+        self._batch = None
@@ -0,0 +1,35 @@
+from dataclasses import dataclass
+from datetime import datetime as dt, timedelta
+from typing import Iterator
+
+@dataclass
+class GameSeries:
+    series_id: str
+    creator_id: str
+    game_name: str
+    game_description: str
+    location: str
+    first_start: int            # start of the first game
+    duration: int               # seconds from start to end
+    interval_weeks: int         # recurrence rule, one game every interval_weeks weeks
+    court_cost: float
+    min_skill: float
+    max_skill: float
+    max_players: int
+    status: str = 'active'      # 'active', 'cancelled'
+    materialized_until: int = 0 # start time of the latest game created from the series
+    created_at: int = 0
+
+    def occurrences(self, after: int, until: int) -> Iterator[int]:
+        """Start times in (after, until]. Steps are in local wall-clock time, so games keep their hour across DST changes."""
+        first = dt.fromtimestamp(self.first_start)
+        step = timedelta(weeks=self.interval_weeks)
+        # Skip straight to the occurrence before `after`
+        k = max(0, (after - self.first_start) // int(step.total_seconds()) - 1)
+        while True:
+            start = int((first + k * step).timestamp())
+            if start > until:
+                return
+            if start > after:
+                yield start
+            k += 1
@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+
+# days is a bitmask, bit 0 is Monday and bit 6 is Sunday
+ALL_DAYS = 0b1111111
+
+@dataclass
+class MatchSubscription:
+    user_id: str
+    skill_level: float
+    days: int = ALL_DAYS
+    start_hour: int = 0     # preferred start window, [start_hour, end_hour)
+    end_hour: int = 24
+    created_at: int = 0
+
+    def accepts_day(self, weekday: int) -> bool:
+        return bool(self.days & (1 << weekday))
+
+    @property
+    def any_time(self) -> bool:
+        return self.start_hour == 0 and self.end_hour == 24
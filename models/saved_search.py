@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from models.match_subscription import ALL_DAYS
+
+@dataclass
+class SavedSearch:
+    search_id: Optional[int]
+    user_id: str
+    query: str                  # what the user typed, shown back in /watch
+    days: int = ALL_DAYS        # weekday bitmask, bit 0 is Monday
+    start_hour: int = 0         # start time window, [start_hour, end_hour)
+    end_hour: int = 24
+    location: str = ""          # lowercase location tokens separated by spaces
+    max_cost: Optional[float] = None
+    created_at: int = 0
@@ -0,0 +1,47 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Upper edges in minutes of the time-to-full histogram buckets, the last bucket is open ended
+FILL_TIME_BUCKETS = [5, 15, 30, 60, 120, 240, 480, 720, 1440, 2880, 4320, 10080]
+
+
+def fill_time_bucket(seconds: int) -> int:
+    minutes = seconds / 60
+    for i, edge in enumerate(FILL_TIME_BUCKETS):
+        if minutes <= edge:
+            return i
+    return len(FILL_TIME_BUCKETS)
+
+
+@dataclass
+class StatsSummary:
+    days: int
+    games_created: int = 0
+    games_filled: int = 0
+    games_cancelled: int = 0
+    players_joined: int = 0
+    players_left: int = 0
+    active_players: int = 0
+    fill_time_histogram: Dict[int, int] = field(default_factory=dict)   # bucket -> games
+    top_venues: List[Tuple[str, int]] = field(default_factory=list)     # (venue, games)
+
+    @property
+    def fill_rate(self) -> Optional[float]:
+        return self.games_filled / self.games_created if self.games_created else None
+
+    @property
+    def cancellation_rate(self) -> Optional[float]:
+        return self.games_cancelled / self.games_created if self.games_created else None
+
+    @property
+    def median_fill_minutes(self) -> Optional[int]:
+        """Upper edge of the bucket holding the median, None for the open ended bucket or no data"""
+        total = sum(self.fill_time_histogram.values())
+        if not total:
+            return None
+        seen = 0
+        for bucket in sorted(self.fill_time_histogram):
+            seen += self.fill_time_histogram[bucket]
+            if seen * 2 >= total:
+                return FILL_TIME_BUCKETS[bucket] if bucket < len(FILL_TIME_BUCKETS) else None
+        return None
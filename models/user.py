@@ -3,7 +3,7 @@ from datetime import datetime as dt
 from typing import Optional
 
 # modified: User model - skill_level is now a float
-@dataclass
+@dataclass(slots=True)
 class User:
     telegram_id: str
     username: str
@@ -11,4 +11,8 @@ class User:
     created_at: int
     skill_level: Optional[float] = None
     bio: Optional[str] = None
-    games_completed: int = 0
\ No newline at end of file
+    games_completed: int = 0
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "User":
+        return cls(*row)
\ No newline at end of file
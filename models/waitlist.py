@@ -1,8 +1,9 @@
 from dataclasses import dataclass
 from datetime import datetime as dt
+from enum import Enum
 from typing import Optional
 
-@dataclass
+@dataclass(slots=True)
 class WaitlistEntry:
     waitlist_id: Optional[int]  # Changed from 'id' to match database column
     game_id: str              # Changed from int to str to match database
@@ -13,4 +14,20 @@ class WaitlistEntry:
     # Additional fields that appear to be used in get_waitlist_for_game method
     username: Optional[str] = None
     display_name: Optional[str] = None  
-    skill_level: Optional[float] = None
\ No newline at end of file
+    skill_level: Optional[float] = None
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "WaitlistEntry":
+        return cls(*row)
+
+
+class JoinResult(Enum):
+    """Outcome of a waitlist join request"""
+    JOINED = 'joined'
+    NO_ACCOUNT = 'no_account'
+    NO_SKILL = 'no_skill'
+    GAME_NOT_FOUND = 'game_not_found'
+    ALREADY_IN_GAME = 'already_in_game'
+    ALREADY_REQUESTED = 'already_requested'
+    GAME_FULL = 'game_full'
+    SCHEDULE_CONFLICT = 'schedule_conflict'
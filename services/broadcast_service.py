@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable
+
+from telegram import Bot
+from telegram.error import Forbidden, RetryAfter, TelegramError
+
+logger = logging.getLogger(__name__)
+
+# Telegram allows roughly 30 messages per second per bot across all chats
+DEFAULT_RATE = 25.0
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available, without waiting"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    @property
+    def full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+    async def acquire(self):
+        async with self.lock:
+            while not self.try_acquire():
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Broadcaster:
+    """Sends one message to many chats without tripping Telegram's flood limits"""
+
+    def __init__(self, rate: float = DEFAULT_RATE):
+        self.rate = rate
+        # One budget per bot token, Telegram limits each bot separately
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def _bucket(self, bot: Bot) -> TokenBucket:
+        bucket = self._buckets.get(bot.token)
+        if bucket is None:
+            bucket = self._buckets[bot.token] = TokenBucket(self.rate, self.rate)
+        return bucket
+
+    async def send(self, bot: Bot, chat_id, text: str, **kwargs) -> bool:
+        bucket = self._bucket(bot)
+        for _ in range(2):
+            await bucket.acquire()
+            try:
+                await bot.send_message(chat_id=chat_id, text=text, **kwargs)
+                return True
+            except RetryAfter as e:
+                retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else e.retry_after
+                await asyncio.sleep(retry_after)
+            except Forbidden:
+                # User blocked the bot or never started it
+                return False
+            except TelegramError as e:
+                logger.warning("Failed to send message: %s", e, extra={"to_chat_id": chat_id})
+                return False
+        return False
+
+    async def send_many(self, bot: Bot, chat_ids: Iterable, text: str, **kwargs) -> int:
+        """Send the same message to each chat, returns how many were delivered"""
+        delivered = 0
+        for chat_id in chat_ids:
+            if await self.send(bot, chat_id, text, **kwargs):
+                delivered += 1
+        return delivered
+
+
+broadcaster = Broadcaster()
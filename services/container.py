@@ -0,0 +1,85 @@
+from functools import cached_property
+
+from database.db_manager import DEFAULT_DB_PATH, DatabaseManager
+from services.dedup_service import UpdateDeduplicator
+from services.game_service import GameService
+from services.host_digest_service import HostDigestService
+from services.inline_search_service import GameSearchIndex, get_game_search_index
+from services.match_service import MatchService
+from services.notification_service import NotificationService
+from services.render_service import RenderService
+from services.saved_search_service import SavedSearchService
+from services.series_service import SeriesService
+from services.throttle_service import FloodControl
+from services.user_service import UserService
+
+
+class ServiceContainer:
+    """One bot's services, each created on first use and then shared by every handler.
+
+    Building a service can load an in-memory index from the database, so
+    nothing is built at startup except the database itself. Handlers and
+    jobs reach their services through the container when they run.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+
+    @cached_property
+    def db(self) -> DatabaseManager:
+        return DatabaseManager(self.db_path)
+
+    def open_database(self) -> DatabaseManager:
+        """Creates the database manager now, so the schema check and any upgrade run before polling starts"""
+        return self.db
+
+    @cached_property
+    def game_service(self) -> GameService:
+        return GameService(self.db_path)
+
+    @cached_property
+    def user_service(self) -> UserService:
+        return UserService(self.db_path)
+
+    @cached_property
+    def render_service(self) -> RenderService:
+        return RenderService(self.db_path)
+
+    @cached_property
+    def match_service(self) -> MatchService:
+        return MatchService(self.db_path)
+
+    @cached_property
+    def series_service(self) -> SeriesService:
+        return SeriesService(self.db_path)
+
+    @cached_property
+    def saved_search_service(self) -> SavedSearchService:
+        return SavedSearchService(self.db_path)
+
+    @cached_property
+    def host_digests(self) -> HostDigestService:
+        return HostDigestService(db_path=self.db_path)
+
+    @cached_property
+    def notification_service(self) -> NotificationService:
+        return NotificationService(self.db_path)
+
+    @cached_property
+    def deduplicator(self) -> UpdateDeduplicator:
+        return UpdateDeduplicator(db_path=self.db_path)
+
+    @cached_property
+    def flood_control(self) -> FloodControl:
+        return FloodControl()
+
+    @property
+    def game_search_index(self) -> GameSearchIndex:
+        return get_game_search_index(self.db)
+
+    def deferred(self, service: str, method: str):
+        """An async callback that creates the service on its first call, for handlers and jobs registered at startup"""
+        async def callback(*args):
+            return await getattr(getattr(self, service), method)(*args)
+        callback.__qualname__ = f"{service}.{method}"
+        return callback
@@ -0,0 +1,68 @@
+import logging
+import time
+from collections import OrderedDict
+
+from telegram import Update
+from telegram.ext import ApplicationHandlerStop, ContextTypes
+
+from database.db_manager import DEFAULT_DB_PATH, DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# How long processed update IDs and idempotency keys are remembered
+DEDUP_TTL = 24 * 60 * 60
+MAX_REMEMBERED_UPDATES = 50_000
+
+# Seconds between prunes of the persisted records
+PRUNE_INTERVAL = 60 * 60
+
+
+class UpdateDeduplicator:
+    """Drops updates Telegram delivers more than once.
+
+    Registered as a TypeHandler in a group ahead of every other handler.
+    Seen update IDs live in an insertion ordered dict, so the check is one
+    dict lookup and eviction pops from the oldest end. They are also queued
+    to processed_updates, without waiting, and loaded back on startup, so a
+    restart does not forget updates it already handled. Only one process
+    polls a bot's updates, so memory is the only place that needs checking.
+
+    Inline queries are left alone, answering one twice does no harm and a
+    record per keystroke would be most of the writes.
+    """
+
+    def __init__(self, ttl: int = DEDUP_TTL, max_size: int = MAX_REMEMBERED_UPDATES, db_path: str = DEFAULT_DB_PATH):
+        self.db = DatabaseManager(db_path)
+        self.ttl = ttl
+        self.max_size = max_size
+        self.duplicates = 0
+        now = int(time.time())
+        self._seen: OrderedDict = OrderedDict(self.db.get_processed_updates(now - ttl, max_size))
+
+    def _evict(self, now: int):
+        while self._seen and (len(self._seen) > self.max_size or next(iter(self._seen.values())) < now - self.ttl):
+            self._seen.popitem(last=False)
+
+    def seen(self, update_id: int) -> bool:
+        """Record an update ID, returning True if it was already processed"""
+        if update_id in self._seen:
+            return True
+        now = int(time.time())
+        self._seen[update_id] = now
+        self._evict(now)
+        self.db.record_update(update_id, now)
+        return False
+
+    async def check(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if update.inline_query:
+            return
+        if self.seen(update.update_id):
+            self.duplicates += 1
+            raise ApplicationHandlerStop
+
+    async def prune(self, context: ContextTypes.DEFAULT_TYPE):
+        """Scheduled job, forgets records older than the TTL"""
+        try:
+            self.db.prune_idempotency_records(int(time.time()) - self.ttl)
+        except Exception as e:
+            logger.exception("Error pruning idempotency records")
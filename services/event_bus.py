@@ -0,0 +1,121 @@
+import asyncio
+import inspect
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Events an async subscriber may fall behind by before the oldest are dropped
+DEFAULT_QUEUE_SIZE = 1000
+
+EventTypes = Union[type, Tuple[type, ...]]
+
+
+class AsyncSubscriber:
+    """A bounded queue drained by its own task.
+
+    Publishing never waits. When the subscriber is maxsize events behind,
+    the oldest queued event is dropped and counted, so a slow subscriber
+    only ever slows itself down.
+    """
+
+    def __init__(self, name: str, handler: Callable, maxsize: int):
+        self.name = name
+        self.handler = handler
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.task: Optional[asyncio.Task] = None
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def offer(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.dropped += 1
+            logger.warning("Event subscriber is behind, dropped the oldest event", extra={"subscriber": self.name, "dropped": self.dropped})
+        self.queue.put_nowait(event)
+        self._start()
+
+    def _start(self):
+        if self.task and not self.task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop yet, events wait in the queue until the next publish inside one
+        self.task = loop.create_task(self._run(), name=f"event-subscriber-{self.name}")
+
+    async def _run(self):
+        while True:
+            event = await self.queue.get()
+            try:
+                result = self.handler(event)
+                if inspect.isawaitable(result):
+                    await result
+                self.delivered += 1
+            except Exception as e:
+                self.failed += 1
+                logger.exception("Error in event subscriber", extra={"subscriber": self.name, "event": type(event).__name__})
+            finally:
+                self.queue.task_done()
+
+
+class EventBus:
+    """Typed in-process events, published by the services after a write commits.
+
+    Sync subscribers run inside publish and must be quick, they keep
+    in-memory indexes and caches in step with the database. Slower work
+    goes to async subscribers, which each get a bounded queue and a task.
+    Subscribing to a base class such as GameEvent receives its subclasses too.
+    """
+
+    def __init__(self):
+        self._sync: Dict[type, List[Callable]] = defaultdict(list)
+        self._async: Dict[type, List[AsyncSubscriber]] = defaultdict(list)
+        self.subscribers: List[AsyncSubscriber] = []
+
+    def subscribe(self, event_types: EventTypes, handler: Callable):
+        for event_type in _as_tuple(event_types):
+            self._sync[event_type].append(handler)
+
+    def subscribe_async(self, event_types: EventTypes, handler: Callable, name: str,
+                        maxsize: int = DEFAULT_QUEUE_SIZE) -> AsyncSubscriber:
+        subscriber = AsyncSubscriber(name, handler, maxsize)
+        self.subscribers.append(subscriber)
+        for event_type in _as_tuple(event_types):
+            self._async[event_type].append(subscriber)
+        return subscriber
+
+    def publish(self, event):
+        logger.debug("Published %s", type(event).__name__)
+        for event_type in type(event).__mro__:
+            for handler in self._sync.get(event_type, ()):
+                try:
+                    handler(event)
+                except Exception as e:
+                    logger.exception("Error in event handler", extra={"event": type(event).__name__})
+            for subscriber in self._async.get(event_type, ()):
+                subscriber.offer(event)
+
+    async def join(self):
+        """Wait until every async subscriber has handled the events queued so far"""
+        for subscriber in self.subscribers:
+            subscriber._start()
+            await subscriber.queue.join()
+
+
+def _as_tuple(event_types: EventTypes) -> Tuple[type, ...]:
+    return event_types if isinstance(event_types, tuple) else (event_types,)
+
+
+# One bus per database, like the caches and indexes that subscribe to it
+_buses: Dict[str, EventBus] = {}
+
+
+def get_event_bus(db_path: str) -> EventBus:
+    bus = _buses.get(db_path)
+    if bus is None:
+        bus = _buses[db_path] = EventBus()
+    return bus
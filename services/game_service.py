@@ -1,19 +1,36 @@
-from database.db_manager import DatabaseManager
+import logging
+from database.db_manager import DEFAULT_DB_PATH, DatabaseManager
 from models.game import Game
-from typing import List
+from models.waitlist import JoinResult
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
 from uuid import uuid4
+from models.events import GameCancelled, GameCreated, GameUpdated, PlayerApproved, PlayerLeft
+from services.subscribers import wired_event_bus
+from services.open_games_service import get_open_game_index
+
+logger = logging.getLogger(__name__)
+
+# /mygames lists the gaps between a player's games over this many days
+FREE_SLOT_DAYS = 7
+
+# Hours of the day counted as playable when looking for free slots, [start, end)
+PLAYING_HOURS = (7, 22)
 
 class GameService:
-    def __init__(self):
-        self.db = DatabaseManager()
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db = DatabaseManager(db_path)
+        self.events = wired_event_bus(self.db)
+        self.open_games = get_open_game_index(self.db)
     
     # modified: create_game method to handle new game creation
-    def create_game(self, game_name: str, creator_id: int, location: str, 
+    async def create_game(self, game_name: str, creator_id: int, location: str, 
                     start_time: int, end_time: int,
                     court_cost: float, 
                     min_skill: float, max_skill: float,
-                    max_players:int, game_description: str) -> str:
+                    max_players:int, game_description: str,
+                    idempotency_key: Optional[str] = None) -> Optional[str]:
+        """Returns the new game's ID, or None if a game was already created with this idempotency key"""
         
         game_id = str(uuid4()).replace("-", "")[:8]
         # get the current timestamp
@@ -22,7 +39,7 @@ class GameService:
         game = Game(
             game_id=game_id,
             game_name=game_name,
-            creator_id=creator_id,
+            creator_id=str(creator_id),
             location=location,
             start_time=start_time,
             end_time=end_time,
@@ -36,42 +53,110 @@ class GameService:
             telegram_group_id='',  # TODO Initially empty, can be updated later
             game_description=game_description
         )
-        return self.db.create_game(game)
+        game.player_ids = [str(creator_id)]
+        if await self.db.create_game(game, idempotency_key) != game_id:
+            return None
+        self.events.publish(GameCreated(game_id, game))
+        return game_id
     
+    # modified: served from the in-memory open game index
     def get_available_games(self) -> List[Game]:
-        return self.db.get_open_games()
+        return self.open_games.upcoming(int(datetime.now().timestamp()))
     
     def get_game(self, game_id: str) -> Game:
         return self.db.get_game(game_id)
     
-    def join_waitlist(self, game_id: str, user_id: str) -> bool:
-        # Check if user is already in the game
-        game = self.db.get_game(game_id)
-        if not game:
-            return False
-        
-        return self.db.add_to_waitlist(game_id, user_id)
+    async def try_join_waitlist(self, game_id: str, user_id: str) -> JoinResult:
+        """Checks and joins in one transaction, the host hears about it in their next digest"""
+        return await self.db.try_join_waitlist(game_id, user_id)
     
+    def get_schedule_conflicts(self, user_id: str, game: Game) -> List[Tuple[str, str, int, int]]:
+        """The user's other games overlapping this one, as (game_id, game_name, start_time, end_time)"""
+        return self.db.get_schedule_conflicts(str(user_id), game.start_time, game.end_time, game.game_id)
+
+    def free_slots(self, user_id: str, days: int = FREE_SLOT_DAYS) -> List[Tuple[datetime, List[Tuple[datetime, datetime]]]]:
+        """For each of the next days, the playable windows not taken by the user's games"""
+        now = datetime.now()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        until = today + timedelta(days=days)
+        busy = self.db.get_schedule_conflicts(
+            str(user_id), int(now.timestamp()), int(until.timestamp())
+        )
+
+        slots = []
+        for i in range(days):
+            day = today + timedelta(days=i)
+            window_start = max(day + timedelta(hours=PLAYING_HOURS[0]), now)
+            window_end = day + timedelta(hours=PLAYING_HOURS[1])
+            free = []
+            cursor = window_start
+            for _, _, start_time, end_time in busy:  # sorted by start time
+                start, end = datetime.fromtimestamp(start_time), datetime.fromtimestamp(end_time)
+                if end <= cursor or start >= window_end:
+                    continue
+                if start > cursor:
+                    free.append((cursor, start))
+                cursor = max(cursor, end)
+            if cursor < window_end:
+                free.append((cursor, window_end))
+            slots.append((day, free))
+        return slots
+
     def get_game_waitlist(self, game_id: str):
         return self.db.get_waitlist_for_game(game_id)
     
-    def approve_player(self, game_id: str, user_id: str) -> bool:
-        return self.db.approve_waitlist_entry(game_id, user_id)
+    async def approve_player(self, game_id: str, user_id: str) -> bool:
+        success = await self.db.approve_waitlist_entry(game_id, user_id)
+        if success:
+            self.events.publish(PlayerApproved(game_id, self.db.get_game(game_id), user_id))
+        return success
     
-    def reject_player(self, game_id: str, user_id: str):
-        self.db.reject_waitlist_entry(game_id, user_id)
+    async def reject_player(self, game_id: str, user_id: str) -> bool:
+        return await self.db.reject_waitlist_entry(game_id, user_id)
     
     def get_user_games(self, user_id: str) -> List[Game]:
         return self.db.get_user_games(user_id)
     
-    def leave_game(self, game_id: str, user_id: str) -> bool:
-        return self.db.remove_player_from_game(game_id, user_id)
+    async def leave_game(self, game_id: str, user_id: str) -> Tuple[bool, Optional[str]]:
+        """Returns whether the player left and who was auto-promoted into the seat, if anyone"""
+        success, promoted_id = await self.db.remove_player_from_game(game_id, user_id)
+        if success:
+            self.events.publish(PlayerLeft(game_id, self.db.get_game(game_id), user_id, promoted_id))
+        return success, promoted_id
+
+    async def set_auto_fill(self, game_id: str, enabled: bool) -> List[str]:
+        promoted = await self.db.set_auto_fill(game_id, enabled)
+        self._game_updated(game_id)
+        return promoted
+
+    async def update_max_players(self, game_id: str, max_players: int) -> List[str]:
+        promoted = await self.db.update_max_players(game_id, max_players)
+        self._game_updated(game_id)
+        return promoted
     
-    def update_game_group(self, game_id: str, group_id: str):
-        self.db.update_game_group(game_id, group_id)
+    async def update_game_group(self, game_id: str, group_id: str):
+        await self.db.update_game_group(game_id, group_id)
+        self._game_updated(game_id)
 
-    def check_user_on_waitlist(self, game_id: str, user_id: str) -> bool:
-        return self.db.check_user_on_waitlist(game_id, user_id)
     
-    def cancel_game(self, game_id: str) -> bool:
-        return self.db.cancel_game(game_id)
\ No newline at end of file
+    async def cancel_game(self, game_id: str) -> Optional[Game]:
+        """The cancelled game with the players it had, None if it could not be cancelled"""
+        game = await self.db.cancel_game(game_id)
+        if game:
+            self.events.publish(GameCancelled(game_id))
+        return game
+
+    def _game_updated(self, game_id: str):
+        # Auto-fill may also have promoted players, the event carries the game as it is now
+        self.events.publish(GameUpdated(game_id, self.db.get_game(game_id)))
+
+    async def run_consistency_check(self):
+        """Run as a scheduled job, reloads the open game index if it drifted from the database"""
+        try:
+            games = self.db.get_open_games()
+            mismatched = self.open_games.diff(games, int(datetime.now().timestamp()))
+            if mismatched:
+                logger.warning("Open game index out of sync, reloading", extra={"mismatched": mismatched[:10], "count": len(mismatched)})
+                self.open_games.load(games)
+        except Exception as e:
+            logger.exception("Error checking the open game index")
\ No newline at end of file
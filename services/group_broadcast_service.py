@@ -0,0 +1,59 @@
+import time
+from typing import Dict, Iterable, Tuple
+
+from telegram import Bot, ChatMember
+from telegram.error import TelegramError
+
+from models.game import Game
+from services.broadcast_service import broadcaster
+
+# Seconds a group membership lookup is trusted
+MEMBERSHIP_TTL = 6 * 60 * 60
+
+MEMBER_STATUSES = {ChatMember.OWNER, ChatMember.ADMINISTRATOR, ChatMember.MEMBER}
+
+
+class GroupBroadcaster:
+    """Posts game-wide announcements once in the game's linked group chat.
+
+    Players who are not in the group still get a DM. Membership lookups are
+    cached, so after the first announcement a game with a linked group costs
+    one message instead of one per player.
+    """
+
+    def __init__(self, ttl: int = MEMBERSHIP_TTL):
+        self.ttl = ttl
+        self._members: Dict[Tuple[str, str], Tuple[bool, float]] = {}
+
+    def forget_group(self, chat_id: str):
+        for key in [key for key in self._members if key[0] == chat_id]:
+            del self._members[key]
+
+    async def is_member(self, bot: Bot, chat_id: str, user_id: str) -> bool:
+        cached = self._members.get((chat_id, user_id))
+        if cached and time.monotonic() - cached[1] < self.ttl:
+            return cached[0]
+        try:
+            member = await bot.get_chat_member(chat_id=chat_id, user_id=user_id)
+            is_member = member.status in MEMBER_STATUSES or getattr(member, "is_member", False)
+        except TelegramError:
+            is_member = False
+        self._members[(chat_id, user_id)] = (is_member, time.monotonic())
+        return is_member
+
+    async def announce(self, bot: Bot, game: Game, text: str, exclude: Iterable[str] = (), **kwargs) -> int:
+        """Send text to the game's group, DMing players outside it. Returns messages delivered."""
+        recipients = [player_id for player_id in game.player_ids if player_id not in set(exclude)]
+        group_id = game.telegram_group_id
+
+        if group_id and await broadcaster.send(bot, group_id, text, **kwargs):
+            outside = [user_id for user_id in recipients if not await self.is_member(bot, group_id, user_id)]
+            return 1 + await broadcaster.send_many(bot, outside, text, **kwargs)
+
+        if group_id:
+            # The bot was removed from the group, or it no longer exists
+            self.forget_group(group_id)
+        return await broadcaster.send_many(bot, recipients, text, **kwargs)
+
+
+group_broadcaster = GroupBroadcaster()
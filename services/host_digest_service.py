@@ -0,0 +1,79 @@
+import html
+import logging
+import os
+import time
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import ContextTypes
+
+from database.db_manager import DEFAULT_DB_PATH, DatabaseManager
+from services.broadcast_service import broadcaster
+from services.render_service import user_link
+
+logger = logging.getLogger(__name__)
+
+# Seconds a host's first buffered request waits for others before the digest goes out
+HOST_DIGEST_WINDOW = int(os.getenv("HOST_DIGEST_WINDOW", "120"))
+
+# How often the flush job looks for digests that are due
+HOST_DIGEST_CHECK_INTERVAL = 15
+
+# Requests listed, each with an approve button, the rest are summarised
+MAX_DIGEST_REQUESTS = 10
+
+APPROVE_CALLBACK = "approve"
+
+
+def approve_callback_data(game_id: str, user_id: str) -> str:
+    return f"{APPROVE_CALLBACK}:{game_id}:{user_id}"
+
+
+class HostDigestService:
+    """Coalesces waitlist requests into one message per host.
+
+    Requests are buffered in pending_host_notifications, so a restart does
+    not lose them. A host's digest goes out once their oldest buffered
+    request is HOST_DIGEST_WINDOW seconds old, together with everything
+    that arrived since.
+    """
+
+    def __init__(self, window: int = HOST_DIGEST_WINDOW, db_path: str = DEFAULT_DB_PATH):
+        self.db = DatabaseManager(db_path)
+        self.window = window
+
+    def build_digest(self, requests: list):
+        """Digest text and approve keyboard for [(game_id, game_name, user_id, display_name, skill_level), ...]"""
+        game_names = list(dict.fromkeys(html.escape(game_name) for _, game_name, _, _, _ in requests))
+        count = len(requests)
+
+        lines = [
+            f"📬 <b>{count} new request{'s' if count != 1 else ''} for {', '.join(game_names)}</b>\n"
+        ]
+        buttons = []
+        for game_id, game_name, user_id, display_name, skill_level in requests[:MAX_DIGEST_REQUESTS]:
+            skill = skill_level if skill_level is not None else "Not set"
+            lines.append(f"• {user_link(user_id, display_name)} ⭐ {skill} → {html.escape(game_name)}")
+            buttons.append([InlineKeyboardButton(
+                f"✅ Approve {display_name}"[:60],
+                callback_data=approve_callback_data(game_id, user_id)
+            )])
+
+        if count > MAX_DIGEST_REQUESTS:
+            lines.append(f"…and {count - MAX_DIGEST_REQUESTS} more")
+        waitlists = " ".join(f"/waitlist_{game_id}" for game_id in dict.fromkeys(r[0] for r in requests))
+        lines.append(f"\n📋 Full waitlist: {waitlists}")
+
+        return "\n".join(lines), InlineKeyboardMarkup(buttons)
+
+    async def flush(self, context: ContextTypes.DEFAULT_TYPE):
+        """Scheduled job, sends the digests that are due"""
+        try:
+            digests = await self.db.pop_pending_host_notifications(int(time.time()) - self.window)
+            for host_id, requests in digests.items():
+                text, keyboard = self.build_digest(requests)
+                await broadcaster.send(
+                    context.bot, host_id, text,
+                    parse_mode='HTML', reply_markup=keyboard
+                )
+        except Exception as e:
+            logger.exception("Error sending host digests")
@@ -0,0 +1,145 @@
+import html
+import re
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, FrozenSet, List, Set, Union
+
+from database.db_manager import DatabaseManager
+from models.game import Game, GameSummary
+from models.events import GameChanged
+from services.render_service import format_start_end_time
+
+# Telegram accepts at most 50 results per inline answer
+MAX_INLINE_RESULTS = 50
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+@dataclass(frozen=True)
+class IndexedGame:
+    """What an inline result needs, rendered once when the game is indexed"""
+    game_id: str
+    start_time: int
+    title: str
+    description: str
+    message: str      # HTML posted in the chat when the result is picked, before the join link
+    terms: FrozenSet[str]
+
+
+class GameSearchIndex:
+    """Open games searchable by prefixes of their name, location and weekday.
+
+    Every term maps to the games containing it, and the terms are kept in a
+    sorted list. A query prefix finds its terms with one bisect and a short
+    scan, so answering never touches SQLite. Each query word must prefix
+    some term of a game, e.g. 'sat pasir' finds Saturday games at Pasir Ris.
+    """
+
+    def __init__(self):
+        self._games: Dict[str, IndexedGame] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._terms: List[str] = []
+
+    def __len__(self):
+        return len(self._games)
+
+    def _render(self, game: Union[Game, GameSummary]) -> IndexedGame:
+        start = datetime.fromtimestamp(game.start_time)
+        game_time = format_start_end_time(game.start_time, game.end_time)
+        terms = set(tokens(game.game_name)) | set(tokens(game.location))
+        terms |= {start.strftime('%A').lower(), start.strftime('%b').lower()}
+        return IndexedGame(
+            game_id=game.game_id,
+            start_time=game.start_time,
+            title=game.game_name,
+            description=(
+                f"{start:%a %d %b, %I:%M %p} · {game.location} · "
+                f"{game.current_players}/{game.max_players} players · ⭐ {game.min_skill}-{game.max_skill}"
+            ),
+            message=(
+                f"🎾 <b>{html.escape(game.game_name)}</b>\n"
+                f"📅 {game_time}\n"
+                f"📍 {html.escape(game.location)}\n"
+                f"💰 Court Cost: ${game.court_cost}\n"
+                f"⭐ Skill: {game.min_skill} to {game.max_skill}\n"
+                f"👥 {game.current_players}/{game.max_players} players\n\n"
+            ),
+            terms=frozenset(terms),
+        )
+
+    def add(self, game: Union[Game, GameSummary]):
+        """Index an open game, replacing any earlier version. Games that are full or closed are removed."""
+        self.remove(game.game_id)
+        if game.status != 'open':
+            return
+        entry = self._render(game)
+        self._games[game.game_id] = entry
+        for term in entry.terms:
+            game_ids = self._postings.get(term)
+            if game_ids is None:
+                game_ids = self._postings[term] = set()
+                self._terms.insert(bisect_left(self._terms, term), term)
+            game_ids.add(game.game_id)
+
+    def remove(self, game_id: str):
+        entry = self._games.pop(game_id, None)
+        if not entry:
+            return
+        for term in entry.terms:
+            game_ids = self._postings[term]
+            game_ids.discard(game_id)
+            if not game_ids:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+
+    def on_game_changed(self, event: GameChanged):
+        if event.game:
+            self.add(event.game)
+        else:
+            self.remove(event.game_id)
+
+    def _prefix_matches(self, prefix: str) -> Set[str]:
+        matches = set()
+        i = bisect_left(self._terms, prefix)
+        while i < len(self._terms) and self._terms[i].startswith(prefix):
+            matches |= self._postings[self._terms[i]]
+            i += 1
+        return matches
+
+    def search(self, query: str, now: int, limit: int = MAX_INLINE_RESULTS) -> List[IndexedGame]:
+        """Upcoming games matching every word of the query, soonest first"""
+        candidates = None
+        for word in tokens(query):
+            matches = self._prefix_matches(word)
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return []
+
+        entries = list(self._games.values() if candidates is None else (self._games[i] for i in candidates))
+        upcoming = []
+        for entry in entries:
+            if entry.start_time > now:
+                upcoming.append(entry)
+            else:
+                # Started games are never updated again, forget them as they are found
+                self.remove(entry.game_id)
+        upcoming.sort(key=lambda entry: entry.start_time)
+        return upcoming[:limit]
+
+
+_indexes: Dict[str, GameSearchIndex] = {}
+
+
+def get_game_search_index(db: DatabaseManager) -> GameSearchIndex:
+    index = _indexes.get(db.db_path)
+    if index is None:
+        index = GameSearchIndex()
+        for game in db.get_open_game_summaries():
+            index.add(game)
+        _indexes[db.db_path] = index
+    return index
@@ -0,0 +1,130 @@
+import functools
+import json
+import logging
+import queue
+import sys
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+from uuid import uuid4
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+# Keep one in this many DEBUG records with the same message template
+DEBUG_SAMPLE_EVERY = 100
+
+# Set per update, or per job run, and copied onto every record logged while handling it
+log_context: ContextVar[Dict[str, object]] = ContextVar("log_context", default={})
+
+# Record attributes that belong to logging itself, anything else was passed as extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "context"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the update context and any extra= fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **getattr(record, "context", {}),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DebugSampler(logging.Filter):
+    """Passes every record at INFO and above, and one in every_n DEBUG records per message template"""
+
+    def __init__(self, every_n: int = DEBUG_SAMPLE_EVERY):
+        super().__init__()
+        self.every_n = max(1, every_n)
+        self._seen: Dict[tuple, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        key = (record.name, record.msg)
+        count = self._seen.get(key, 0)
+        self._seen[key] = count + 1
+        if count % self.every_n:
+            return False
+        record.sampled = self.every_n
+        return True
+
+
+class ContextQueueHandler(QueueHandler):
+    """Enqueues records without formatting them.
+
+    The stock QueueHandler formats in the logging thread, here the event
+    loop. This one only attaches the update context, which has to be read
+    where the record was made, and leaves formatting and I/O to the
+    listener's thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.context = log_context.get()
+        return record
+
+
+def configure_logging(level: int = logging.INFO, sample_every: int = DEBUG_SAMPLE_EVERY) -> QueueListener:
+    """Route every logger through a queue to a JSON stdout handler on a background thread.
+    Returns the started listener, stop it on shutdown to flush what is queued."""
+    records: queue.SimpleQueue = queue.SimpleQueue()
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter())
+    listener = QueueListener(records, output, respect_handler_level=True)
+
+    handler = ContextQueueHandler(records)
+    handler.addFilter(DebugSampler(sample_every))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+    # One INFO line per Bot API request otherwise
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    listener.start()
+    return listener
+
+
+async def bind_update(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """TypeHandler run before every other group, tags the update's log records"""
+    log_context.set({
+        "request_id": uuid4().hex[:12],
+        "bot": context.bot.username,
+        "update_id": update.update_id,
+        "user_id": update.effective_user.id if update.effective_user else None,
+        "chat_id": update.effective_chat.id if update.effective_chat else None,
+    })
+
+
+def with_handler_name(callback, name: Optional[str] = None):
+    """Wrap a handler or job callback so records logged inside it name it.
+    Jobs have no update, so each run gets its own request ID and names its bot."""
+    name = name or getattr(callback, "__qualname__", repr(callback))
+
+    @functools.wraps(callback)
+    async def wrapper(*args):
+        context = dict(log_context.get())
+        if len(args) == 1:
+            context = {"request_id": uuid4().hex[:12], "bot": args[0].bot.username}
+        context["handler"] = name
+        token = log_context.set(context)
+        started = time.perf_counter()
+        try:
+            return await callback(*args)
+        finally:
+            logging.getLogger(__name__).debug(
+                "Handled %s", name, extra={"duration_ms": round((time.perf_counter() - started) * 1000, 2)}
+            )
+            log_context.reset(token)
+
+    return wrapper
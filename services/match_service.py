@@ -0,0 +1,178 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from database.db_manager import DEFAULT_DB_PATH, DatabaseManager
+from models.game import Game
+from models.match_subscription import ALL_DAYS, MatchSubscription
+
+DAY_NAMES = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+WEEKDAYS = 0b0011111
+WEEKENDS = 0b1100000
+
+class SubscriberIndex:
+    """Match alert subscribers bucketed by (weekday, hour) and sorted by skill.
+
+    Subscribers with no time preference live in the (weekday, None) bucket,
+    others in one bucket per hour of their window. Each bucket keeps skills
+    and user IDs in parallel sorted lists, so a game needs two bisects and
+    two list slices, O(log n + matches) however many users are subscribed.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[Tuple[int, Optional[int]], Tuple[List[float], List[str]]] = {}
+        self._subscriptions: Dict[str, MatchSubscription] = {}
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def get(self, user_id: str) -> Optional[MatchSubscription]:
+        return self._subscriptions.get(user_id)
+
+    def _keys(self, subscription: MatchSubscription):
+        for weekday in range(7):
+            if not subscription.accepts_day(weekday):
+                continue
+            if subscription.any_time:
+                yield (weekday, None)
+            else:
+                for hour in range(subscription.start_hour, subscription.end_hour):
+                    yield (weekday, hour)
+
+    def add(self, subscription: MatchSubscription):
+        self.remove(subscription.user_id)
+        for key in self._keys(subscription):
+            skills, user_ids = self._buckets.setdefault(key, ([], []))
+            i = bisect_right(skills, subscription.skill_level)
+            skills.insert(i, subscription.skill_level)
+            user_ids.insert(i, subscription.user_id)
+        self._subscriptions[subscription.user_id] = subscription
+
+    def load(self, subscriptions):
+        """Bulk load into an empty index, sorting each bucket once instead of inserting one by one"""
+        entries: Dict[Tuple[int, Optional[int]], List[Tuple[float, str]]] = {}
+        for subscription in subscriptions:
+            for key in self._keys(subscription):
+                entries.setdefault(key, []).append((subscription.skill_level, subscription.user_id))
+            self._subscriptions[subscription.user_id] = subscription
+        for key, bucket in entries.items():
+            bucket.sort()
+            self._buckets[key] = ([skill for skill, _ in bucket], [user_id for _, user_id in bucket])
+
+    def remove(self, user_id: str):
+        subscription = self._subscriptions.pop(user_id, None)
+        if not subscription:
+            return
+        for key in self._keys(subscription):
+            skills, user_ids = self._buckets[key]
+            lo = bisect_left(skills, subscription.skill_level)
+            hi = bisect_right(skills, subscription.skill_level)
+            i = user_ids.index(user_id, lo, hi)
+            del skills[i]
+            del user_ids[i]
+
+    def match(self, min_skill: float, max_skill: float, weekday: int, hour: int) -> List[str]:
+        matches = []
+        for key in ((weekday, None), (weekday, hour)):
+            bucket = self._buckets.get(key)
+            if not bucket:
+                continue
+            skills, user_ids = bucket
+            matches += user_ids[bisect_left(skills, min_skill):bisect_right(skills, max_skill)]
+        return matches
+
+
+_indexes: Dict[str, SubscriberIndex] = {}
+
+
+def get_subscriber_index(db: DatabaseManager) -> SubscriberIndex:
+    index = _indexes.get(db.db_path)
+    if index is None:
+        index = SubscriberIndex()
+        index.load(db.get_match_subscriptions())
+        _indexes[db.db_path] = index
+    return index
+
+
+def parse_preferences(args: List[str]) -> Tuple[int, int, int]:
+    """Parse day and hour preferences such as ['weekends', '18-22'] or ['mon', 'wed']"""
+    days = 0
+    start_hour, end_hour = 0, 24
+    for arg in args:
+        arg = arg.lower()
+        if arg in ("weekday", "weekdays"):
+            days |= WEEKDAYS
+        elif arg in ("weekend", "weekends"):
+            days |= WEEKENDS
+        elif arg[:3] in DAY_NAMES:
+            days |= 1 << DAY_NAMES.index(arg[:3])
+        elif "-" in arg:
+            try:
+                start_hour, end_hour = (int(part) for part in arg.split("-", 1))
+            except ValueError:
+                raise ValueError(f"Invalid hours '{arg}'. Use 24h hours like 18-22.")
+            if not (0 <= start_hour < end_hour <= 24):
+                raise ValueError("Hours must be between 0 and 24, with the start before the end.")
+        else:
+            raise ValueError(f"Unknown preference '{arg}'.")
+    return days or ALL_DAYS, start_hour, end_hour
+
+
+def describe_preferences(subscription: MatchSubscription) -> str:
+    if subscription.days == ALL_DAYS:
+        days = "any day"
+    elif subscription.days == WEEKDAYS:
+        days = "weekdays"
+    elif subscription.days == WEEKENDS:
+        days = "weekends"
+    else:
+        days = ", ".join(name.title() for i, name in enumerate(DAY_NAMES) if subscription.accepts_day(i))
+    hours = "any time" if subscription.any_time else f"{subscription.start_hour:02d}:00-{subscription.end_hour:02d}:00"
+    return f"{days}, {hours}"
+
+
+class MatchService:
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db = DatabaseManager(db_path)
+
+    @property
+    def index(self) -> SubscriberIndex:
+        return get_subscriber_index(self.db)
+
+    async def subscribe(self, user_id: str, skill_level: float, days: int = ALL_DAYS,
+                  start_hour: int = 0, end_hour: int = 24) -> MatchSubscription:
+        subscription = MatchSubscription(
+            user_id=user_id,
+            skill_level=skill_level,
+            days=days,
+            start_hour=start_hour,
+            end_hour=end_hour,
+            created_at=int(datetime.now().timestamp())
+        )
+        await self.db.upsert_match_subscription(subscription)
+        self.index.add(subscription)
+        return subscription
+
+    async def unsubscribe(self, user_id: str) -> bool:
+        removed = await self.db.delete_match_subscription(user_id)
+        self.index.remove(user_id)
+        return removed
+
+    def get_subscription(self, user_id: str) -> Optional[MatchSubscription]:
+        return self.index.get(user_id)
+
+    async def update_skill(self, user_id: str, skill_level: float):
+        subscription = self.index.get(user_id)
+        if not subscription:
+            return
+        await self.db.update_match_subscription_skill(user_id, skill_level)
+        self.index.remove(user_id)
+        subscription.skill_level = skill_level
+        self.index.add(subscription)
+
+    def find_matches(self, game: Game) -> List[str]:
+        """Subscribers whose skill and schedule fit the game, excluding its players"""
+        start = datetime.fromtimestamp(game.start_time)
+        matches = self.index.match(game.min_skill, game.max_skill, start.weekday(), start.hour)
+        players = set(game.player_ids) | {str(game.creator_id)}
+        return [user_id for user_id in matches if user_id not in players]
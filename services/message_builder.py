@@ -0,0 +1,202 @@
+import asyncio
+import re
+from typing import Awaitable, Callable, Iterable, Iterator, List, Tuple
+
+# Telegram rejects longer messages, counted in UTF-16 code units
+MAX_MESSAGE_LENGTH = 4096
+
+# Tags, entities, whitespace runs and words are never split apart
+_TOKEN_RE = re.compile(r"<[^>]*>|&#?\w+;|\s+|[^<&\s]+|[<&]")
+_TAG_RE = re.compile(r"<(/?)(\w+)")
+
+
+def text_length(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _apply_tags(open_tags: List[Tuple[str, str]], tokens: Iterable[str]) -> List[Tuple[str, str]]:
+    """Return the stack of (name, opening tag) still open after tokens"""
+    stack = list(open_tags)
+    for token in tokens:
+        match = _TAG_RE.match(token)
+        if not match:
+            continue
+        closing, name = match.groups()
+        if not closing:
+            stack.append((name, token))
+            continue
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i][0] == name:
+                del stack[i]
+                break
+    return stack
+
+
+def _closing_tags(open_tags: List[Tuple[str, str]]) -> str:
+    return "".join(f"</{name}>" for name, _ in reversed(open_tags))
+
+
+class _HtmlSplitter:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.pieces: List[str] = []
+        self.parts: List[str] = []
+        self.size = 0
+        self.open_tags: List[Tuple[str, str]] = []
+        self.dirty = False
+
+    def add_line(self, line: str):
+        tokens = _TOKEN_RE.findall(line)
+        if self._fits(tokens):
+            self._append(tokens)
+            return
+        self._flush()
+        if self._fits(tokens):
+            self._append(tokens)
+            return
+        # The line alone is longer than a message, break it between words
+        for token in tokens:
+            if not self._fits([token]):
+                self._flush()
+            if self._fits([token]):
+                self._append([token])
+                continue
+            # A single word longer than a message
+            for char in token:
+                if not self._fits([char]):
+                    self._flush()
+                self._append([char])
+
+    def finish(self) -> List[str]:
+        if self.dirty:
+            self.pieces.append("".join(self.parts) + _closing_tags(self.open_tags))
+            self.dirty = False
+        return self.pieces
+
+    def _fits(self, tokens: List[str]) -> bool:
+        closing = _closing_tags(_apply_tags(self.open_tags, tokens))
+        size = self.size + sum(text_length(token) for token in tokens) + text_length(closing)
+        return size <= self.limit
+
+    def _append(self, tokens: List[str]):
+        self.parts.extend(tokens)
+        self.size += sum(text_length(token) for token in tokens)
+        self.open_tags = _apply_tags(self.open_tags, tokens)
+        # A piece holding nothing but tags is not worth sending
+        if any(not token.startswith("<") for token in tokens):
+            self.dirty = True
+
+    def _flush(self):
+        if not self.dirty:
+            return
+        self.pieces.append("".join(self.parts) + _closing_tags(self.open_tags))
+        # Reopen whatever was still open so formatting carries into the next piece
+        self.parts = [tag for _, tag in self.open_tags]
+        self.size = sum(text_length(tag) for tag in self.parts)
+        self.dirty = False
+
+
+def split_html(text: str, limit: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """Split HTML into pieces no longer than limit.
+
+    Prefers line, then word boundaries. Tags still open at a split are closed
+    at the end of the piece and reopened at the start of the next one.
+    """
+    splitter = _HtmlSplitter(limit)
+    for line in text.splitlines(keepends=True):
+        splitter.add_line(line)
+    return splitter.finish()
+
+
+class MessageBuilder:
+    """Packs rendered fragments into as few messages as fit under the limit.
+
+    Messages are only split between fragments, unless a single fragment is
+    longer than a whole message.
+    """
+
+    def __init__(self, header: str = "", footer: str = "", limit: int = MAX_MESSAGE_LENGTH):
+        self.header = header
+        self.footer = footer
+        self.limit = limit
+
+    def chunks(self, fragments: Iterable[str]) -> Iterator[str]:
+        parts = [self.header] if self.header else []
+        size = text_length(self.header)
+
+        for fragment in fragments:
+            fragment_size = text_length(fragment)
+            if fragment_size > self.limit:
+                # Too long for any message, fill up the current one and split the rest
+                *full, last = split_html("".join(parts) + fragment, self.limit)
+                yield from full
+                parts, size = [last], text_length(last)
+                continue
+
+            if parts and size + fragment_size > self.limit:
+                yield "".join(parts)
+                parts, size = [], 0
+            parts.append(fragment)
+            size += fragment_size
+
+        if self.footer:
+            footer_size = text_length(self.footer)
+            if footer_size > self.limit:
+                *full, last = split_html("".join(parts) + self.footer, self.limit)
+                yield from full
+                parts = [last]
+            else:
+                if parts and size + footer_size > self.limit:
+                    yield "".join(parts)
+                    parts = []
+                parts.append(self.footer)
+
+        if parts:
+            yield "".join(parts)
+
+
+async def send_chunked(
+    send: Callable[..., Awaitable],
+    fragments: Iterable[str],
+    header: str = "",
+    footer: str = "",
+    limit: int = MAX_MESSAGE_LENGTH,
+    max_pending: int = 2,
+    **kwargs,
+) -> int:
+    """Build messages from fragments and send them in order.
+
+    Chunks are built ahead of the sender into a queue of at most max_pending,
+    so rendering overlaps with network I/O without buffering the whole
+    listing. Sends stay sequential, Telegram only keeps messages in order
+    when each one completes before the next starts. Returns the number of
+    messages sent.
+    """
+    builder = MessageBuilder(header, footer, limit)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+    done = object()
+
+    async def produce():
+        try:
+            for chunk in builder.chunks(fragments):
+                await queue.put(chunk)
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(done)
+
+    producer = asyncio.create_task(produce())
+    sent = 0
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is done:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+            await send(chunk, **kwargs)
+            sent += 1
+    finally:
+        if not producer.done():
+            producer.cancel()
+    return sent
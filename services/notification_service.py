@@ -1,25 +1,31 @@
+import html
+import logging
 from telegram.ext import ContextTypes
-from database.db_manager import DatabaseManager
-from datetime import datetime, timedelta
+from database.db_manager import DEFAULT_DB_PATH, DatabaseManager
+from services.group_broadcast_service import group_broadcaster
+from services.render_service import format_start_end_time
+
+logger = logging.getLogger(__name__)
+
+# Seconds between reminder runs, each run claims the games entering the reminder window
+REMINDER_INTERVAL = 60 * 60
 
 class NotificationService:
-    def __init__(self):
-        self.db = DatabaseManager()
-    
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db = DatabaseManager(db_path)
+
     async def send_game_reminders(self, context: ContextTypes.DEFAULT_TYPE):
-        """Send reminders for games happening in 24 hours"""
+        """Send reminders for games happening in about 24 hours"""
         try:
-            games_dict = self.db.get_upcoming_games_with_players()
-
-            for game_id, game_info in games_dict.items():
-                game_time = datetime.fromisoformat(game_info['datetime'])
-                formatted_time = game_time.strftime('%d/%m/%Y at %I:%M %p')
+            games = await self.db.claim_upcoming_games()
 
+            for game in games:
                 reminder_text = (
-                    f"⏰ **Game Reminder!**\n\n"
+                    f"⏰ <b>Game Reminder!</b>\n\n"
                     f"Your tennis game is in 24 hours:\n"
-                    f"📍 {game_info['location']}\n"
-                    f"📅 {formatted_time}\n\n"
+                    f"🎾 {html.escape(game.game_name)}\n"
+                    f"📍 {html.escape(game.location)}\n"
+                    f"📅 {format_start_end_time(game.start_time, game.end_time)}\n\n"
                     f"Don't forget to:\n"
                     f"☐ Check the weather\n"
                     f"☐ Bring your racket\n"
@@ -27,15 +33,8 @@ class NotificationService:
                     f"See you on the court! 🎾"
                 )
 
-                for user_id, first_name in game_info['players']:
-                    try:
-                        await context.bot.send_message(
-                            chat_id=user_id,
-                            text=reminder_text,
-                            parse_mode='Markdown'
-                        )
-                    except Exception as e:
-                        print(f"Failed to send reminder to {user_id}: {e}")
+                # One post in the game's group, DMs only for players outside it
+                await group_broadcaster.announce(context.bot, game, reminder_text, parse_mode='HTML')
 
         except Exception as e:
-            print(f"Error sending game reminders: {e}")
+            logger.exception("Error sending game reminders")
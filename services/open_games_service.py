@@ -0,0 +1,91 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from database.db_manager import DatabaseManager
+from models.game import Game
+from models.events import GameChanged
+
+# Seconds between comparisons of the index with the database
+CONSISTENCY_CHECK_INTERVAL = 10 * 60
+
+# Sorts after every game ID, so (t, _AFTER_ALL_IDS) comes after every game starting at t
+_AFTER_ALL_IDS = "\U0010ffff"
+
+
+class OpenGameIndex:
+    """Open games that have not started, ordered by (start_time, game_id).
+
+    GameService and SeriesService update the index after each write, so
+    listing upcoming games is a bisect and a slice instead of a query.
+    Games that have started are dropped from the front as reads pass them.
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[int, str]] = []
+        self._games: Dict[str, Game] = {}
+
+    def __len__(self):
+        return len(self._games)
+
+    def load(self, games: Iterable[Game]):
+        self._games = {game.game_id: game for game in games if game.status == 'open'}
+        self._keys = sorted((game.start_time, game.game_id) for game in self._games.values())
+
+    def put(self, game: Game):
+        """Index a game's latest state, removing it if it is no longer open"""
+        self.remove(game.game_id)
+        if game.status != 'open':
+            return
+        self._games[game.game_id] = game
+        insort(self._keys, (game.start_time, game.game_id))
+
+    def remove(self, game_id: str):
+        game = self._games.pop(game_id, None)
+        if game:
+            del self._keys[bisect_left(self._keys, (game.start_time, game_id))]
+
+    def on_game_changed(self, event: GameChanged):
+        if event.game:
+            self.put(event.game)
+        else:
+            self.remove(event.game_id)
+
+    def get(self, game_id: str) -> Optional[Game]:
+        return self._games.get(game_id)
+
+    def _expire(self, now: int):
+        started = bisect_right(self._keys, (now, _AFTER_ALL_IDS))
+        if started:
+            for _, game_id in self._keys[:started]:
+                del self._games[game_id]
+            del self._keys[:started]
+
+    def upcoming(self, now: int, until: Optional[int] = None, limit: Optional[int] = None) -> List[Game]:
+        """Open games starting after now, and no later than until, soonest first"""
+        self._expire(now)
+        end = len(self._keys) if until is None else bisect_right(self._keys, (until, _AFTER_ALL_IDS))
+        if limit is not None:
+            end = min(end, limit)
+        return [self._games[game_id] for _, game_id in self._keys[:end]]
+
+    def diff(self, games: Iterable[Game], now: int) -> List[str]:
+        """IDs of games whose indexed state differs from games, the database's open games starting after now"""
+        self._expire(now)
+        expected = {game.game_id: game for game in games}
+        mismatched = [game_id for game_id in self._games.keys() - expected.keys()]
+        for game_id, game in expected.items():
+            indexed = self._games.get(game_id)
+            if indexed is None or indexed != game:
+                mismatched.append(game_id)
+        return mismatched
+
+
+_indexes: Dict[str, OpenGameIndex] = {}
+
+
+def get_open_game_index(db: DatabaseManager) -> OpenGameIndex:
+    index = _indexes.get(db.db_path)
+    if index is None:
+        index = _indexes[db.db_path] = OpenGameIndex()
+        index.load(db.get_open_games())
+    return index
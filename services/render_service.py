@@ -0,0 +1,219 @@
+import html
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, List
+
+from database.db_manager import DEFAULT_DB_PATH, DatabaseManager
+from models.game import Game
+
+# Cards kept per database, least recently used first out, and the game versions tracked alongside them
+MAX_CARDS = 5000
+MAX_VERSIONS = 4 * MAX_CARDS
+
+# Deep link into the bot that rendered it, each bot in the process has its own username
+JOIN_LINK = "https://t.me/{bot_username}?start=joinwaitlist_{game_id}"
+
+
+def format_start_end_time(start_time: int, end_time: int) -> str:
+    """Format start and end time for display"""
+    # Calculate the duration, if less 1 hour, show minutes, else show hours
+    duration = end_time - start_time
+    if duration < 3600:  # Less than 1 hour
+        duration_str = f"{duration // 60} min"
+    # if duration is exactly hours whole number, show as hours, else show as hours and minutes
+    elif duration % 3600 == 0:
+        duration_str = f"{duration // 3600} hr"
+    else:
+        hours = duration // 3600
+        minutes = (duration % 3600) // 60
+        duration_str = f"{hours} hr {minutes} min"
+
+    start_dt = datetime.fromtimestamp(start_time)
+    end_dt = datetime.fromtimestamp(end_time)
+    return f"{start_dt.strftime('%a, %d %b %Y, %I:%M %p')} - {end_dt.strftime('%I:%M %p')} | Duration: {duration_str}"
+
+
+def user_link(user_id: str, display_name: str) -> str:
+    return f"<a href='tg://user?id={user_id}'>{html.escape(display_name)}</a>"
+
+
+def join_link(bot_username: str, game_id: str) -> str:
+    return JOIN_LINK.format(bot_username=bot_username, game_id=game_id)
+
+
+@dataclass(frozen=True)
+class GameCard:
+    """Pre-escaped HTML fragments for one game, shared by every listing"""
+    game_id: str
+    version: int
+    title: str
+    time: str
+    location: str
+    host: str
+    # time, location, cost, skill, player count, description and player list lines
+    details: str
+    # users whose display names appear in the card
+    user_ids: FrozenSet[str]
+
+
+class GameCardCache:
+    """Rendered cards keyed by game ID and a version stamp.
+
+    Every write to a game, its players or a player's display name bumps the
+    game's version, so a card rendered before the write is never served after it.
+
+    Versions come from one counter. A game whose version was dropped, because
+    it was cancelled or least recently written, reads the highest version
+    dropped so far, so no game's version ever goes back to one a card was
+    rendered at.
+    """
+
+    def __init__(self, max_cards: int = MAX_CARDS, max_versions: int = MAX_VERSIONS):
+        self.max_cards = max_cards
+        self.max_versions = max_versions
+        self._cards: OrderedDict = OrderedDict()
+        self._versions: OrderedDict = OrderedDict()
+        self._games_by_user: Dict[str, set] = {}
+        self._clock = 0
+        self._floor = 0
+
+    def version(self, game_id: str) -> int:
+        return self._versions.get(game_id, self._floor)
+
+    def get(self, game_id: str):
+        card = self._cards.get(game_id)
+        if card and card.version == self.version(game_id):
+            self._cards.move_to_end(game_id)
+            return card
+        return None
+
+    def put(self, card: GameCard):
+        # A write landed while the card was being rendered, drop it
+        if card.version != self.version(card.game_id):
+            return
+        self._drop_card(card.game_id)
+        self._cards[card.game_id] = card
+        for user_id in card.user_ids:
+            self._games_by_user.setdefault(user_id, set()).add(card.game_id)
+        # Pin the version the card was rendered at, a later drop of the floor must not outdate it
+        self._set_version(card.game_id, card.version)
+        while len(self._cards) > self.max_cards:
+            self._drop_card(next(iter(self._cards)))
+
+    def invalidate(self, game_id: str):
+        self._clock = max(self._clock, self._floor) + 1
+        self._set_version(game_id, self._clock)
+        self._drop_card(game_id)
+
+    def forget(self, game_id: str):
+        """A cancelled game, its card and version are dropped"""
+        # Bumped first, so the floor passes every version a render of the game may still hold
+        self.invalidate(game_id)
+        self._drop_version(game_id)
+
+    def _set_version(self, game_id: str, version: int):
+        self._versions[game_id] = version
+        self._versions.move_to_end(game_id)
+        while len(self._versions) > self.max_versions:
+            self._drop_version(next(iter(self._versions)))
+
+    def _drop_version(self, game_id: str):
+        version = self._versions.pop(game_id, None)
+        if version is not None:
+            self._floor = max(self._floor, version)
+            self._drop_card(game_id)
+
+    def _drop_card(self, game_id: str):
+        card = self._cards.pop(game_id, None)
+        if card:
+            for user_id in card.user_ids:
+                game_ids = self._games_by_user.get(user_id)
+                if game_ids:
+                    game_ids.discard(game_id)
+                    if not game_ids:
+                        del self._games_by_user[user_id]
+
+    def invalidate_user(self, user_id: str):
+        for game_id in list(self._games_by_user.get(str(user_id), ())):
+            self.invalidate(game_id)
+
+    def clear(self):
+        for game_id in list(self._cards):
+            self.invalidate(game_id)
+
+
+# One cache per database so separate bot databases never share cards
+_card_caches: Dict[str, GameCardCache] = {}
+
+
+def get_card_cache(db_path: str) -> GameCardCache:
+    cache = _card_caches.get(db_path)
+    if cache is None:
+        cache = _card_caches[db_path] = GameCardCache()
+    return cache
+
+
+class RenderService:
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db = DatabaseManager(db_path)
+        self.cache = get_card_cache(self.db.db_path)
+
+    def get_card(self, game: Game) -> GameCard:
+        return self.get_cards([game])[0]
+
+    def get_cards(self, games: Iterable[Game]) -> List[GameCard]:
+        """Return cards in the order given, rendering only the cache misses"""
+        games = list(games)
+        cards = {}
+        misses = []
+        for game in games:
+            card = self.cache.get(game.game_id)
+            if card:
+                cards[game.game_id] = card
+            else:
+                misses.append((game, self.cache.version(game.game_id)))
+
+        if misses:
+            # One lookup for every creator and player name across all misses
+            user_ids = set()
+            for game, _ in misses:
+                user_ids.add(game.creator_id)
+                user_ids.update(game.player_ids)
+            names = self.db.get_display_names(list(user_ids))
+
+            for game, version in misses:
+                card = self._render(game, version, names)
+                self.cache.put(card)
+                cards[game.game_id] = card
+
+        return [cards[game.game_id] for game in games]
+
+    def _render(self, game: Game, version: int, names: Dict[str, str]) -> GameCard:
+        creator_name = names.get(game.creator_id, "Unknown Creator")
+        game_time = format_start_end_time(game.start_time, game.end_time)
+        location = html.escape(game.location)
+
+        lines = [
+            f"📅 {game_time}\n",
+            f"📍 {location}\n",
+            f"💰 Court Cost: ${game.court_cost}\n",
+            f"⭐ Skill: {game.min_skill} to {game.max_skill}\n",
+            f"👥 {game.current_players}/{game.max_players} players\n",
+            f"📋 Description: {html.escape(game.game_description or '')}\n",
+        ]
+        # List all players and link to their profiles
+        players = [user_link(player_id, names[player_id]) for player_id in game.player_ids if player_id in names]
+        if game.player_ids:
+            lines.append("👥 Players: " + ", ".join(players) + "\n")
+
+        return GameCard(
+            game_id=game.game_id,
+            version=version,
+            title=html.escape(game.game_name),
+            time=game_time,
+            location=location,
+            host=user_link(game.creator_id, creator_name),
+            details="".join(lines),
+            user_ids=frozenset([game.creator_id, *game.player_ids]),
+        )
@@ -0,0 +1,243 @@
+import html
+import logging
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from telegram.ext import ContextTypes
+
+from database.db_manager import DEFAULT_DB_PATH, DatabaseManager
+from models.game import Game
+from models.match_subscription import ALL_DAYS
+from models.saved_search import SavedSearch
+from services.broadcast_service import broadcaster
+from services.message_builder import send_chunked
+from services.match_service import DAY_NAMES, WEEKDAYS, WEEKENDS
+from services.render_service import format_start_end_time, join_link
+
+logger = logging.getLogger(__name__)
+
+MAX_SEARCHES_PER_USER = 10
+
+# Seconds between saved search digests
+DIGEST_INTERVAL = 30 * 60
+
+DAY_WORDS = {name: 1 << i for i, name in enumerate(DAY_NAMES)}
+DAY_WORDS.update({
+    "monday": 1 << 0, "tuesday": 1 << 1, "wednesday": 1 << 2, "thursday": 1 << 3,
+    "friday": 1 << 4, "saturday": 1 << 5, "sunday": 1 << 6,
+    "weekday": WEEKDAYS, "weekdays": WEEKDAYS, "weekend": WEEKENDS, "weekends": WEEKENDS,
+})
+
+TIME_WORDS = {
+    "morning": (6, 12), "mornings": (6, 12),
+    "afternoon": (12, 17), "afternoons": (12, 17),
+    "evening": (17, 22), "evenings": (17, 22),
+    "night": (20, 24), "nights": (20, 24),
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_HOURS_RE = re.compile(r"^(\d{1,2})-(\d{1,2})$")
+_COST_RE = re.compile(r"^\$?(\d+(?:\.\d+)?)$")
+
+
+def location_tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def parse_search(user_id: str, query: str) -> SavedSearch:
+    """Parse filters like 'weekday evenings pasir ris under $10'.
+
+    Day and time-of-day words and 'under <cost>' are filters, every other
+    word must appear in the game's location.
+    """
+    days = 0
+    start_hour, end_hour = 0, 24
+    max_cost = None
+    location = []
+
+    words = query.lower().split()
+    i = 0
+    while i < len(words):
+        word = words[i]
+        if word in DAY_WORDS:
+            days |= DAY_WORDS[word]
+        elif word in TIME_WORDS:
+            start_hour, end_hour = TIME_WORDS[word]
+        elif _HOURS_RE.match(word):
+            start_hour, end_hour = (int(part) for part in _HOURS_RE.match(word).groups())
+            if not (0 <= start_hour < end_hour <= 24):
+                raise ValueError("Hours must be between 0 and 24, with the start before the end.")
+        elif word == "free":
+            max_cost = 0.0
+        elif word in ("under", "below", "max") and i + 1 < len(words) and _COST_RE.match(words[i + 1]):
+            max_cost = float(_COST_RE.match(words[i + 1]).group(1))
+            i += 1
+        else:
+            location.extend(location_tokens(word))
+        i += 1
+
+    if not days and start_hour == 0 and end_hour == 24 and max_cost is None and not location:
+        raise ValueError("Add at least one filter.")
+
+    return SavedSearch(
+        search_id=None,
+        user_id=user_id,
+        query=query,
+        days=days or ALL_DAYS,
+        start_hour=start_hour,
+        end_hour=end_hour,
+        location=" ".join(location),
+        max_cost=max_cost,
+        created_at=int(datetime.now().timestamp())
+    )
+
+
+class SavedSearchIndex:
+    """Saved searches indexed so a new game only checks the searches it could match.
+
+    Searches are bucketed by every (weekday, hour) they accept and by the
+    first location token they require. A game looks up its own
+    (weekday, hour) bucket, intersects it with the searches keyed on one of
+    its location tokens or on no location at all, and only verifies those.
+    """
+
+    def __init__(self):
+        self._searches: Dict[int, SavedSearch] = {}
+        self._by_slot: Dict[Tuple[int, int], Set[int]] = {}
+        self._by_token: Dict[str, Set[int]] = {}
+        self._anywhere: Set[int] = set()
+
+    def __len__(self):
+        return len(self._searches)
+
+    def _slots(self, search: SavedSearch):
+        for weekday in range(7):
+            if search.days & (1 << weekday):
+                for hour in range(search.start_hour, search.end_hour):
+                    yield (weekday, hour)
+
+    def add(self, search: SavedSearch):
+        self._searches[search.search_id] = search
+        for slot in self._slots(search):
+            self._by_slot.setdefault(slot, set()).add(search.search_id)
+        tokens = search.location.split()
+        if tokens:
+            # Every token is required, so one posting list is enough to find candidates
+            self._by_token.setdefault(tokens[0], set()).add(search.search_id)
+        else:
+            self._anywhere.add(search.search_id)
+
+    def remove(self, search_id: int):
+        search = self._searches.pop(search_id, None)
+        if not search:
+            return
+        for slot in self._slots(search):
+            self._by_slot[slot].discard(search_id)
+        tokens = search.location.split()
+        if tokens:
+            self._by_token[tokens[0]].discard(search_id)
+        else:
+            self._anywhere.discard(search_id)
+
+    def remove_user(self, user_id: str):
+        for search_id in [i for i, search in self._searches.items() if search.user_id == user_id]:
+            self.remove(search_id)
+
+    def match(self, game: Game) -> List[SavedSearch]:
+        start = datetime.fromtimestamp(game.start_time)
+        in_slot = self._by_slot.get((start.weekday(), start.hour))
+        if not in_slot:
+            return []
+
+        game_tokens = set(location_tokens(game.location))
+        candidates = set(self._anywhere)
+        for token in game_tokens:
+            candidates |= self._by_token.get(token, set())
+
+        matches = []
+        for search_id in (candidates & in_slot):
+            search = self._searches[search_id]
+            if search.max_cost is not None and game.court_cost > search.max_cost:
+                continue
+            if not game_tokens.issuperset(search.location.split()):
+                continue
+            matches.append(search)
+        return matches
+
+
+_indexes: Dict[str, SavedSearchIndex] = {}
+
+
+def get_saved_search_index(db: DatabaseManager) -> SavedSearchIndex:
+    index = _indexes.get(db.db_path)
+    if index is None:
+        index = SavedSearchIndex()
+        for search in db.get_saved_searches():
+            index.add(search)
+        _indexes[db.db_path] = index
+    return index
+
+
+def record_matches(db: DatabaseManager, index: SavedSearchIndex, game: Game) -> int:
+    """Queue a new game for every saved search it matches, delivered by the next digest"""
+    matches = [
+        (search.search_id, search.user_id, game.game_id)
+        for search in index.match(game)
+        if search.user_id != str(game.creator_id)
+    ]
+    if matches:
+        db.add_saved_search_matches(matches)
+    return len(matches)
+
+
+class SavedSearchService:
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db = DatabaseManager(db_path)
+
+    @property
+    def index(self) -> SavedSearchIndex:
+        return get_saved_search_index(self.db)
+
+    async def watch(self, user_id: str, query: str) -> SavedSearch:
+        if len(self.db.get_saved_searches(user_id)) >= MAX_SEARCHES_PER_USER:
+            raise ValueError(f"You can keep up to {MAX_SEARCHES_PER_USER} saved searches. Remove one with /unwatch first.")
+        search = parse_search(user_id, query)
+        search.search_id = await self.db.create_saved_search(search)
+        self.index.add(search)
+        return search
+
+    async def unwatch(self, user_id: str, search_id: Optional[int] = None) -> int:
+        """Remove one saved search, or all of the user's, returning how many were removed"""
+        search_ids = await self.db.delete_saved_searches(user_id, search_id)
+        for i in search_ids:
+            self.index.remove(i)
+        return len(search_ids)
+
+    def get_user_searches(self, user_id: str) -> List[SavedSearch]:
+        return self.db.get_saved_searches(user_id)
+
+    async def send_digests(self, context: ContextTypes.DEFAULT_TYPE):
+        """Send each user one message listing every new game their searches matched"""
+        try:
+            digests = await self.db.pop_saved_search_matches()
+            for user_id, games in digests.items():
+                fragments = (
+                    f"🎾 {html.escape(game_name)}\n"
+                    f"📅 {format_start_end_time(start_time, end_time)}\n"
+                    f"📍 {html.escape(location)} | 💰 ${court_cost}\n"
+                    f"<a href=\"{join_link(context.bot.username, game_id)}\">[Join Game 🔗]</a>\n\n"
+                    for game_id, game_name, location, start_time, end_time, court_cost in games
+                )
+
+                async def send(text, chat_id=user_id, **kwargs):
+                    await broadcaster.send(context.bot, chat_id, text, **kwargs)
+
+                await send_chunked(
+                    send, fragments,
+                    header=f"🔎 <b>{len(games)} new game{'s' if len(games) != 1 else ''} match your saved searches</b>\n\n",
+                    footer="<i>Manage your searches with /watch</i>",
+                    parse_mode='HTML', disable_web_page_preview=True
+                )
+        except Exception as e:
+            logger.exception("Error sending saved search digests")
@@ -0,0 +1,116 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from telegram.ext import ContextTypes
+
+from database.db_manager import DEFAULT_DB_PATH, DatabaseManager
+from models.game import Game
+from models.game_series import GameSeries
+from models.events import GameCancelled, GameCreated, GameUpdated
+from services.subscribers import wired_event_bus
+
+logger = logging.getLogger(__name__)
+
+# Games are created this far ahead, later ones only exist as the series' rule
+SERIES_HORIZON_DAYS = 14
+
+# Seconds between materializer runs
+MATERIALIZE_INTERVAL = 60 * 60
+
+
+class SeriesService:
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db = DatabaseManager(db_path)
+        self.events = wired_event_bus(self.db)
+
+    async def create_series(self, game_name: str, creator_id: str, location: str,
+                      start_time: int, end_time: int, court_cost: float,
+                      min_skill: float, max_skill: float, max_players: int,
+                      game_description: str, interval_weeks: int = 1,
+                      idempotency_key: Optional[str] = None) -> Tuple[Optional[GameSeries], List[Game]]:
+        """Create a series and its games within the horizon.
+        Returns (None, []) if a series was already created with this idempotency key."""
+        series = GameSeries(
+            series_id=str(uuid4()).replace("-", "")[:8],
+            creator_id=str(creator_id),
+            game_name=game_name,
+            game_description=game_description,
+            location=location,
+            first_start=start_time,
+            duration=end_time - start_time,
+            interval_weeks=interval_weeks,
+            court_cost=court_cost,
+            min_skill=min_skill,
+            max_skill=max_skill,
+            max_players=max_players,
+            materialized_until=start_time - 1,
+            created_at=int(datetime.now().timestamp())
+        )
+        if await self.db.create_series(series, idempotency_key) != series.series_id:
+            return None, []
+        # The first game is created even if it starts beyond the horizon
+        return series, await self.materialize(series, until=start_time)
+
+    async def materialize(self, series: GameSeries, until: int = 0) -> List[Game]:
+        """Create the series' games that start before the horizon and do not exist yet"""
+        now = int(datetime.now().timestamp())
+        until = max(until, int((datetime.now() + timedelta(days=SERIES_HORIZON_DAYS)).timestamp()))
+
+        games = []
+        for start_time in series.occurrences(max(series.materialized_until, now), until):
+            game = Game(
+                game_id=str(uuid4()).replace("-", "")[:8],
+                game_name=series.game_name,
+                creator_id=series.creator_id,
+                location=series.location,
+                start_time=start_time,
+                end_time=start_time + series.duration,
+                court_cost=series.court_cost,
+                min_skill=series.min_skill,
+                max_skill=series.max_skill,
+                max_players=series.max_players,
+                current_players=1,
+                status='open',
+                telegram_group_id='',
+                created_at=now,
+                game_description=series.game_description,
+                series_id=series.series_id
+            )
+            game.player_ids = [series.creator_id]
+            games.append(game)
+
+        created = await self.db.materialize_series(series.series_id, games, until)
+        for game in created:
+            # New games reach saved searches and indexes the same way one-off games do
+            self.events.publish(GameCreated(game.game_id, game))
+        return created
+
+    async def run_materializer(self, context: ContextTypes.DEFAULT_TYPE):
+        """Scheduled job, rolls every active series' horizon forward"""
+        try:
+            for series in self.db.get_active_series():
+                await self.materialize(series)
+        except Exception as e:
+            logger.exception("Error materializing game series")
+
+    def get_series(self, series_id: str) -> Optional[GameSeries]:
+        return self.db.get_series(series_id)
+
+    def get_user_series(self, user_id: str) -> List[GameSeries]:
+        return self.db.get_user_series(user_id)
+
+    async def cancel_series(self, series_id: str) -> List[Game]:
+        """Stop the series and cancel its upcoming games, returning them so players can be told"""
+        games = await self.db.cancel_series(series_id, int(datetime.now().timestamp()))
+        for game in games:
+            self.events.publish(GameCancelled(game.game_id))
+        return games
+
+    async def edit_series(self, series_id: str, changes: dict) -> Dict[str, List[str]]:
+        """Change the template, returning the upcoming games updated with it and who was auto-filled into each"""
+        promoted = await self.db.update_series(series_id, changes, int(datetime.now().timestamp()))
+        for game_id in promoted:
+            self.events.publish(GameUpdated(game_id, self.db.get_game(game_id)))
+        return promoted
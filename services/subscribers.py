@@ -0,0 +1,47 @@
+"""The in-memory indexes and caches kept in step with a database through its event bus.
+
+Services that publish get their bus from wired_event_bus, so whichever of
+them is built first, everything below has subscribed before the first
+event. The indexes themselves are still built on first use.
+"""
+from typing import Set
+
+from database.db_manager import DatabaseManager
+from models.events import GameCancelled, GameChanged, GameCreated, UserDeleted, UserEvent
+from services.event_bus import EventBus, get_event_bus
+from services.inline_search_service import get_game_search_index
+from services.open_games_service import get_open_game_index
+from services.render_service import get_card_cache
+from services.saved_search_service import get_saved_search_index, record_matches
+
+# Database files whose bus already has its subscribers
+_wired: Set[str] = set()
+
+
+def wired_event_bus(db: DatabaseManager) -> EventBus:
+    bus = get_event_bus(db.db_path)
+    if db.db_path in _wired:
+        return bus
+    _wired.add(db.db_path)
+
+    cards = get_card_cache(db.db_path)
+    bus.subscribe(GameChanged, lambda event: cards.invalidate(event.game_id))
+    bus.subscribe(GameCancelled, lambda event: cards.forget(event.game_id))
+    bus.subscribe(UserEvent, lambda event: cards.invalidate_user(event.user_id))
+
+    open_games = get_open_game_index(db)
+    bus.subscribe(GameChanged, open_games.on_game_changed)
+    bus.subscribe(GameCancelled, lambda event: open_games.remove(event.game_id))
+
+    game_search = get_game_search_index(db)
+    bus.subscribe(GameChanged, game_search.on_game_changed)
+    bus.subscribe(GameCancelled, lambda event: game_search.remove(event.game_id))
+
+    saved_searches = get_saved_search_index(db)
+    bus.subscribe(UserDeleted, lambda event: saved_searches.remove_user(event.user_id))
+    # Matching writes to the database, so it runs off the publisher's path
+    bus.subscribe_async(
+        GameCreated, lambda event: record_matches(db, saved_searches, event.game),
+        name="saved_search_matches"
+    )
+    return bus
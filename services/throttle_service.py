@@ -0,0 +1,118 @@
+import os
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from telegram import Update
+from telegram.ext import ApplicationHandlerStop, ContextTypes
+
+from services.broadcast_service import TokenBucket
+
+# Commands that run listing queries or build files, everything else is cheap
+EXPENSIVE_COMMANDS = {"find", "mygames", "waitlist", "watch", "export", "stats"}
+
+# Budgets as (tokens per second, burst), overridable from the environment
+CHEAP_BUDGET = (float(os.getenv("FLOOD_CHEAP_RATE", "1")), float(os.getenv("FLOOD_CHEAP_BURST", "8")))
+EXPENSIVE_BUDGET = (float(os.getenv("FLOOD_EXPENSIVE_RATE", "0.2")), float(os.getenv("FLOOD_EXPENSIVE_BURST", "3")))
+
+# Idle buckets are dropped once this many users are tracked
+MAX_TRACKED_USERS = 10_000
+
+# How far back /throttles reports, users not throttled since are forgotten
+THROTTLE_WINDOW = int(os.getenv("FLOOD_REPORT_WINDOW", "3600"))
+# Seconds between sweeps for users outside the window
+PRUNE_EVERY = 60
+
+
+def command_name(text: str) -> str:
+    """'/approve_123_abc' -> 'approve', '/find@voro_tennis_bot' -> 'find', plain text -> ''"""
+    if not text.startswith("/"):
+        return ""
+    word = (text[1:].split(maxsplit=1) or [""])[0]
+    return word.split("@", 1)[0].split("_", 1)[0].lower()
+
+
+class FloodControl:
+    """Per-user token buckets checked before any handler runs.
+
+    Each user has one bucket for cheap commands and one for expensive ones.
+    An update that finds its bucket empty is dropped. The user gets a single
+    "slow down" reply until the bucket has tokens again, not one per
+    dropped message.
+
+    Every bot gets its own instance from its ServiceContainer, so hosting
+    several bots in one process never mixes their budgets.
+    """
+
+    def __init__(self, cheap=CHEAP_BUDGET, expensive=EXPENSIVE_BUDGET):
+        self.budgets = {"cheap": cheap, "expensive": expensive}
+        self._buckets: Dict[Tuple[int, str], TokenBucket] = {}
+        self._warned = set()
+        self.throttled: Dict[int, Counter] = {}
+        # When each user in throttled was last dropped
+        self._last_throttled: Dict[int, float] = {}
+        self._pruned = time.monotonic()
+
+    def _bucket(self, user_id: int, kind: str) -> TokenBucket:
+        bucket = self._buckets.get((user_id, kind))
+        if bucket is None:
+            if len(self._buckets) >= MAX_TRACKED_USERS * 2:
+                self._drop_idle()
+            rate, burst = self.budgets[kind]
+            bucket = self._buckets[(user_id, kind)] = TokenBucket(rate, burst)
+        return bucket
+
+    def _drop_idle(self):
+        # A full bucket behaves exactly like a new one, so forgetting it changes nothing
+        for key in [key for key, bucket in self._buckets.items() if bucket.full]:
+            del self._buckets[key]
+            self._warned.discard(key)
+
+    def allow(self, user_id: int, command: str) -> bool:
+        kind = "expensive" if command in EXPENSIVE_COMMANDS else "cheap"
+        if self._bucket(user_id, kind).try_acquire():
+            self._warned.discard((user_id, kind))
+            return True
+        self._record_throttle(user_id, kind)
+        return False
+
+    def _record_throttle(self, user_id: int, kind: str):
+        now = time.monotonic()
+        if now - self._pruned >= PRUNE_EVERY:
+            self._prune(now)
+        if now - self._last_throttled.get(user_id, now) > THROTTLE_WINDOW:
+            self.throttled.pop(user_id, None)
+        self._last_throttled[user_id] = now
+        self.throttled.setdefault(user_id, Counter())[kind] += 1
+
+    def _prune(self, now: float):
+        self._pruned = now
+        for user_id in [u for u, last in self._last_throttled.items() if now - last > THROTTLE_WINDOW]:
+            del self._last_throttled[user_id]
+            self.throttled.pop(user_id, None)
+
+    async def check(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        user = update.effective_user
+        query = update.callback_query
+        message = update.effective_message
+        if not user or not (message or query):
+            return
+
+        # A button press carries the text of the bot's own message, so it always counts as cheap
+        command = "" if query else command_name(message.text or "")
+        if self.allow(user.id, command):
+            return
+
+        kind = "expensive" if command in EXPENSIVE_COMMANDS else "cheap"
+        warn = (user.id, kind) not in self._warned
+        self._warned.add((user.id, kind))
+        if query:
+            # Unanswered, the button keeps its loading spinner until Telegram gives up on it
+            await query.answer("🐢 Slow down a little! Try again in a few seconds." if warn else None)
+        elif warn:
+            await message.reply_text("🐢 Slow down a little! Try again in a few seconds.")
+        raise ApplicationHandlerStop
+
+    def top_throttled(self, limit: int = 20) -> List[Tuple[int, Counter]]:
+        self._prune(time.monotonic())
+        return sorted(self.throttled.items(), key=lambda item: -sum(item[1].values()))[:limit]
@@ -1,31 +1,58 @@
-from database.db_manager import DatabaseManager
+from database.db_manager import DEFAULT_DB_PATH, DatabaseManager
+from models.game import Game
 from models.user import User
+from models.events import GameCancelled, PlayerLeft, UserDeleted, UserUpdated
 from datetime import datetime
+from typing import List
+from services.subscribers import wired_event_bus
+from services.match_service import MatchService
 
 class UserService:
-    def __init__(self):
-        self.db = DatabaseManager()
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db = DatabaseManager(db_path)
+        self.events = wired_event_bus(self.db)
+        self.match_service = MatchService(db_path)
     
     # modified: create_or_update_user method - changed first_name to display_name
-    def create_or_update_user(self, telegram_id: str, username: str, first_name: str) -> bool:
+    async def create_or_update_user(self, telegram_id: str, username: str, first_name: str) -> bool:
         created_at = int(datetime.now().timestamp())
-        return self.db.create_user(telegram_id, username, first_name, created_at)
+        success = await self.db.create_user(telegram_id, username, first_name, created_at)
+        if success:
+            self.events.publish(UserUpdated(str(telegram_id)))
+        return success
     
     def get_user(self, telegram_id: str) -> User:
         return self.db.get_user(telegram_id)
     
     # modified: update_skill_level method - changed skill_level to float
-    def update_skill_level(self, telegram_id: str, skill_level: float):
-        self.db.update_user_skill(telegram_id, skill_level)
+    async def update_skill_level(self, telegram_id: str, skill_level: float):
+        await self.db.update_user_skill(telegram_id, skill_level)
+        # Keep match alerts in step with the new level
+        await self.match_service.update_skill(telegram_id, skill_level)
+        self.events.publish(UserUpdated(str(telegram_id)))
 
     # added: update_display_name method
-    def update_display_name(self, telegram_id: str, display_name: str):
-        self.db.update_user_display_name(telegram_id, display_name)
+    async def update_display_name(self, telegram_id: str, display_name: str):
+        await self.db.update_user_display_name(telegram_id, display_name)
+        self.events.publish(UserUpdated(str(telegram_id)))
 
     # added: update_bio method
-    def update_bio(self, telegram_id: str, bio: str):
-        self.db.update_user_bio(telegram_id, bio)
+    async def update_bio(self, telegram_id: str, bio: str):
+        await self.db.update_user_bio(telegram_id, bio)
+        self.events.publish(UserUpdated(str(telegram_id)))
 
     # added: delete_profile method
-    def delete_profile(self, telegram_id: str):
-        self.db.delete_user(telegram_id)
\ No newline at end of file
+    async def delete_profile(self, telegram_id: str) -> List[Game]:
+        """Returns the games the user hosted, cancelled with their players, so the players can be told"""
+        user_id = str(telegram_id)
+        joined = [game.game_id for game in self.db.get_user_games(user_id) if game.creator_id != user_id]
+        cancelled = await self.db.delete_user(user_id)
+        self.match_service.index.remove(telegram_id)
+
+        for game in cancelled:
+            self.events.publish(GameCancelled(game.game_id))
+        # The games they joined lose a player
+        for game_id in joined:
+            self.events.publish(PlayerLeft(game_id, self.db.get_game(game_id), user_id))
+        self.events.publish(UserDeleted(user_id))
+        return cancelled
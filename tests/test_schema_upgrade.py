@@ -0,0 +1,62 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from database.db_manager import SCHEMA_VERSION, DatabaseManager
+
+
+class SchemaUpgradeTest(unittest.TestCase):
+    """Opening a file written by an older schema version rebuilds it without losing anything"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, "voro.db")
+        self.db = DatabaseManager(self.db_path)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("INSERT INTO users (telegram_id, username, display_name, created_at) VALUES ('1', 'a', 'A', 0)")
+            conn.execute("INSERT INTO users (telegram_id, username, display_name, created_at) VALUES ('2', 'b', 'B', 0)")
+            conn.execute('''
+                INSERT INTO games (game_id, game_name, creator_id, location, start_time, end_time,
+                                   max_players, current_players, status, created_at)
+                VALUES ('g1', 'Game', '1', 'Court', 100, 200, 2, 2, 'full', 50)
+            ''')
+            conn.execute("INSERT INTO game_players (game_id, user_id, joined_at) VALUES ('g1', '1', NULL)")
+            conn.execute("INSERT INTO game_players (game_id, user_id, joined_at) VALUES ('g1', '2', 60)")
+            conn.execute('PRAGMA user_version = 1')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def upgrade(self):
+        self.db.init_database()
+
+    def test_upgrade_keeps_the_seat_trigger(self):
+        self.upgrade()
+        with sqlite3.connect(self.db_path) as conn:
+            triggers = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'game_players'"
+            )]
+            self.assertEqual(triggers, ['game_players_after_delete'])
+
+            conn.execute("DELETE FROM game_players WHERE game_id = 'g1' AND user_id = '2'")
+            self.assertEqual(
+                conn.execute("SELECT current_players, status FROM games WHERE game_id = 'g1'").fetchone(),
+                (1, 'open')
+            )
+
+    def test_upgrade_keeps_rows_and_backfills_joined_at(self):
+        self.upgrade()
+        with sqlite3.connect(self.db_path) as conn:
+            self.assertEqual(conn.execute('PRAGMA user_version').fetchone()[0], SCHEMA_VERSION)
+            self.assertEqual(
+                conn.execute("SELECT user_id, joined_at FROM game_players ORDER BY user_id").fetchall(),
+                [('1', 50), ('2', 60)]
+            )
+            self.assertEqual(
+                conn.execute("SELECT name FROM sqlite_master WHERE name LIKE 'legacy_%'").fetchall(), []
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()